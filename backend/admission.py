@@ -0,0 +1,220 @@
+"""
+Elysia Concierge - Admission control
+Token buckets per resident and per unit, with a separate budget per request
+type, kept in a fixed-size table that pre-forked workers can share
+"""
+
+import hashlib
+import logging
+import mmap
+import multiprocessing
+import struct
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger("elysia-admission")
+
+# Request type -> (requests per minute, burst) for one resident
+DEFAULT_LIMITS: Dict[str, Tuple[float, float]] = {
+    "maintenance": (4, 6),
+    "amenity_booking": (6, 10),
+    "package_inquiry": (10, 10),
+    "guest_access": (6, 10),
+    "community_info": (10, 15),
+    "general_inquiry": (10, 15),
+}
+
+# Request types never throttled. Priority is chosen by the resident, so a
+# request marked "emergency" priority is still limited by its type.
+EXEMPT = frozenset({"emergency"})
+
+# Bucket record: key tag, tokens, last refill (monotonic seconds)
+_RECORD = struct.Struct("<Qdd")
+_WAYS = 4
+
+
+def parse_limits(spec: str) -> Dict[str, Tuple[float, float]]:
+    """Parse "maintenance=4:6,general_inquiry=20:30" (per minute:burst)"""
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        try:
+            name, values = item.split("=")
+            per_minute, burst = values.split(":")
+            limits[name.strip()] = (float(per_minute), float(burst))
+        except ValueError:
+            raise ValueError(f"Invalid rate limit {item!r}, expected type=rate:burst")
+    _check_limits(limits)
+    return limits
+
+
+def _check_limits(limits: Dict[str, Tuple[float, float]]) -> None:
+    # A zero rate never refills, and every wait is computed as deficit / rate
+    for name, (per_minute, burst) in limits.items():
+        if not (per_minute > 0 and burst > 0):
+            raise ValueError(
+                f"Invalid rate limit for {name}: {per_minute:g}:{burst:g}, "
+                "rate and burst must be positive"
+            )
+
+
+def _tag(key: str) -> int:
+    digest = hashlib.blake2b(key.encode(), digest_size=8).digest()
+    # Never 0, which marks an empty slot
+    return int.from_bytes(digest, "little") | 1
+
+
+class BucketTable:
+    """Set-associative table of token buckets.
+
+    Memory is fixed (slots * 24 bytes). A key whose set is full replaces the
+    least recently used bucket there, which at worst hands that key a fresh
+    burst. With `shared=True` the table is an anonymous shared mapping and
+    a process-shared lock, so workers forked after creation share budgets.
+    """
+
+    def __init__(self, slots: int = 65536, shared: bool = False):
+        self.sets = max(1, slots // _WAYS)
+        size = self.sets * _WAYS * _RECORD.size
+        self.shared = False
+        if shared:
+            try:
+                self._buf = mmap.mmap(-1, size)
+                self._lock = multiprocessing.Lock()
+                self.shared = True
+            except (OSError, ImportError) as e:
+                logger.warning(f"Shared rate limit table unavailable: {e}")
+        if not self.shared:
+            self._buf = bytearray(size)
+            self._lock = threading.Lock()
+
+    def _find(self, tag: int) -> Tuple[int, Optional[float], float]:
+        base = (tag % self.sets) * _WAYS
+        victim, oldest = 0, float("inf")
+        for way in range(_WAYS):
+            offset = (base + way) * _RECORD.size
+            found, tokens, updated = _RECORD.unpack_from(self._buf, offset)
+            if found == tag:
+                return offset, tokens, updated
+            if updated < oldest:
+                victim, oldest = offset, updated
+        return victim, None, 0.0
+
+    def take(
+        self, buckets: Iterable[Tuple[int, float, float]], now: float, cost: float = 1.0
+    ) -> float:
+        """Debit every (tag, rate per second, burst) bucket, or none of them.
+
+        Returns 0 when admitted, else seconds until all buckets could pay.
+        """
+        with self._lock:
+            updates: List[Tuple[int, int, float]] = []
+            wait = 0.0
+            for tag, rate, burst in buckets:
+                offset, tokens, updated = self._find(tag)
+                if tokens is None:
+                    tokens = burst
+                else:
+                    tokens = min(burst, tokens + (now - updated) * rate)
+                if tokens < cost:
+                    wait = max(wait, (cost - tokens) / rate)
+                updates.append((offset, tag, tokens - cost))
+            if wait:
+                return wait
+            for offset, tag, tokens in updates:
+                _RECORD.pack_into(self._buf, offset, tag, tokens, now)
+            return 0.0
+
+
+class AdmissionController:
+    """Per-resident and per-unit request budgets, separate per request type"""
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, Tuple[float, float]]] = None,
+        unit_factor: float = 2.0,
+        exempt: Iterable[str] = EXEMPT,
+        slots: int = 65536,
+        shared: bool = False,
+        clock: Callable[[], float] = time.monotonic,
+        table=None,
+    ):
+        self.limits = {**DEFAULT_LIMITS, **(limits or {})}
+        _check_limits(self.limits)
+        if not unit_factor > 0:
+            raise ValueError(f"unit_factor must be positive, got {unit_factor:g}")
+        self.default_limit = self.limits["general_inquiry"]
+        # Several residents share a unit, so its budget is a multiple
+        self.unit_factor = unit_factor
+        self.exempt = frozenset(exempt)
+        # Any object with BucketTable.take, e.g. shared_state.RedisBucketTable
+        self.table = table or BucketTable(slots, shared=shared)
+        self.clock = clock
+        self.metrics = {"admitted": 0, "rejected": 0, "exempt": 0}
+        self.rejected_by_type: Dict[str, int] = {}
+
+    def admit(
+        self,
+        resident_id: str,
+        unit_number: str,
+        request_type: str,
+    ) -> float:
+        """0 when the request may proceed, else seconds to wait before retrying"""
+        if self._exempt(request_type):
+            return 0.0
+        buckets = self._buckets(resident_id, unit_number, request_type)
+        return self._account(request_type, self.table.take(buckets, self.clock()))
+
+    async def admit_async(
+        self,
+        resident_id: str,
+        unit_number: str,
+        request_type: str,
+    ) -> float:
+        """`admit` for async handlers: a networked table is asked off the loop"""
+        if self._exempt(request_type):
+            return 0.0
+        buckets = self._buckets(resident_id, unit_number, request_type)
+        take_async = getattr(self.table, "take_async", None)
+        if take_async is None:
+            wait = self.table.take(buckets, self.clock())
+        else:
+            wait = await take_async(buckets, self.clock())
+        return self._account(request_type, wait)
+
+    def _exempt(self, request_type: str) -> bool:
+        if request_type in self.exempt:
+            self.metrics["exempt"] += 1
+            return True
+        return False
+
+    def _buckets(
+        self, resident_id: str, unit_number: str, request_type: str
+    ) -> List[Tuple[int, float, float]]:
+        per_minute, burst = self.limits.get(request_type, self.default_limit)
+        rate = per_minute / 60
+        return [
+            (_tag(f"r\0{resident_id}\0{request_type}"), rate, burst),
+            (
+                _tag(f"u\0{unit_number}\0{request_type}"),
+                rate * self.unit_factor,
+                burst * self.unit_factor,
+            ),
+        ]
+
+    def _account(self, request_type: str, wait: float) -> float:
+        if wait:
+            self.metrics["rejected"] += 1
+            self.rejected_by_type[request_type] = (
+                self.rejected_by_type.get(request_type, 0) + 1
+            )
+        else:
+            self.metrics["admitted"] += 1
+        return wait
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.metrics,
+            "rejected_by_type": dict(self.rejected_by_type),
+            "shared": self.table.shared,
+        }
@@ -0,0 +1,237 @@
+"""
+Elysia Concierge - Streaming analytics
+Dashboard aggregates updated incrementally per request: counts, hour-of-week
+histograms, rolling windows and count-min top-k heavy hitters, so reading
+them costs the same whatever the history size.
+Aggregates are per worker process: with several workers each one counts
+only the requests it served, and the endpoint reports which worker answered.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+try:
+    from .knowledge import QUERY_EXPANSIONS, tokenize
+except ImportError:
+    from knowledge import QUERY_EXPANSIONS, tokenize
+
+DAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+
+# Amenity name words too generic to identify one amenity
+GENERIC_AMENITY_WORDS = {"center", "space", "station", "room", "area"}
+
+
+class CountMinSketch:
+    """Approximate counts in fixed memory; never underestimates"""
+
+    def __init__(self, width: int = 2048, depth: int = 4):
+        self.width = width
+        self.depth = depth
+        self.rows = [[0] * width for _ in range(depth)]
+        self.total = 0
+
+    def _cells(self, key: str) -> List[int]:
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.width for i in range(self.depth)]
+
+    def add(self, key: str, count: int = 1) -> int:
+        """Count `key` and return its new estimate"""
+        cells = self._cells(key)
+        estimate = min(row[cell] for row, cell in zip(self.rows, cells)) + count
+        # Conservative update: only raise counters below the new estimate
+        for row, cell in zip(self.rows, cells):
+            if row[cell] < estimate:
+                row[cell] = estimate
+        self.total += count
+        return estimate
+
+    def estimate(self, key: str) -> int:
+        return min(row[cell] for row, cell in zip(self.rows, self._cells(key)))
+
+
+class HeavyHitters:
+    """Top-k keys by count-min estimate, O(k) per update"""
+
+    def __init__(self, k: int = 10, width: int = 2048, depth: int = 4):
+        self.k = k
+        self.sketch = CountMinSketch(width, depth)
+        self.top: Dict[str, int] = {}
+
+    def add(self, key: str, count: int = 1) -> None:
+        estimate = self.sketch.add(key, count)
+        if key in self.top or len(self.top) < self.k:
+            self.top[key] = estimate
+            return
+        smallest = min(self.top, key=self.top.__getitem__)
+        if estimate > self.top[smallest]:
+            del self.top[smallest]
+            self.top[key] = estimate
+
+    def items(self) -> List[Tuple[str, int]]:
+        return sorted(self.top.items(), key=lambda item: -item[1])
+
+
+class RollingCounts:
+    """Per-key counts over a sliding window of fixed-size time buckets"""
+
+    def __init__(self, window: float, buckets: int):
+        self.bucket_seconds = window / buckets
+        self.buckets = [Counter() for _ in range(buckets)]
+        self.totals: Counter = Counter()
+        self.current: Optional[int] = None
+
+    def _advance(self, now: float) -> None:
+        index = int(now // self.bucket_seconds)
+        if self.current is None:
+            self.current = index
+            return
+        # Expire the buckets that fell out of the window since the last call
+        steps = min(index - self.current, len(self.buckets))
+        for step in range(1, steps + 1):
+            bucket = self.buckets[(self.current + step) % len(self.buckets)]
+            self.totals.subtract(bucket)
+            bucket.clear()
+        self.current = max(self.current, index)
+
+    def add(self, key: str, now: float) -> None:
+        self._advance(now)
+        self.buckets[self.current % len(self.buckets)][key] += 1
+        self.totals[key] += 1
+
+    def counts(self, now: float) -> Dict[str, int]:
+        self._advance(now)
+        return {key: count for key, count in self.totals.items() if count > 0}
+
+
+def amenity_terms(names: Dict[str, str]) -> Dict[str, str]:
+    """Message word -> amenity key, from amenity display names and synonyms"""
+    terms = {}
+    for key, name in names.items():
+        for token in tokenize(name):
+            if token not in GENERIC_AMENITY_WORDS:
+                terms[token] = key
+    for word, expansions in QUERY_EXPANSIONS.items():
+        for expansion in expansions:
+            if expansion in terms:
+                terms.setdefault(word, terms[expansion])
+    return terms
+
+
+class Analytics:
+    """Management dashboard aggregates, updated as each request is processed"""
+
+    def __init__(
+        self,
+        amenity_terms: Optional[Dict[str, str]] = None,
+        top_k: int = 10,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.amenity_terms = amenity_terms or {}
+        self.clock = clock
+        self.started_at = datetime.fromtimestamp(clock())
+        self.total = 0
+        self.escalations = 0
+        self.by_type: Counter = Counter()
+        self.by_priority: Counter = Counter()
+        self.by_backend: Counter = Counter()
+        self.hour_of_week: Dict[str, List[int]] = {}
+        self.amenities = HeavyHitters(top_k)
+        self.maintenance_terms = HeavyHitters(top_k)
+        self.residents = HeavyHitters(top_k)
+        # Unit numbers come from the client, so they are sketched, not counted
+        self.units = HeavyHitters(top_k)
+        self.last_hour = RollingCounts(3600, 60)
+        self.last_day = RollingCounts(24 * 3600, 24)
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        resident_id: str,
+        unit_number: str,
+        request_type: str,
+        priority: str,
+        message: str,
+        when: datetime,
+        backend: Optional[str] = None,
+        escalated: bool = False,
+        property_id: Optional[str] = None,
+    ) -> None:
+        tokens = set(tokenize(message))
+        slot = when.weekday() * 24 + when.hour
+        now = self.clock()
+        with self._lock:
+            self.total += 1
+            self.escalations += escalated
+            self.by_type[request_type] += 1
+            self.by_priority[priority] += 1
+            if backend:
+                self.by_backend[backend] += 1
+            for histogram in ("all", request_type):
+                if histogram not in self.hour_of_week:
+                    self.hour_of_week[histogram] = [0] * 168
+                self.hour_of_week[histogram][slot] += 1
+            # Each amenity counts once per request, however it was named
+            matched = tokens & self.amenity_terms.keys()
+            for amenity in {self.amenity_terms[term] for term in matched}:
+                self.amenities.add(amenity)
+            if request_type == "maintenance":
+                for term in tokens:
+                    if len(term) > 2 and not term.isdigit():
+                        self.maintenance_terms.add(term)
+            # Resident IDs and unit numbers repeat across buildings
+            self.residents.add(json.dumps([property_id, resident_id]))
+            self.units.add(json.dumps([property_id, unit_number]))
+            self.last_hour.add(request_type, now)
+            self.last_day.add(request_type, now)
+
+    @staticmethod
+    def _peaks(histogram: Iterable[int], n: int = 5) -> List[Dict[str, Any]]:
+        ranked = sorted(enumerate(histogram), key=lambda item: -item[1])[:n]
+        return [
+            {"day": DAYS[slot // 24], "hour": slot % 24, "count": count}
+            for slot, count in ranked
+            if count
+        ]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Every aggregate; cost depends only on the fixed structure sizes"""
+        now = self.clock()
+        with self._lock:
+            return {
+                "since": self.started_at.isoformat(),
+                "total_requests": self.total,
+                "escalations": self.escalations,
+                "by_type": dict(self.by_type),
+                "by_priority": dict(self.by_priority),
+                "by_backend": dict(self.by_backend),
+                "top_units": [
+                    dict(zip(("property_id", "unit"), json.loads(key)), count=count)
+                    for key, count in self.units.items()
+                ],
+                "peak_times": self._peaks(self.hour_of_week.get("all", ())),
+                "hour_of_week": {k: list(v) for k, v in self.hour_of_week.items()},
+                "top_amenities": [
+                    {"amenity": key, "count": count}
+                    for key, count in self.amenities.items()
+                ],
+                "maintenance_patterns": [
+                    {"term": key, "count": count}
+                    for key, count in self.maintenance_terms.items()
+                ],
+                "top_residents": [
+                    dict(
+                        zip(("property_id", "resident_id"), json.loads(key)),
+                        count=count,
+                    )
+                    for key, count in self.residents.items()
+                ],
+                "last_hour": self.last_hour.counts(now),
+                "last_24h": self.last_day.counts(now),
+            }
@@ -0,0 +1,493 @@
+"""
+Elysia Concierge - Amenity booking engine
+Per-amenity capacity and operating hours, recurring bookings, and per-day
+slot counts with a "full" bitmap so conflict checks and free-slot queries
+are a few integer operations per day; schedules are kept in SQLite so
+pre-forked workers share one book
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import uuid
+from array import array
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Default capacity (concurrent parties) per amenity key
+AMENITY_CAPACITY = {
+    "fitness_center": 20,
+    "swimming_pool": 30,
+    "clubhouse": 1,
+    "coworking_spaces": 12,
+    "rooftop_terrace": 1,
+    "pet_park": 15,
+    "ev_charging_stations": 4,
+}
+
+# Listed amenities that are not reserved in advance
+NOT_BOOKABLE = {"package_room"}
+
+MAX_QUERY_DAYS = 31
+MAX_REPEAT_WEEKS = 52
+
+_HOURS = re.compile(
+    r"\((\d{1,2})(?::(\d{2}))?\s*(AM|PM)\s*-\s*(\d{1,2})(?::(\d{2}))?\s*(AM|PM)\)",
+    re.IGNORECASE,
+)
+
+
+class BookingError(ValueError):
+    """Invalid booking or availability request"""
+
+
+class UnknownAmenity(BookingError):
+    """No bookable amenity matches the given name"""
+
+
+class BookingConflict(BookingError):
+    """The requested slots are already at capacity"""
+
+
+def _minutes(hour: str, minute: Optional[str], meridiem: str) -> int:
+    h = int(hour) % 12 + (12 if meridiem.upper() == "PM" else 0)
+    return h * 60 + int(minute or 0)
+
+
+def parse_hours(description: str) -> Tuple[int, int]:
+    """Opening and closing minute of day from e.g. "Pool (6 AM - 10 PM)".
+
+    Amenities listed as "(24/7)" or without hours are open all day.
+    """
+    match = _HOURS.search(description)
+    if match is None:
+        return 0, 24 * 60
+    opens = _minutes(*match.group(1, 2, 3))
+    closes = _minutes(*match.group(4, 5, 6))
+    if closes <= opens:
+        # Past midnight: bookable until the end of the day
+        closes = 24 * 60
+    return opens, closes
+
+
+def amenity_key(description: str) -> str:
+    """Stable key from a listed amenity: "Swimming Pool (6 AM...)" -> swimming_pool"""
+    name = description.split("(")[0].strip().lower()
+    return re.sub(r"[^a-z0-9]+", "_", name).strip("_")
+
+
+@dataclass
+class Amenity:
+    key: str
+    name: str
+    capacity: int
+    open_slot: int
+    close_slot: int
+
+
+@dataclass
+class Booking:
+    booking_id: str
+    amenity: str
+    resident_id: str
+    unit_number: str
+    day: date
+    start_slot: int
+    end_slot: int
+    party_size: int = 1
+    series_id: Optional[str] = None
+
+
+class _DaySchedule:
+    """Booked parties per slot for one amenity and day"""
+
+    __slots__ = ("counts", "full")
+
+    def __init__(self, slots: int):
+        self.counts = array("H", bytes(2 * slots))
+        # Bit i set when slot i is at capacity
+        self.full = 0
+
+    @classmethod
+    def load(cls, blob: bytes, capacity: int) -> "_DaySchedule":
+        schedule = cls(0)
+        schedule.counts.frombytes(blob)
+        for slot, count in enumerate(schedule.counts):
+            if count >= capacity:
+                schedule.full |= 1 << slot
+        return schedule
+
+
+class AmenityBookings:
+    """Thread- and process-safe booking book for a property's amenities.
+
+    Day schedules live in SQLite: in memory by default, or in a WAL-mode
+    file at `path`, which pre-forked workers on a host share. A booking
+    checks and updates its days in one write transaction, so concurrent
+    workers can never overbook. `scope` separates properties in one file.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS booking_days (
+            scope TEXT NOT NULL,
+            slot_minutes INTEGER NOT NULL,
+            amenity TEXT NOT NULL,
+            day TEXT NOT NULL,
+            counts BLOB NOT NULL,
+            PRIMARY KEY (scope, slot_minutes, amenity, day)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS bookings (
+            booking_id TEXT PRIMARY KEY,
+            scope TEXT NOT NULL,
+            slot_minutes INTEGER NOT NULL,
+            payload TEXT NOT NULL
+        );
+    """
+
+    def __init__(
+        self,
+        amenities: List[Amenity],
+        slot_minutes: int = 30,
+        path: Optional[str] = None,
+        scope: str = "",
+        today: Callable[[], date] = date.today,
+    ):
+        if (24 * 60) % slot_minutes:
+            raise ValueError("slot_minutes must divide a day evenly")
+        self.slot_minutes = slot_minutes
+        self.slots_per_day = 24 * 60 // slot_minutes
+        self.amenities = {amenity.key: amenity for amenity in amenities}
+        self.path = path
+        self.scope = scope
+        self.today = today
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_amenities(
+        cls, descriptions: List[str], slot_minutes: int = 30, **options: Any
+    ) -> "AmenityBookings":
+        """Build from listed amenity strings such as "Clubhouse (6 AM - 11 PM)" """
+        amenities = []
+        for description in descriptions:
+            key = amenity_key(description)
+            if key in NOT_BOOKABLE:
+                continue
+            opens, closes = parse_hours(description)
+            amenities.append(
+                Amenity(
+                    key=key,
+                    name=description.split("(")[0].strip(),
+                    capacity=AMENITY_CAPACITY.get(key, 1),
+                    open_slot=opens // slot_minutes,
+                    close_slot=closes // slot_minutes,
+                )
+            )
+        return cls(amenities, slot_minutes, **options)
+
+    def _connect(self) -> sqlite3.Connection:
+        """This process's connection; a file is reopened after fork"""
+        if self._conn is None or (self.path and self._pid != os.getpid()):
+            conn = sqlite3.connect(
+                self.path or ":memory:",
+                timeout=30,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            if self.path:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(self.SCHEMA)
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Write transaction; IMMEDIATE locks out other workers' bookings"""
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def _schedules(
+        self, conn: sqlite3.Connection, amenity: Amenity, first: date, last: date
+    ) -> Dict[date, _DaySchedule]:
+        rows = conn.execute(
+            "SELECT day, counts FROM booking_days WHERE scope = ?"
+            " AND slot_minutes = ? AND amenity = ? AND day BETWEEN ? AND ?",
+            (
+                self.scope,
+                self.slot_minutes,
+                amenity.key,
+                first.isoformat(),
+                last.isoformat(),
+            ),
+        )
+        return {
+            date.fromisoformat(day): _DaySchedule.load(counts, amenity.capacity)
+            for day, counts in rows
+        }
+
+    def _save(
+        self,
+        conn: sqlite3.Connection,
+        amenity: Amenity,
+        schedules: Dict[date, _DaySchedule],
+    ) -> None:
+        conn.executemany(
+            "INSERT OR REPLACE INTO booking_days VALUES (?, ?, ?, ?, ?)",
+            [
+                (
+                    self.scope,
+                    self.slot_minutes,
+                    amenity.key,
+                    day.isoformat(),
+                    schedule.counts.tobytes(),
+                )
+                for day, schedule in schedules.items()
+            ],
+        )
+
+    def resolve(self, name: str) -> Amenity:
+        """Find an amenity by key, display name or unique partial name ("pool")"""
+        key = amenity_key(name)
+        if key in self.amenities:
+            return self.amenities[key]
+        matches = [a for k, a in self.amenities.items() if key and key in k]
+        if len(matches) != 1:
+            raise UnknownAmenity(f"Unknown amenity: {name}")
+        return matches[0]
+
+    def _slot(self, hhmm: str) -> int:
+        try:
+            hours, minutes = (int(part) for part in hhmm.split(":"))
+        except ValueError:
+            raise BookingError(f"Invalid time {hhmm!r}, expected HH:MM")
+        # 24:00 is the end of the day; no other hour past 23
+        if not (0 <= hours < 24 and 0 <= minutes < 60 or (hours, minutes) == (24, 0)):
+            raise BookingError(f"Invalid time {hhmm!r}, expected HH:MM")
+        total = hours * 60 + minutes
+        if total % self.slot_minutes:
+            raise BookingError(
+                f"Times must fall on {self.slot_minutes}-minute boundaries"
+            )
+        return total // self.slot_minutes
+
+    def _time(self, slot: int) -> str:
+        minutes = slot * self.slot_minutes
+        return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+    def _fits(
+        self,
+        amenity: Amenity,
+        schedule: Optional[_DaySchedule],
+        start: int,
+        end: int,
+        party_size: int,
+    ) -> bool:
+        if schedule is None:
+            return True
+        mask = ((1 << (end - start)) - 1) << start
+        if schedule.full & mask:
+            return False
+        if party_size == 1:
+            return True
+        limit = amenity.capacity - party_size
+        return all(count <= limit for count in schedule.counts[start:end])
+
+    def _reserve(
+        self, amenity: Amenity, schedule: _DaySchedule, booking: Booking, delta: int
+    ) -> None:
+        for slot in range(booking.start_slot, booking.end_slot):
+            schedule.counts[slot] += delta
+            if schedule.counts[slot] >= amenity.capacity:
+                schedule.full |= 1 << slot
+            else:
+                schedule.full &= ~(1 << slot)
+
+    def book(
+        self,
+        amenity: str,
+        resident_id: str,
+        unit_number: str,
+        day: date,
+        start_time: str,
+        end_time: str,
+        party_size: int = 1,
+        repeat_weeks: int = 0,
+    ) -> List[Booking]:
+        """Reserve a slot range, optionally weekly for `repeat_weeks` more weeks.
+
+        All occurrences are booked or none are (BookingConflict).
+        """
+        target = self.resolve(amenity)
+        start, end = self._slot(start_time), self._slot(end_time)
+        if day < self.today():
+            raise BookingError(f"{day.isoformat()} is in the past")
+        if start >= end:
+            raise BookingError("End time must be after start time")
+        if start < target.open_slot or end > target.close_slot:
+            raise BookingError(
+                f"{target.name} is open {self._time(target.open_slot)}-"
+                f"{self._time(target.close_slot)}"
+            )
+        if not 1 <= party_size <= target.capacity:
+            raise BookingError(
+                f"Party size must be between 1 and {target.capacity} "
+                f"for {target.name}"
+            )
+        if not 0 <= repeat_weeks <= MAX_REPEAT_WEEKS:
+            raise BookingError(f"repeat_weeks must be 0-{MAX_REPEAT_WEEKS}")
+
+        days = [day + timedelta(weeks=week) for week in range(repeat_weeks + 1)]
+        series_id = uuid.uuid4().hex[:8] if repeat_weeks else None
+        with self._transaction() as conn:
+            stored = self._schedules(conn, target, days[0], days[-1])
+            for occurrence in days:
+                if not self._fits(
+                    target, stored.get(occurrence), start, end, party_size
+                ):
+                    raise BookingConflict(
+                        f"{target.name} is fully booked on {occurrence.isoformat()} "
+                        f"between {start_time} and {end_time}"
+                    )
+            created, changed = [], {}
+            for occurrence in days:
+                booking = Booking(
+                    booking_id=f"BK-{uuid.uuid4().hex[:10]}",
+                    amenity=target.key,
+                    resident_id=resident_id,
+                    unit_number=unit_number,
+                    day=occurrence,
+                    start_slot=start,
+                    end_slot=end,
+                    party_size=party_size,
+                    series_id=series_id,
+                )
+                schedule = stored.get(occurrence) or _DaySchedule(self.slots_per_day)
+                self._reserve(target, schedule, booking, party_size)
+                changed[occurrence] = schedule
+                created.append(booking)
+            self._save(conn, target, changed)
+            conn.executemany(
+                "INSERT INTO bookings VALUES (?, ?, ?, ?)",
+                [
+                    (b.booking_id, self.scope, self.slot_minutes, self._encode(b))
+                    for b in created
+                ],
+            )
+        return created
+
+    def cancel(self, booking_id: str, resident_id: Optional[str] = None) -> Booking:
+        """Cancel a booking; with `resident_id`, only one that resident made"""
+        with self._transaction() as conn:
+            booking = self._get(conn, booking_id)
+            # Someone else's booking looks the same as a missing one
+            if booking is None or resident_id not in (None, booking.resident_id):
+                raise BookingError(f"No booking {booking_id}")
+            conn.execute("DELETE FROM bookings WHERE booking_id = ?", (booking_id,))
+            target = self.amenities[booking.amenity]
+            stored = self._schedules(conn, target, booking.day, booking.day)
+            schedule = stored.get(booking.day) or _DaySchedule(self.slots_per_day)
+            self._reserve(target, schedule, booking, -booking.party_size)
+            self._save(conn, target, {booking.day: schedule})
+        return booking
+
+    def get(self, booking_id: str) -> Optional[Booking]:
+        with self._lock:
+            return self._get(self._connect(), booking_id)
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = (
+                self._connect()
+                .execute(
+                    "SELECT COUNT(*) FROM bookings WHERE scope = ? AND slot_minutes = ?",
+                    (self.scope, self.slot_minutes),
+                )
+                .fetchone()
+            )
+        return count
+
+    def _get(self, conn: sqlite3.Connection, booking_id: str) -> Optional[Booking]:
+        row = conn.execute(
+            "SELECT payload FROM bookings WHERE booking_id = ? AND scope = ?"
+            " AND slot_minutes = ?",
+            (booking_id, self.scope, self.slot_minutes),
+        ).fetchone()
+        if row is None:
+            return None
+        data = json.loads(row[0])
+        return Booking(**{**data, "day": date.fromisoformat(data["day"])})
+
+    @staticmethod
+    def _encode(booking: Booking) -> str:
+        return json.dumps({**asdict(booking), "day": booking.day.isoformat()})
+
+    def free_slots(
+        self, amenity: str, start: date, end: date, party_size: int = 1
+    ) -> Dict[str, Any]:
+        """Free time ranges per day (inclusive dates) for a party of `party_size`"""
+        target = self.resolve(amenity)
+        if end < start:
+            raise BookingError("End date must not be before start date")
+        if (end - start).days >= MAX_QUERY_DAYS:
+            raise BookingError(f"Query at most {MAX_QUERY_DAYS} days at a time")
+
+        with self._lock:
+            stored = self._schedules(self._connect(), target, start, end)
+        days = {}
+        day = start
+        while day <= end:
+            schedule = stored.get(day)
+            if schedule is None:
+                blocked = 0
+            elif party_size == 1:
+                blocked = schedule.full
+            else:
+                limit = target.capacity - party_size
+                blocked = sum(
+                    1 << slot
+                    for slot, count in enumerate(schedule.counts)
+                    if count > limit
+                )
+            days[day.isoformat()] = self._ranges(target, blocked)
+            day += timedelta(days=1)
+        return {
+            "amenity": target.key,
+            "name": target.name,
+            "capacity": target.capacity,
+            "open": self._time(target.open_slot),
+            "close": self._time(target.close_slot),
+            "slot_minutes": self.slot_minutes,
+            "free": days,
+        }
+
+    def _ranges(self, amenity: Amenity, blocked: int) -> List[Dict[str, str]]:
+        ranges = []
+        run_start = None
+        for slot in range(amenity.open_slot, amenity.close_slot + 1):
+            free = slot < amenity.close_slot and not blocked >> slot & 1
+            if free and run_start is None:
+                run_start = slot
+            elif not free and run_start is not None:
+                ranges.append({"start": self._time(run_start), "end": self._time(slot)})
+                run_start = None
+        return ranges
+
+    def as_dict(self, booking: Booking) -> Dict[str, Any]:
+        data = asdict(booking)
+        data["day"] = booking.day.isoformat()
+        data["start_time"] = self._time(data.pop("start_slot"))
+        data["end_time"] = self._time(data.pop("end_slot"))
+        return data
@@ -0,0 +1,229 @@
+"""
+Elysia Concierge - Adaptive concurrency limits for inference backends
+The number of generations allowed in flight follows observed latency
+against a no-load baseline (gradient or AIMD, after Netflix
+concurrency-limits); requests over the limit wait in a FIFO queue,
+or are shed to the fallback when the wait would be too long
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Deque, Dict, Optional, Tuple
+
+ALGORITHMS = ("gradient", "aimd")
+
+
+class LimitExceeded(Exception):
+    """No concurrency slot became free in time"""
+
+
+def parse_thresholds(spec: str) -> Dict[str, float]:
+    """Parse "low=2,medium=5,high=10" (seconds of queue wait per priority)"""
+    thresholds = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        try:
+            name, seconds = item.split("=")
+            thresholds[name.strip()] = float(seconds)
+        except ValueError:
+            raise ValueError(
+                f"Invalid shed threshold {item!r}, expected priority=seconds"
+            )
+    return thresholds
+
+
+class AdaptiveLimiter:
+    """Concurrency limit for one backend, adjusted after every generation.
+
+    gradient: limit *= baseline RTT / recent RTT (clamped to [0.5, 1])
+    plus a small queue allowance, so the limit grows while
+    latency stays at the baseline and shrinks as soon as queueing inside
+    the backend inflates it.
+    aimd: +1 per on-time sample while the limit is in use, x`backoff`
+    on a slow or dropped one.
+    """
+
+    def __init__(
+        self,
+        algorithm: str = "gradient",
+        initial_limit: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        tolerance: float = 1.5,
+        smoothing: float = 0.2,
+        long_window: int = 600,
+        backoff: float = 0.9,
+    ):
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Unknown limiter algorithm {algorithm!r}")
+        self.algorithm = algorithm
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+        self.backoff = backoff
+        self._long_alpha = 2 / (long_window + 1)
+        # Baseline (long-term) and recent (short-term) latency, seconds
+        self.long_rtt: Optional[float] = None
+        self.short_rtt: Optional[float] = None
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self.metrics = {"samples": 0, "dropped": 0, "queued": 0, "timeouts": 0}
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def _has_slot(self) -> bool:
+        return self.in_flight < max(self.min_limit, math.floor(self.limit))
+
+    def estimated_wait(self) -> float:
+        """Seconds a request arriving now would queue before getting a slot"""
+        if (self._has_slot() and not self._waiters) or self.short_rtt is None:
+            return 0.0
+        # With the limit full, a slot frees up every recent RTT / limit
+        slots = max(self.min_limit, math.floor(self.limit))
+        return (self.queued + 1) * self.short_rtt / slots
+
+    async def acquire(self, timeout: Optional[float] = None) -> None:
+        """Take a slot, waiting in FIFO order; LimitExceeded after `timeout`"""
+        if self._has_slot() and not self._waiters:
+            self.in_flight += 1
+            return
+        self.metrics["queued"] += 1
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except BaseException as e:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            elif waiter.done() and not waiter.cancelled():
+                # A slot was handed over just as we gave up: pass it on
+                self.in_flight -= 1
+                self._wake()
+            if isinstance(e, asyncio.TimeoutError):
+                self.metrics["timeouts"] += 1
+                raise LimitExceeded(f"no slot within {timeout:.2f}s") from None
+            raise
+        # The releasing request handed its slot over (in_flight already counted)
+
+    def release(self, latency: Optional[float], dropped: bool = False) -> None:
+        """Return a slot; `latency` of the generation, or `dropped` on timeout"""
+        self.in_flight -= 1
+        if dropped:
+            self.metrics["dropped"] += 1
+            self.limit = max(self.min_limit, self.limit * self.backoff)
+        elif latency is not None:
+            self._sample(latency)
+        self._wake()
+
+    def _wake(self) -> None:
+        while self._waiters and self._has_slot():
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def _sample(self, latency: float) -> None:
+        self.metrics["samples"] += 1
+        if self.long_rtt is None:
+            self.long_rtt = self.short_rtt = latency
+            return
+        self.short_rtt += self.smoothing * (latency - self.short_rtt)
+        # Only adjust while the limit is actually in use; an idle backend
+        # says nothing about how much concurrency it can take
+        saturated = self.in_flight + 1 >= self.limit / 2
+        # No-load baseline: drops straight to faster recent latency, but rises
+        # only from samples taken under light load, so queueing inside the
+        # backend never becomes the new normal
+        if self.short_rtt < self.long_rtt:
+            self.long_rtt = self.short_rtt
+        elif not saturated:
+            self.long_rtt += self._long_alpha * (latency - self.long_rtt)
+
+        if self.algorithm == "aimd":
+            if latency > self.long_rtt * self.tolerance:
+                self.limit *= self.backoff
+            elif saturated:
+                self.limit += 1
+        elif saturated:
+            gradient = max(
+                0.5, min(1.0, self.tolerance * self.long_rtt / self.short_rtt)
+            )
+            # sqrt(limit) of queueing headroom lets the limit probe upwards
+            target = self.limit * gradient + math.sqrt(self.limit)
+            self.limit += self.smoothing * (target - self.limit)
+        self.limit = min(self.max_limit, max(self.min_limit, self.limit))
+
+    @asynccontextmanager
+    async def slot(self, timeout: Optional[float] = None):
+        """`async with limiter.slot():` around one generation"""
+        await self.acquire(timeout)
+        started = time.perf_counter()
+        try:
+            yield
+        except asyncio.CancelledError:
+            # The client left; says nothing about the backend
+            self.release(None)
+            raise
+        except BaseException:
+            self.release(None, dropped=True)
+            raise
+        self.release(time.perf_counter() - started)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "algorithm": self.algorithm,
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "baseline_ms": (
+                round(self.long_rtt * 1000, 2) if self.long_rtt is not None else None
+            ),
+            "recent_ms": (
+                round(self.short_rtt * 1000, 2) if self.short_rtt is not None else None
+            ),
+            **self.metrics,
+        }
+
+
+class LoadShedder:
+    """Answer lower priorities from the fallback while the queue is long.
+
+    `thresholds` maps a priority to the longest estimated queue wait
+    (seconds) it may face; priorities without one are never shed.
+    Also counts every degraded answer, whatever the reason.
+    """
+
+    def __init__(self, thresholds: Dict[str, float]):
+        self.thresholds = thresholds
+        self.degraded: Dict[Tuple[str, str], int] = {}
+
+    def check(self, priority: str, limiter: Optional[AdaptiveLimiter]) -> float:
+        """Estimated wait when `priority` should be shed, else 0"""
+        threshold = self.thresholds.get(priority)
+        if threshold is None or limiter is None:
+            return 0.0
+        wait = limiter.estimated_wait()
+        return wait if wait > threshold else 0.0
+
+    def record(self, priority: str, reason: str) -> None:
+        key = (priority, reason)
+        self.degraded[key] = self.degraded.get(key, 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        by_priority: Dict[str, int] = {}
+        by_reason: Dict[str, int] = {}
+        for (priority, reason), count in self.degraded.items():
+            by_priority[priority] = by_priority.get(priority, 0) + count
+            by_reason[reason] = by_reason.get(reason, 0) + count
+        return {
+            "thresholds_s": self.thresholds,
+            "degraded": sum(by_reason.values()),
+            "by_priority": by_priority,
+            "by_reason": by_reason,
+        }
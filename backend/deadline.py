@@ -0,0 +1,66 @@
+"""
+Elysia Concierge - Per-request deadlines
+Carries the remaining time budget from the API edge into each AI backend
+"""
+
+import time
+from typing import Callable, Mapping, Optional
+
+DEADLINE_HEADER = "x-elysia-deadline-ms"
+
+
+class DeadlineExceeded(Exception):
+    """Raised by a backend that produced nothing before the deadline"""
+
+
+class Deadline:
+    """Absolute deadline on the monotonic clock, with cooperative cancellation"""
+
+    def __init__(self, expires_at: float, clock: Callable[[], float] = time.monotonic):
+        self.expires_at = expires_at
+        self.clock = clock
+        self.cancelled = False
+
+    @classmethod
+    def after(
+        cls, seconds: float, clock: Callable[[], float] = time.monotonic
+    ) -> "Deadline":
+        return cls(clock() + seconds, clock)
+
+    @classmethod
+    def from_headers(
+        cls,
+        headers: Mapping[str, str],
+        default_seconds: float,
+        margin: float = 0.0,
+    ) -> "Deadline":
+        """Build a deadline from the request header, capped by the configured limit.
+
+        `margin` is reserved for assembling and sending the (fallback) answer.
+        """
+        budget = default_seconds
+        raw = headers.get(DEADLINE_HEADER)
+        if raw:
+            try:
+                budget = min(budget, max(0.0, float(raw) / 1000.0))
+            except ValueError:
+                pass
+        return cls.after(max(0.0, budget - margin))
+
+    def remaining(self) -> float:
+        """Seconds left, 0 once expired or cancelled"""
+        if self.cancelled:
+            return 0.0
+        return max(0.0, self.expires_at - self.clock())
+
+    def expired(self) -> bool:
+        return self.cancelled or self.clock() >= self.expires_at
+
+    def cancel(self) -> None:
+        """Mark the request as abandoned (client disconnected)"""
+        self.cancelled = True
+
+    def cap(self, seconds: Optional[float]) -> float:
+        """Return `seconds` limited to the remaining budget"""
+        remaining = self.remaining()
+        return remaining if seconds is None else min(seconds, remaining)
@@ -1,6 +1,6 @@
 """
 Elysia Concierge Core Engine
-Kairoi Residential - The Avant, Centennial CO
+Kairoi Residential - one deployment for every property in backend/properties
 
 Purpose: AI-powered concierge system for luxury apartment living
 Optimized for mobile/Vercel deployment with lightweight BLOOM model
@@ -12,34 +12,55 @@ import json
 import logging
 import os
 import platform
+import threading
+from contextlib import asynccontextmanager
 from dataclasses import asdict, dataclass
 from datetime import datetime, timedelta
 from enum import Enum
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
-try:
-    import uvicorn
-    from fastapi import FastAPI, HTTPException
-    from fastapi.middleware.cors import CORSMiddleware
-    from pydantic import BaseModel, Field
-except ImportError:
-    print("Installing required packages...")
-    os.system("pip install fastapi uvicorn pydantic")
-    import uvicorn
-    from fastapi import FastAPI, HTTPException
-    from fastapi.middleware.cors import CORSMiddleware
-    from pydantic import BaseModel, Field
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.middleware.cors import CORSMiddleware
+from pydantic import BaseModel, Field
 
-# Lightweight LLM imports
 try:
-    import torch
-    from transformers import AutoModelForCausalLM, AutoTokenizer, pipeline
+    from .booking import AmenityBookings, BookingError
+    from .deadline import Deadline
+    from .knowledge import BM25Index, property_snippets
+    from .prompting import BuiltPrompt, PromptBuilder, WhitespaceTokenizer
+    from .tenancy import PROPERTIES_DIR, Property, PropertyRegistry, UnknownProperty
+    from .tickets import TicketPipeline
 except ImportError:
-    print("Installing transformers for BLOOM model...")
-    os.system("pip install transformers torch")
-    import torch
-    from transformers import AutoModelForCausalLM, AutoTokenizer, pipeline
+    from booking import AmenityBookings, BookingError
+    from deadline import Deadline
+    from knowledge import BM25Index, property_snippets
+    from prompting import BuiltPrompt, PromptBuilder, WhitespaceTokenizer
+    from tenancy import PROPERTIES_DIR, Property, PropertyRegistry, UnknownProperty
+    from tickets import TicketPipeline
+
+# torch and transformers are imported by LightweightBloomClient when it loads
+# the model, not here: importing this module must stay cheap, and missing
+# packages are a deployment error (pip install -e ".[full]"), not something
+# to install at runtime.
+
+# Load the model during startup rather than on the first request
+PRELOAD_MODEL = os.environ.get("ELYSIA_PRELOAD_MODEL", "true").lower() == "true"
+
+# Number of property knowledge snippets retrieved into each prompt
+KNOWLEDGE_TOP_K = int(os.environ.get("ELYSIA_KNOWLEDGE_TOP_K", "3"))
+
+# Prompt length cap (tokens); low-priority sections are truncated first
+PROMPT_TOKEN_BUDGET = int(os.environ.get("ELYSIA_PROMPT_TOKEN_BUDGET", "384"))
+
+# Property data files, and the property for requests that name none
+PROPERTIES_PATH = os.environ.get("ELYSIA_PROPERTIES_DIR") or PROPERTIES_DIR
+DEFAULT_PROPERTY = os.environ.get("ELYSIA_DEFAULT_PROPERTY") or None
+
+# Per-request time budget, as in elysia_lite; clients may ask for less via
+# X-Elysia-Deadline-Ms
+REQUEST_DEADLINE = float(os.environ.get("ELYSIA_REQUEST_DEADLINE", "25"))
+DEADLINE_MARGIN = float(os.environ.get("ELYSIA_DEADLINE_MARGIN", "1.0"))
 
 
 class RequestType(str, Enum):
@@ -74,6 +95,7 @@ class ResidentRequest(BaseModel):
     priority: Priority = Priority.MEDIUM
     preferred_contact: str = "app"
     timestamp: datetime = Field(default_factory=datetime.now)
+    property_id: Optional[str] = None
 
 
 class ConciergeResponse(BaseModel):
@@ -85,47 +107,42 @@ class ConciergeResponse(BaseModel):
     follow_up_needed: bool
     escalation_required: bool
     satisfaction_prompt: bool = True
+    ticket_id: Optional[str] = None
 
 
 @dataclass
 class PropertyData:
-    """The Avant property-specific data"""
-
-    property_name: str = "The Avant"
-    location: str = "Centennial, Colorado"
-    total_units: int = 280  # Example number
-    amenities: List[str] = None
-    operating_hours: Dict[str, str] = None
-    emergency_contacts: Dict[str, str] = None
-
-    def __post_init__(self):
-        if self.amenities is None:
-            self.amenities = [
-                "Fitness Center (24/7)",
-                "Swimming Pool (6 AM - 10 PM)",
-                "Clubhouse (6 AM - 11 PM)",
-                "Coworking Spaces (24/7)",
-                "Rooftop Terrace (6 AM - 11 PM)",
-                "Pet Park (24/7)",
-                "Package Room (24/7)",
-                "EV Charging Stations",
-            ]
-
-        if self.operating_hours is None:
-            self.operating_hours = {
-                "office": "Monday-Friday 9 AM - 6 PM, Saturday 10 AM - 4 PM",
-                "maintenance": "Monday-Friday 8 AM - 5 PM, Emergency 24/7",
-                "concierge": "24/7 via Elysia",
-            }
-
-        if self.emergency_contacts is None:
-            self.emergency_contacts = {
-                "maintenance_emergency": "303-555-MAINT",
-                "security": "303-555-SECURITY",
-                "management": "303-555-MGMT",
-                "police": "911",
-                "fire": "911",
-            }
+    """Property-specific data, from the property's data file"""
+
+    property_id: str
+    property_name: str
+    location: str
+    id_prefix: str
+    total_units: int
+    amenities: List[str]
+    operating_hours: Dict[str, str]
+    emergency_contacts: Dict[str, str]
+    local_area: Dict[str, str]
+    building_info: Dict[str, Any]
+    local_highlights: List[str]
+
+    @classmethod
+    def from_property(cls, prop: Property) -> "PropertyData":
+        knowledge = prop.knowledge
+        building_info = knowledge.get("building_info", {})
+        return cls(
+            property_id=prop.property_id,
+            property_name=prop.name,
+            location=prop.location,
+            id_prefix=prop.id_prefix,
+            total_units=building_info.get("total_units", 0),
+            amenities=prop.amenities,
+            operating_hours=knowledge.get("operating_hours", {}),
+            emergency_contacts=knowledge.get("emergency_contacts", {}),
+            local_area=knowledge.get("local_area", {}),
+            building_info=building_info,
+            local_highlights=prop.local_highlights,
+        )
 
 
 class LightweightBloomClient:
@@ -141,6 +158,9 @@ class LightweightBloomClient:
         self.is_mobile = self._detect_mobile_environment()
 
         try:
+            import torch
+            from transformers import AutoModelForCausalLM, AutoTokenizer
+
             print(f"Loading {model_name} for Elysia...")
             self.tokenizer = AutoTokenizer.from_pretrained(
                 model_name, cache_dir="./models/cache"
@@ -188,17 +208,35 @@ class LightweightBloomClient:
         return False
 
     async def chat_completion(
-        self, prompt: str, temperature: float = 0.7
+        self,
+        prompt: str,
+        temperature: float = 0.7,
+        max_time: Optional[float] = None,
+        prompt_ids: Optional[List[int]] = None,
     ) -> Dict[str, Any]:
-        """Generate chat completion using BLOOM"""
+        """Generate chat completion using BLOOM
+
+        `max_time` (seconds) stops generation at the next token boundary.
+        `prompt_ids` is an already tokenized, complete prompt (see
+        `concierge_prompt_builder`); `prompt` is then only used for fallbacks.
+        """
 
         if self.model is None:
             # Mock response for demo/fallback
             return await self._mock_completion(prompt)
 
+        if max_time is not None and max_time <= 0:
+            # Out of time: skip tokenization and generation entirely
+            return await self._mock_completion(prompt)
+
         try:
+            import torch
+
+            if prompt_ids is not None:
+                return self._generate(torch.tensor([prompt_ids]), temperature, max_time)
+
             # Format prompt for concierge context
-            elysia_prompt = f"""You are Elysia, a professional concierge at The Avant luxury apartments in Centennial, Colorado. You are helpful, warm, and knowledgeable about apartment living.
+            elysia_prompt = f"""You are Elysia, a professional concierge for luxury apartment residents. You are helpful, warm, and knowledgeable about apartment living.
 
 Resident: {prompt}
 
@@ -206,36 +244,41 @@ Elysia:"""
 
             # Tokenize input
             inputs = self.tokenizer.encode(elysia_prompt, return_tensors="pt")
-
-            # Generate response
-            with torch.no_grad():
-                outputs = self.model.generate(
-                    inputs,
-                    max_length=len(inputs[0]) + 128,  # Add 128 tokens for response
-                    temperature=temperature,
-                    do_sample=True,
-                    pad_token_id=self.tokenizer.eos_token_id,
-                    top_p=0.9,
-                    top_k=50,
-                )
-
-            # Decode response
-            response = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
-
-            # Extract just the Elysia response part
-            if "Elysia:" in response:
-                response = response.split("Elysia:")[-1].strip()
-
-            return {
-                "choices": [
-                    {"message": {"content": response[:500]}}  # Limit response length
-                ]
-            }
+            return self._generate(inputs, temperature, max_time)
 
         except Exception as e:
             print(f"Error generating response: {e}")
             return await self._mock_completion(prompt)
 
+    def _generate(
+        self, inputs, temperature: float, max_time: Optional[float]
+    ) -> Dict[str, Any]:
+        """Generate from prompt token ids and return a chat completion dict"""
+        import torch
+
+        with torch.no_grad():
+            outputs = self.model.generate(
+                inputs,
+                max_length=len(inputs[0]) + 128,  # Add 128 tokens for response
+                temperature=temperature,
+                do_sample=True,
+                pad_token_id=self.tokenizer.eos_token_id,
+                top_p=0.9,
+                top_k=50,
+                max_time=max_time,
+            )
+
+        # Decode only the generated continuation, not the prompt
+        response = self.tokenizer.decode(
+            outputs[0][len(inputs[0]) :], skip_special_tokens=True
+        ).strip()
+
+        return {
+            "choices": [
+                {"message": {"content": response[:500]}}  # Limit response length
+            ]
+        }
+
     async def _mock_completion(self, prompt: str) -> Dict[str, Any]:
         """Fallback mock completion for demo purposes"""
 
@@ -253,7 +296,7 @@ Elysia:"""
         elif "guest" in prompt_lower:
             response = "I'll be glad to help set up guest access! I can create temporary access codes for your visitors. Just let me know their names and when they'll be visiting."
         else:
-            response = f"Hello! I'm Elysia, your concierge at The Avant. I'm here to help make your day better. How can I assist you today?"
+            response = f"Hello! I'm Elysia, your concierge. I'm here to help make your day better. How can I assist you today?"
 
         return {"choices": [{"message": {"content": response}}]}
 
@@ -265,16 +308,16 @@ class ElysiaPersonality:
         self.personality_traits = {
             "professional": "Warm, knowledgeable, and efficient",
             "tone": "Friendly but respectful, like a five-star hotel concierge",
-            "expertise": "Deep knowledge of The Avant and Centennial area",
+            "expertise": "Deep knowledge of each property and its neighborhood",
             "responsiveness": "Always available, never makes residents wait",
             "proactivity": "Anticipates needs and offers helpful suggestions",
         }
 
         self.response_templates = {
             "greeting": [
-                "Hello! I'm Elysia, your personal concierge at The Avant. How may I assist you today?",
-                "Good {time_of_day}! This is Elysia. What can I help you with at The Avant?",
-                "Welcome back! I'm here to make your day at The Avant even better. What do you need?",
+                "Hello! I'm Elysia, your personal concierge at {property_name}. How may I assist you today?",
+                "Good {time_of_day}! This is Elysia. What can I help you with at {property_name}?",
+                "Welcome back! I'm here to make your day at {property_name} even better. What do you need?",
             ],
             "maintenance_acknowledgment": [
                 "I've received your maintenance request and it's my priority to get this resolved quickly.",
@@ -289,23 +332,99 @@ class ElysiaPersonality:
         }
 
 
+def concierge_prompt_builder(
+    prop: Property, tokenizer=None, budget: int = PROMPT_TOKEN_BUDGET
+) -> PromptBuilder:
+    """Elysia's concierge prompt template for `prop`, tokenized with `tokenizer`"""
+    if tokenizer is None:
+        tokenizer = WhitespaceTokenizer()
+        encode = tokenizer.encode
+    else:
+
+        def encode(text: str) -> List[int]:
+            return tokenizer.encode(text, add_special_tokens=False)
+
+    return (
+        PromptBuilder(encode, tokenizer.decode, budget)
+        .static(
+            "persona",
+            f"You are Elysia, the AI concierge for {prop.name} luxury apartments "
+            f"in {prop.location}. You embody the highest standards of "
+            "hospitality - warm, professional, knowledgeable, and proactive.\n",
+        )
+        .dynamic("time", prefix="Current time: ", priority=10)
+        .dynamic("resident", prefix="Resident: ", priority=70)
+        .dynamic("facts", prefix="Relevant facts:\n", priority=40)
+        .static(
+            "guidelines",
+            "Reply like a five-star hotel concierge: acknowledge the request, "
+            "give actionable next steps, offer further help proactively, suggest "
+            f"{prop.name}'s amenities and local knowledge when helpful, "
+            "and end with how you'll follow up.\n",
+            priority=30,
+        )
+        .dynamic("request", prefix='Resident request: "', suffix='"\n', priority=90)
+        .static("cue", "Elysia:")
+    )
+
+
 class ElysiaConciergeEngine:
-    """Main concierge AI engine for The Avant"""
+    """Main concierge AI engine: one model shared by every property"""
 
     def __init__(
-        self, bloom_client: LightweightBloomClient, property_data: PropertyData
+        self,
+        bloom_client: LightweightBloomClient,
+        properties: PropertyRegistry,
+        tickets: Optional[TicketPipeline] = None,
     ):
         self.bloom_client = bloom_client
-        self.property_data = property_data
+        self.properties = properties
         self.personality = ElysiaPersonality()
         self.logger = self._setup_logging()
+        self.tickets = tickets
         self.active_requests = {}
         # @progress Elysia engine initialized with BLOOM
 
+    # Per-property artifacts are built on a property's first request and
+    # kept in the registry; the model itself is never duplicated
+
+    def _derived(self, property_id: Optional[str], kind: str, build):
+        prop = self.properties.get(property_id)
+        return self.properties.derived(prop.property_id, kind, build)
+
+    def property_data(self, property_id: Optional[str] = None) -> PropertyData:
+        return self._derived(property_id, "data", PropertyData.from_property)
+
+    def bookings(self, property_id: Optional[str] = None) -> AmenityBookings:
+        # Kept for the process lifetime; reservations must persist
+        return self._derived(
+            property_id,
+            "bookings",
+            lambda prop: AmenityBookings.from_amenities(prop.amenities),
+        )
+
+    def knowledge_index(self, property_id: Optional[str] = None) -> BM25Index:
+        """Retrieval index over everything known about the property"""
+        return self._derived(
+            property_id,
+            "bm25",
+            lambda prop: BM25Index(property_snippets(prop.knowledge)),
+        )
+
+    def prompt_builder(self, property_id: Optional[str] = None) -> PromptBuilder:
+        """Prompt template whose static sections are tokenized once per property"""
+        return self._derived(
+            property_id,
+            "prompt",
+            lambda prop: concierge_prompt_builder(prop, self.bloom_client.tokenizer),
+        )
+
     def _setup_logging(self) -> logging.Logger:
         """Setup logging for concierge operations"""
         logger = logging.getLogger("elysia-concierge")
         logger.setLevel(logging.INFO)
+        if logger.handlers:
+            return logger
 
         handler = logging.FileHandler("elysia_concierge.log")
         formatter = logging.Formatter(
@@ -317,22 +436,34 @@ class ElysiaConciergeEngine:
         return logger
 
     async def process_resident_request(
-        self, request: ResidentRequest
+        self, request: ResidentRequest, deadline=None
     ) -> ConciergeResponse:
         """Process incoming resident request with Elysia's hospitality focus"""
 
-        # Generate unique request ID
-        request_id = f"AVT-{datetime.now().strftime('%Y%m%d')}-{len(self.active_requests) + 1:04d}"
+        # Generate unique request ID (UnknownProperty for unknown IDs)
+        prop = self.properties.get(request.property_id)
+        request_id = f"{prop.id_prefix}-{datetime.now().strftime('%Y%m%d')}-{len(self.active_requests) + 1:04d}"
 
         # Log the request
         self.logger.info(f"New request: {request_id} from Unit {request.unit_number}")
 
+        # Queue the maintenance ticket before generating; it never waits on the PMS
+        ticket_id = None
+        if request.request_type == RequestType.MAINTENANCE:
+            ticket_id = await self.create_maintenance_ticket(request, request_id)
+
         # Build context-aware prompt for Elysia
         elysia_prompt = self._build_concierge_prompt(request)
+        self.logger.debug(f"Prompt tokens for {request_id}: {elysia_prompt.counts}")
 
-        # Get AI response from BLOOM
+        # Get AI response from BLOOM, bounded by the request deadline
         ai_result = await self.bloom_client.chat_completion(
-            elysia_prompt, temperature=0.7  # Balanced creativity for hospitality
+            elysia_prompt.text,
+            temperature=0.7,  # Balanced creativity for hospitality
+            max_time=deadline.remaining() if deadline is not None else None,
+            prompt_ids=(
+                elysia_prompt.ids if self.bloom_client.tokenizer is not None else None
+            ),
         )
 
         # Process response and determine actions
@@ -346,6 +477,7 @@ class ElysiaConciergeEngine:
             follow_up_needed=response_analysis["follow_up"],
             escalation_required=response_analysis["escalation"],
             satisfaction_prompt=True,
+            ticket_id=ticket_id,
         )
 
         # Store active request
@@ -354,51 +486,26 @@ class ElysiaConciergeEngine:
             "response": elysia_response,
             "timestamp": datetime.now(),
             "status": "active",
+            "prompt_tokens": elysia_prompt.counts,
         }
 
         # @progress Request processing implemented with BLOOM
         return elysia_response
 
-    def _build_concierge_prompt(self, request: ResidentRequest) -> str:
+    def _build_concierge_prompt(self, request: ResidentRequest) -> BuiltPrompt:
         """Build context-aware prompt for Elysia's personality"""
-
-        current_time = datetime.now()
-        time_of_day = self._get_time_of_day(current_time)
-
-        # Property context
-        property_context = f"""
-        You are Elysia, the AI concierge for The Avant luxury apartments in Centennial, Colorado.
-        You embody the highest standards of hospitality - warm, professional, knowledgeable, and proactive.
-        
-        Property Details:
-        - Name: {self.property_data.property_name}
-        - Location: {self.property_data.location}
-        - Available Amenities: {', '.join(self.property_data.amenities)}
-        - Current Time: {current_time.strftime('%A, %B %d, %Y at %I:%M %p')}
-        
-        Resident Information:
-        - Unit: {request.unit_number}
-        - Request Type: {request.request_type.value}
-        - Priority: {request.priority.value}
-        """
-
-        # Request-specific context
-        request_context = f"""
-        Resident Request: "{request.message}"
-        
-        Your Response Guidelines:
-        1. Be warm and professional, like a five-star hotel concierge
-        2. Acknowledge the specific request clearly
-        3. Provide actionable next steps
-        4. Offer additional assistance proactively
-        5. Use The Avant's amenities and services in your suggestions
-        6. Include relevant Centennial, Colorado local knowledge when helpful
-        7. Always end with how you'll follow up
-        
-        Response:
-        """
-
-        return property_context + request_context
+        facts = self.knowledge_index(request.property_id).context(
+            f"{request.request_type.value} {request.message}", KNOWLEDGE_TOP_K
+        )
+        return self.prompt_builder(request.property_id).build(
+            time=datetime.now().strftime("%A, %B %d, %Y at %I:%M %p"),
+            resident=(
+                f"Unit {request.unit_number}, {request.request_type.value}, "
+                f"priority {request.priority.value}"
+            ),
+            facts=facts,
+            request=request.message,
+        )
 
     def _get_time_of_day(self, dt: datetime) -> str:
         """Determine appropriate time-of-day greeting"""
@@ -438,108 +545,90 @@ class ElysiaConciergeEngine:
         }
 
     async def get_amenity_availability(
-        self, amenity: str, date: str = None
+        self, amenity: str, date: str = None, property_id: Optional[str] = None
     ) -> Dict[str, Any]:
         """Check real-time amenity availability"""
-        # Mock implementation - would integrate with booking system
-        if date is None:
-            date = datetime.now().strftime("%Y-%m-%d")
-
-        # Sample availability data
-        availability = {
-            "fitness_center": {"available": True, "hours": "24/7"},
-            "pool": {"available": True, "hours": "6 AM - 10 PM"},
-            "clubhouse": {"available": True, "next_available": "2:00 PM"},
-            "coworking": {"available": True, "hours": "24/7"},
-        }
+        day = (
+            datetime.strptime(date, "%Y-%m-%d").date()
+            if date is not None
+            else datetime.now().date()
+        )
+        try:
+            slots = self.bookings(property_id).free_slots(amenity, day, day)
+        except BookingError:
+            return {"available": False}
 
-        return availability.get(amenity.lower().replace(" ", "_"), {"available": False})
+        free = slots["free"][day.isoformat()]
+        return {
+            "available": bool(free),
+            "hours": f"{slots['open']} - {slots['close']}",
+            "free_slots": free,
+        }
         # @progress Amenity availability checking implemented
 
-    async def create_maintenance_ticket(self, request: ResidentRequest) -> str:
+    async def create_maintenance_ticket(
+        self, request: ResidentRequest, request_id: str = ""
+    ) -> str:
         """Create maintenance ticket in property management system"""
-        # Mock implementation - would integrate with Yardi/RentManager
-        ticket_id = f"MAINT-{datetime.now().strftime('%Y%m%d%H%M')}"
+        if self.tickets is None:
+            ticket_id = f"MAINT-{datetime.now().strftime('%Y%m%d%H%M')}"
+        else:
+            # Enqueued only; the pipeline persists it and delivers it to the PMS
+            ticket_id = self.tickets.submit(
+                f"{request.resident_id}:{request.timestamp.isoformat()}:{request.message}",
+                request.resident_id,
+                request.unit_number,
+                request.message,
+                request.priority.value,
+                request_id,
+                self.properties.get(request.property_id).property_id,
+            )
 
         self.logger.info(
             f"Maintenance ticket created: {ticket_id} for Unit {request.unit_number}"
         )
-
-        # In production, this would:
-        # 1. Create ticket in PMS
-        # 2. Notify maintenance staff
-        # 3. Send confirmation to resident
-        # 4. Schedule follow-up
-
         return ticket_id
         # @progress Maintenance ticket creation implemented
 
 
-# API Endpoints for The Avant
-
-
-@post("/api/elysia/request")
-async def submit_resident_request(data: ResidentRequest) -> ConciergeResponse:
-    """Submit a request to Elysia concierge"""
-
-    # Initialize Elysia (in production, this would be a singleton)
-    property_data = PropertyData()
-    elysia = ElysiaConciergeEngine(mistral_client, property_data)
-
-    response = await elysia.process_resident_request(data)
-    return response
-
-
-@get("/api/elysia/amenities")
-async def get_amenities() -> Dict[str, Any]:
-    """Get The Avant amenity information"""
-    property_data = PropertyData()
-
-    return {
-        "amenities": property_data.amenities,
-        "operating_hours": property_data.operating_hours,
-        "booking_available": True,
-    }
+# Every building this deployment serves; only small data files are read here
+properties = PropertyRegistry.load(PROPERTIES_PATH, DEFAULT_PROPERTY)
 
+_engine: Optional[ElysiaConciergeEngine] = None
+_engine_lock = threading.Lock()
 
-@get("/api/elysia/community")
-async def get_community_info() -> Dict[str, Any]:
-    """Get The Avant community information"""
-    return {
-        "property_name": "The Avant",
-        "location": "Centennial, Colorado",
-        "local_highlights": [
-            "Cherry Creek State Park - 5 minutes",
-            "Centennial Center Park - 2 minutes",
-            "Light Rail Access - Cherry Creek Station",
-            "Premium Shopping - Cherry Creek Mall",
-            "Dining - Centennial Promenade",
-        ],
-        "weather_today": "Check current Colorado weather",
-        "events": "Community events updated weekly",
-    }
 
+def get_engine() -> ElysiaConciergeEngine:
+    """The process-wide engine, created (and the model loaded) on first use"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                tickets = TicketPipeline()
+                # Resumes delivery of tickets a previous run left in the outbox
+                tickets.start()
+                _engine = ElysiaConciergeEngine(
+                    LightweightBloomClient(), properties, tickets
+                )
+    return _engine
 
-@get("/api/elysia/status/{request_id}")
-async def get_request_status(request_id: str) -> Dict[str, Any]:
-    """Get status of a specific resident request"""
-    # Mock implementation
-    return {
-        "request_id": request_id,
-        "status": "in_progress",
-        "last_update": datetime.now().isoformat(),
-        "estimated_completion": "Within 24 hours",
-    }
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Load the model off the event loop before taking traffic"""
+    if PRELOAD_MODEL:
+        await asyncio.get_running_loop().run_in_executor(None, get_engine)
+    yield
+    if _engine is not None and _engine.tickets is not None:
+        await asyncio.get_running_loop().run_in_executor(None, _engine.tickets.stop)
 
-# Initialize BLOOM client for lightweight deployment
-bloom_client = LightweightBloomClient()
 
 # FastAPI application setup
 app = FastAPI(
     title="Elysia Concierge API",
-    description="AI-powered concierge for The Avant luxury apartments",
+    description="AI-powered concierge for luxury apartment communities",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # CORS middleware for cross-origin requests
@@ -551,27 +640,36 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# API Endpoints for The Avant
+# API Endpoints
 
 
-@app.post("/api/elysia/request")
-async def submit_resident_request(data: ResidentRequest) -> ConciergeResponse:
-    """Submit a request to Elysia concierge"""
+def _property_data(property_id: Optional[str]) -> PropertyData:
+    try:
+        prop = properties.get(property_id)
+    except UnknownProperty as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return properties.derived(prop.property_id, "data", PropertyData.from_property)
 
-    # Initialize Elysia with BLOOM client
-    property_data = PropertyData()
-    elysia = ElysiaConciergeEngine(bloom_client, property_data)
 
-    response = await elysia.process_resident_request(data)
-    return response
+@app.post("/api/elysia/request")
+async def submit_resident_request(
+    data: ResidentRequest, http_request: Request
+) -> ConciergeResponse:
+    """Submit a request to Elysia concierge"""
+    _property_data(data.property_id)
+    deadline = Deadline.from_headers(
+        http_request.headers, REQUEST_DEADLINE, DEADLINE_MARGIN
+    )
+    return await get_engine().process_resident_request(data, deadline=deadline)
 
 
 @app.get("/api/elysia/amenities")
-async def get_amenities() -> Dict[str, Any]:
-    """Get The Avant amenity information"""
-    property_data = PropertyData()
+async def get_amenities(property_id: Optional[str] = None) -> Dict[str, Any]:
+    """A property's amenity information"""
+    property_data = _property_data(property_id)
 
     return {
+        "property_id": property_data.property_id,
         "amenities": property_data.amenities,
         "operating_hours": property_data.operating_hours,
         "booking_available": True,
@@ -579,19 +677,15 @@ async def get_amenities() -> Dict[str, Any]:
 
 
 @app.get("/api/elysia/community")
-async def get_community_info() -> Dict[str, Any]:
-    """Get The Avant community information"""
+async def get_community_info(property_id: Optional[str] = None) -> Dict[str, Any]:
+    """A property's community information"""
+    property_data = _property_data(property_id)
     return {
-        "property_name": "The Avant",
-        "location": "Centennial, Colorado",
-        "local_highlights": [
-            "Cherry Creek State Park - 5 minutes",
-            "Centennial Center Park - 2 minutes",
-            "Light Rail Access - Cherry Creek Station",
-            "Premium Shopping - Cherry Creek Mall",
-            "Dining - Centennial Promenade",
-        ],
-        "weather_today": "Check current Colorado weather",
+        "property_id": property_data.property_id,
+        "property_name": property_data.property_name,
+        "location": property_data.location,
+        "local_highlights": property_data.local_highlights,
+        "weather_today": "Check current local weather",
         "events": "Community events updated weekly",
     }
 
@@ -614,7 +708,8 @@ async def health_check():
     return {
         "status": "healthy",
         "service": "Elysia Concierge",
-        "property": "The Avant",
+        "property": properties.default.name,
+        "properties": properties.stats(),
         "timestamp": datetime.now().isoformat(),
         "ai_model": "BLOOM-560M",
         "version": "1.0.0",
@@ -626,7 +721,9 @@ async def root():
     """Root endpoint with service information"""
     return {
         "service": "Elysia Concierge API",
-        "property": "The Avant - Centennial, Colorado",
+        "properties": {
+            prop.property_id: f"{prop.name} - {prop.location}" for prop in properties
+        },
         "management": "Kairoi Residential",
         "status": "operational",
         "endpoints": {
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Elysia Concierge - Fast request body decoding
+Route class that validates a JSON body straight from the raw bytes with a
+precompiled TypeAdapter and calls the endpoint without dependency
+solving; anything it can't take goes through FastAPI's own handler
+
+Usage: python ingest.py [--requests N]   (benchmark against the default route)
+"""
+
+import argparse
+import asyncio
+import inspect
+import json
+import time
+from typing import Any, Callable, Dict, List, Optional, get_type_hints
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+
+def _is_json(content_type: Optional[str]) -> bool:
+    # Same media types FastAPI decodes as JSON
+    if not content_type:
+        return False
+    media_type = content_type.partition(";")[0].strip().lower()
+    maintype, _, subtype = media_type.partition("/")
+    return maintype == "application" and (
+        subtype == "json" or subtype.endswith("+json")
+    )
+
+
+class FastBodyRoute(APIRoute):
+    """APIRoute for endpoints taking one pydantic body plus Request/Response.
+
+    A JSON body that validates is decoded by `TypeAdapter.validate_json`
+    (no intermediate dict, no dependency solving) and the result is
+    serialized like FastAPI does. Invalid bodies, other content types and
+    empty bodies fall back to the default handler, so clients get exactly
+    the same errors (422 RequestValidationError, 400) as without it.
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+        super().__init__(path, endpoint, **kwargs)
+        if not inspect.iscoroutinefunction(endpoint):
+            raise ValueError(f"{path}: fast body decoding needs an async endpoint")
+        hints = get_type_hints(endpoint)
+        self._body_param = None
+        self._request_params: List[str] = []
+        self._response_params: List[str] = []
+        for name in inspect.signature(endpoint).parameters:
+            annotation = hints.get(name)
+            if annotation is Request:
+                self._request_params.append(name)
+            elif annotation is Response:
+                self._response_params.append(name)
+            elif (
+                self._body_param is None
+                and inspect.isclass(annotation)
+                and issubclass(annotation, BaseModel)
+            ):
+                self._body_param = name
+                self.body_adapter = TypeAdapter(annotation)
+            else:
+                raise ValueError(
+                    f"{path}: fast body decoding supports one pydantic body "
+                    f"plus Request/Response parameters, not {name!r}"
+                )
+        if self._body_param is None:
+            raise ValueError(f"{path}: endpoint has no pydantic body parameter")
+        self.response_adapter = (
+            TypeAdapter(self.response_model) if self.response_model else None
+        )
+
+    def get_route_handler(self) -> Callable:
+        default_handler = super().get_route_handler()
+
+        async def handler(request: Request) -> Response:
+            if _is_json(request.headers.get("content-type")):
+                try:
+                    data = self.body_adapter.validate_json(await request.body())
+                except ValidationError:
+                    # Re-decoded below (the body is cached on the request)
+                    pass
+                else:
+                    return await self._respond(data, request)
+            return await default_handler(request)
+
+        return handler
+
+    async def _respond(self, data: BaseModel, request: Request) -> Response:
+        # Same sub-response FastAPI hands to endpoints for headers/status
+        sub_response = Response()
+        del sub_response.headers["content-length"]
+        sub_response.status_code = None
+        values: Dict[str, Any] = {self._body_param: data}
+        values.update((name, request) for name in self._request_params)
+        values.update((name, sub_response) for name in self._response_params)
+        result = await self.endpoint(**values)
+        if isinstance(result, Response):
+            return result
+        if self.response_adapter is not None:
+            content = self.response_adapter.dump_json(
+                self.response_adapter.validate_python(result), by_alias=True
+            )
+        else:
+            content = json.dumps(result).encode("utf-8")
+        response = Response(
+            content,
+            status_code=sub_response.status_code or self.status_code or 200,
+            media_type="application/json",
+        )
+        response.headers.raw.extend(sub_response.headers.raw)
+        return response
+
+
+async def _asgi_post(app, path: str, body: bytes) -> int:
+    """One POST through the full ASGI stack (middleware, routing, handler)"""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [
+            (b"host", b"bench"),
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ],
+        "client": ("127.0.0.1", 1),
+        "server": ("bench", 80),
+    }
+    sent = False
+    status = 0
+
+    async def receive():
+        nonlocal sent
+        if sent:
+            await asyncio.sleep(3600)
+            return {"type": "http.disconnect"}
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Per-request cost of /api/elysia/request decoding: "
+        "default route vs FastBodyRoute"
+    )
+    parser.add_argument("--requests", type=int, default=20_000)
+    args = parser.parse_args(argv)
+
+    from fastapi import APIRouter, FastAPI
+    from fastapi.middleware.cors import CORSMiddleware
+
+    from elysia_lite import ConciergeResponse, ResidentRequest
+
+    answer = ConciergeResponse(
+        response="The fitness center is open 5 AM to 11 PM daily.",
+        request_id="AVT-20261019-0001",
+        estimated_resolution_time="Immediate response",
+        follow_up_needed=False,
+        escalation_required=False,
+    )
+
+    # A cached answer: what's left is framework and decoding cost
+    async def cached(
+        data: ResidentRequest, http_request: Request, http_response: Response
+    ) -> ConciergeResponse:
+        http_response.headers["X-Elysia-Backend"] = "cache"
+        return answer
+
+    app = FastAPI()
+    app.add_middleware(CORSMiddleware, allow_origins=["*"])
+    for prefix, route_class in (("/default", APIRoute), ("/fast", FastBodyRoute)):
+        router = APIRouter(route_class=route_class)
+        router.post("/api/elysia/request")(cached)
+        app.include_router(router, prefix=prefix)
+
+    body = json.dumps(
+        {
+            "resident_id": "AVT-RES-304-001",
+            "unit_number": "304",
+            "request_type": "amenity_booking",
+            "message": "What time does the fitness center open tomorrow?",
+            "priority": "low",
+            "timestamp": "2026-10-19T09:30:00",
+        }
+    ).encode()
+
+    async def run(path: str) -> float:
+        for _ in range(200):
+            assert await _asgi_post(app, path, body) == 200
+        started = time.perf_counter()
+        for _ in range(args.requests):
+            await _asgi_post(app, path, body)
+        return (time.perf_counter() - started) / args.requests
+
+    async def decode_only() -> Dict[str, float]:
+        adapter = TypeAdapter(ResidentRequest)
+        timings = {}
+        for name, decode in (
+            (
+                "json.loads + model_validate",
+                lambda: adapter.validate_python(json.loads(body)),
+            ),
+            ("validate_json", lambda: adapter.validate_json(body)),
+        ):
+            started = time.perf_counter()
+            for _ in range(args.requests):
+                decode()
+            timings[name] = (time.perf_counter() - started) / args.requests
+        return timings
+
+    default = asyncio.run(run("/default/api/elysia/request"))
+    fast = asyncio.run(run("/fast/api/elysia/request"))
+    print(f"{args.requests:,} cached-answer POSTs through the ASGI app:")
+    print(f"  default route: {default * 1e6:7.1f} us/request")
+    print(
+        f"  FastBodyRoute: {fast * 1e6:7.1f} us/request ({1 - fast / default:.0%} less)"
+    )
+    print("decoding alone:")
+    for name, seconds in asyncio.run(decode_only()).items():
+        print(f"  {name}: {seconds * 1e6:7.1f} us/request")
+
+
+if __name__ == "__main__":
+    main()
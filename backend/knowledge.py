@@ -0,0 +1,193 @@
+"""
+Elysia Concierge - Property knowledge retrieval
+BM25 inverted index over amenities, hours, local area, contacts and building
+info, so prompts carry only the few facts relevant to a request
+"""
+
+import math
+import re
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Tuple
+
+STOPWORDS = {
+    "a",
+    "an",
+    "and",
+    "are",
+    "at",
+    "be",
+    "can",
+    "do",
+    "does",
+    "for",
+    "i",
+    "in",
+    "is",
+    "it",
+    "me",
+    "my",
+    "of",
+    "on",
+    "or",
+    "the",
+    "to",
+    "we",
+    "what",
+    "with",
+    "you",
+}
+
+# Resident vocabulary -> words used in the property knowledge (stemmed)
+QUERY_EXPANSIONS = {
+    "gym": ("fitnes",),
+    "workout": ("fitnes",),
+    "exercise": ("fitnes",),
+    "swim": ("pool",),
+    "swimming": ("pool",),
+    "lap": ("pool",),
+    "dog": ("pet",),
+    "cat": ("pet",),
+    "party": ("clubhouse",),
+    "event": ("clubhouse",),
+    "work": ("coworking",),
+    "desk": ("coworking",),
+    "car": ("ev", "charging"),
+    "charge": ("charging",),
+    "delivery": ("package",),
+    "mail": ("package",),
+    "parcel": ("package",),
+    "restaurant": ("dining",),
+    "eat": ("dining",),
+    "food": ("dining",),
+    "coffee": ("cafe",),
+    "shop": ("shopping",),
+    "store": ("shopping",),
+    "mall": ("shopping",),
+    "train": ("transit", "rail"),
+    "bus": ("transit",),
+    "fire": ("emergency",),
+    "leak": ("maintenance",),
+    "leaking": ("maintenance",),
+    "flood": ("maintenance", "emergency"),
+    "broken": ("maintenance",),
+    "repair": ("maintenance",),
+    "manager": ("management",),
+    "open": ("hour",),
+    "close": ("hour",),
+    "when": ("hour",),
+}
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without stopwords, with plural 's' stripped"""
+    tokens = []
+    for word in _WORD.findall(text.lower()):
+        if word in STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith("s"):
+            word = word[:-1]
+        tokens.append(word)
+    return tokens
+
+
+@dataclass
+class Snippet:
+    """One retrievable fact"""
+
+    section: str
+    text: str
+
+
+def property_snippets(knowledge: Dict[str, Any]) -> List[Snippet]:
+    """Flatten knowledge sections (lists, dicts or scalars) into snippets"""
+    snippets = []
+    for section, value in knowledge.items():
+        title = section.replace("_", " ").capitalize()
+        if isinstance(value, dict):
+            for key, item in value.items():
+                label = key.replace("_", " ")
+                snippets.append(Snippet(section, f"{title} - {label}: {item}"))
+        elif isinstance(value, (list, tuple)):
+            snippets.extend(Snippet(section, str(item)) for item in value)
+        else:
+            snippets.append(Snippet(section, f"{title}: {value}"))
+    return snippets
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed set of snippets, built once at startup"""
+
+    def __init__(self, snippets: List[Snippet], k1: float = 1.5, b: float = 0.75):
+        self.snippets = snippets
+        self.k1 = k1
+        self.b = b
+        # term -> [(snippet index, term frequency)]
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self.lengths: List[int] = []
+        for i, snippet in enumerate(snippets):
+            # Section names count as text so "hours" finds operating hours
+            tokens = tokenize(f"{snippet.section} {snippet.text}")
+            self.lengths.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                self.postings[term].append((i, tf))
+        self.avg_length = sum(self.lengths) / len(self.lengths) if snippets else 0.0
+        n = len(snippets)
+        self.idf = {
+            term: math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self.postings.items()
+        }
+
+    def state(self) -> Dict[str, Any]:
+        """JSON-safe index contents, for the build-time snapshot"""
+        return {
+            "snippets": [[s.section, s.text] for s in self.snippets],
+            "k1": self.k1,
+            "b": self.b,
+            "postings": self.postings,
+            "lengths": self.lengths,
+            "avg_length": self.avg_length,
+            "idf": self.idf,
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "BM25Index":
+        """Rebuild from `state()` without re-tokenizing the snippets"""
+        index = cls.__new__(cls)
+        index.snippets = [Snippet(section, text) for section, text in state["snippets"]]
+        index.k1 = state["k1"]
+        index.b = state["b"]
+        index.postings = defaultdict(list)
+        for term, docs in state["postings"].items():
+            index.postings[term] = [(i, tf) for i, tf in docs]
+        index.lengths = state["lengths"]
+        index.avg_length = state["avg_length"]
+        index.idf = state["idf"]
+        return index
+
+    def query_terms(self, query: str) -> List[str]:
+        terms = tokenize(query)
+        for term in list(terms):
+            terms.extend(QUERY_EXPANSIONS.get(term, ()))
+        return terms
+
+    def search(self, query: str, k: int = 3) -> List[Tuple[Snippet, float]]:
+        """Top-k snippets by BM25 score; snippets sharing no term are skipped"""
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(self.query_terms(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for i, tf in self.postings[term]:
+                norm = self.k1 * (
+                    1 - self.b + self.b * self.lengths[i] / self.avg_length
+                )
+                scores[i] += idf * tf * (self.k1 + 1) / (tf + norm)
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [(self.snippets[i], score) for i, score in ranked[:k]]
+
+    def context(self, query: str, k: int = 3) -> str:
+        """Relevant facts as prompt lines, or "" when nothing matches"""
+        return "\n".join(f"- {snippet.text}" for snippet, _ in self.search(query, k))
@@ -0,0 +1,169 @@
+"""
+Elysia Concierge - Zero-downtime model swap
+A replacement model is loaded in the background and must answer a canary
+prompt before it takes traffic; the old one is freed once the requests
+already running on it have finished
+"""
+
+import asyncio
+import gc
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger("elysia-model-swap")
+
+
+class SwapInProgress(Exception):
+    """Another swap has not finished yet"""
+
+
+class InFlight:
+    """Generations in progress, per backend object"""
+
+    def __init__(self):
+        self._counts: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def track(self, backend: Any):
+        key = id(backend)
+        with self._lock:
+            self._counts[key] = self._counts.get(key, 0) + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._counts[key] -= 1
+                if not self._counts[key]:
+                    del self._counts[key]
+
+    def count(self, backend: Any) -> int:
+        with self._lock:
+            return self._counts.get(id(backend), 0)
+
+    async def drained(self, backend: Any, timeout: float, poll: float = 0.05) -> bool:
+        """Wait until nothing runs on `backend`; False if `timeout` passed first"""
+        deadline = time.monotonic() + timeout
+        while self.count(backend):
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(poll)
+        return True
+
+
+def release(backend: Any) -> None:
+    """Drop a retired backend's model so its memory can be reclaimed"""
+    close = getattr(backend, "close", None)
+    if close is not None:
+        close()
+    gc.collect()
+
+
+@dataclass
+class SwapRecord:
+    """Progress of one swap, as reported by /health and the admin endpoint"""
+
+    backend: str
+    model: str
+    state: str = "loading"
+    started_at: float = field(default_factory=time.time)
+    timings_ms: Dict[str, float] = field(default_factory=dict)
+    canary: Optional[str] = None
+    error: Optional[str] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class ModelSwapper:
+    """Load, verify, switch, drain, free: one swap at a time.
+
+    `install(name, backend)` performs the atomic switch and returns the
+    backend it replaced; `canary(backend)` returns the canary answer or
+    raises when the new model is not fit to serve.
+    """
+
+    def __init__(
+        self,
+        install: Callable[[str, Any], Optional[Any]],
+        canary: Callable[[Any], Awaitable[str]],
+        in_flight: InFlight,
+        drain_timeout: float = 120.0,
+        history: int = 10,
+    ):
+        self.install = install
+        self.canary = canary
+        self.in_flight = in_flight
+        self.drain_timeout = drain_timeout
+        self.current: Optional[SwapRecord] = None
+        self.history: "deque[SwapRecord]" = deque(maxlen=history)
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def busy(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, name: str, model: str, load: Callable[[], Any]) -> SwapRecord:
+        """Begin a swap in the background and return its record"""
+        if self.busy:
+            raise SwapInProgress(f"{self.current.backend} swap is {self.current.state}")
+        record = SwapRecord(name, model)
+        self.current = record
+        self.history.append(record)
+        self._task = asyncio.create_task(self._swap(record, load))
+        return record
+
+    async def _swap(self, record: SwapRecord, load: Callable[[], Any]) -> None:
+        loop = asyncio.get_running_loop()
+        phase_started = time.perf_counter()
+
+        def step(state: str) -> None:
+            nonlocal phase_started
+            now = time.perf_counter()
+            record.timings_ms[record.state] = round((now - phase_started) * 1000, 2)
+            record.state = state
+            phase_started = now
+
+        backend = None
+        try:
+            # Loading blocks (disk, network, weights); keep it off the loop
+            backend = await loop.run_in_executor(None, load)
+            step("canary")
+            record.canary = await self.canary(backend)
+            old = self.install(record.backend, backend)
+        except Exception as e:
+            record.error = f"{type(e).__name__}: {e}"
+            step("failed")
+            logger.warning(f"Swap to {record.backend} {record.model} failed: {e}")
+            if backend is not None:
+                await loop.run_in_executor(None, release, backend)
+            return
+
+        step("draining")
+        logger.info(f"Swapped {record.backend} to {record.model}")
+        if old is not None:
+            if not await self.in_flight.drained(old, self.drain_timeout):
+                logger.warning(
+                    f"Freeing old {record.backend} model with "
+                    f"{self.in_flight.count(old)} requests still running"
+                )
+            # close() may wait for a generation thread to let go of the model
+            await loop.run_in_executor(None, release, old)
+        step("complete")
+
+    async def wait(self) -> Optional[SwapRecord]:
+        if self._task is not None:
+            await asyncio.shield(self._task)
+        return self.current
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "busy": self.busy,
+            "current": self.current.as_dict() if self.current is not None else None,
+            "history": [record.as_dict() for record in self.history],
+        }
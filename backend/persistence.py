@@ -0,0 +1,316 @@
+"""
+Elysia Concierge - PostgreSQL persistence
+Request/response pairs are queued off the response path and group-committed
+in batches by a background task over an asyncpg connection pool
+"""
+
+import asyncio
+import json
+import logging
+import time
+from dataclasses import astuple, dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+try:
+    import asyncpg
+
+    # Retrying these can never succeed; the batch is dropped instead
+    DATA_ERRORS: tuple = (asyncpg.DataError, asyncpg.IntegrityConstraintViolationError)
+except ImportError:
+    asyncpg = None
+    DATA_ERRORS = ()
+
+logger = logging.getLogger("elysia-persistence")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS concierge_requests (
+    request_id TEXT PRIMARY KEY,
+    resident_id TEXT NOT NULL,
+    unit_number TEXT NOT NULL,
+    request_type TEXT NOT NULL,
+    priority TEXT NOT NULL,
+    status TEXT NOT NULL,
+    message TEXT NOT NULL,
+    response TEXT NOT NULL,
+    backend TEXT,
+    ticket_id TEXT,
+    escalation_required BOOLEAN NOT NULL DEFAULT FALSE,
+    latency_ms DOUBLE PRECISION,
+    created_at TIMESTAMPTZ NOT NULL,
+    payload JSONB NOT NULL
+);
+-- Resident history, newest first
+CREATE INDEX IF NOT EXISTS concierge_requests_resident_idx
+    ON concierge_requests (resident_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS concierge_requests_unit_idx
+    ON concierge_requests (unit_number, created_at DESC);
+-- Open work queue; stays small because closed requests are excluded
+CREATE INDEX IF NOT EXISTS concierge_requests_open_idx
+    ON concierge_requests (status, created_at) WHERE status <> 'closed';
+"""
+
+# Request IDs are unique per request; a clash means two requests got the
+# same ID, and the stored one must not be overwritten by the other
+_INSERT = """
+INSERT INTO concierge_requests (
+    request_id, resident_id, unit_number, request_type, priority, status,
+    message, response, backend, ticket_id, escalation_required, latency_ms,
+    created_at, payload
+) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14::jsonb)
+ON CONFLICT (request_id) DO NOTHING
+"""
+
+_COLUMNS = (
+    "request_id, resident_id, unit_number, request_type, priority, status,"
+    " message, response, backend, ticket_id, escalation_required, latency_ms,"
+    " created_at"
+)
+
+
+@dataclass
+class PersistedRequest:
+    """One ResidentRequest/ConciergeResponse pair as stored"""
+
+    request_id: str
+    resident_id: str
+    unit_number: str
+    request_type: str
+    priority: str
+    status: str
+    message: str
+    response: str
+    backend: Optional[str]
+    ticket_id: Optional[str]
+    escalation_required: bool
+    latency_ms: Optional[float]
+    created_at: datetime
+    payload: Dict[str, Any] = field(default_factory=dict)
+
+    def as_row(self) -> tuple:
+        row = astuple(self)
+        return row[:-1] + (json.dumps(self.payload),)
+
+
+class RequestPersistence:
+    """Bounded write-behind queue drained in group commits by one task.
+
+    `enqueue` never waits: while the database is slow the queue absorbs
+    the backlog, and once it is full new records are dropped and counted.
+    A failed batch is retried with backoff rather than lost.
+    """
+
+    def __init__(
+        self,
+        dsn: str,
+        pool_size: int = 10,
+        batch_size: int = 100,
+        flush_interval: float = 0.05,
+        max_queue: int = 10000,
+        retry_backoff: float = 1.0,
+        command_timeout: float = 10.0,
+    ):
+        self.dsn = dsn
+        self.pool_size = pool_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.retry_backoff = retry_backoff
+        self.command_timeout = command_timeout
+        self.pool = None
+        # Created in start(): queues and pools belong to the worker's loop
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.metrics = {
+            "enqueued": 0,
+            "written": 0,
+            "batches": 0,
+            "dropped": 0,
+            "errors": 0,
+        }
+        self.last_error: Optional[str] = None
+
+    async def start(self) -> None:
+        """Start the writer; connecting happens (and is retried) in the task"""
+        if self._task is None:
+            self._queue = asyncio.Queue(self.max_queue)
+            self._task = asyncio.create_task(self._run())
+
+    def enqueue(self, record: PersistedRequest) -> bool:
+        if self._queue is None:
+            return False
+        try:
+            self._queue.put_nowait(record)
+        except asyncio.QueueFull:
+            self.metrics["dropped"] += 1
+            if self.metrics["dropped"] % 1000 == 1:
+                logger.warning(
+                    f"Persistence queue full, dropped {self.metrics['dropped']} records"
+                )
+            return False
+        self.metrics["enqueued"] += 1
+        return True
+
+    async def _connect(self) -> None:
+        if asyncpg is None:
+            raise RuntimeError("Persistence needs the asyncpg package")
+        pool = await asyncpg.create_pool(
+            self.dsn,
+            min_size=1,
+            max_size=self.pool_size,
+            command_timeout=self.command_timeout,
+        )
+        try:
+            async with pool.acquire() as conn:
+                await conn.execute(SCHEMA)
+        except BaseException:
+            await pool.close()
+            raise
+        self.pool = pool
+
+    async def _write(self, batch: List[PersistedRequest]) -> None:
+        """One transaction per batch: a single commit (fsync) for all rows"""
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.executemany(_INSERT, [r.as_row() for r in batch])
+
+    async def _next_batch(self) -> List[PersistedRequest]:
+        batch = [await self._queue.get()]
+        # Group commit: give concurrent requests a moment to join the batch
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        backoff = self.retry_backoff
+        while self.pool is None:
+            try:
+                await self._connect()
+            except Exception as e:
+                self._failed(e, "connect")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+        while True:
+            batch = await self._next_batch()
+            backoff = self.retry_backoff
+            while True:
+                try:
+                    await self._write(batch)
+                    self.metrics["written"] += len(batch)
+                    self.metrics["batches"] += 1
+                    break
+                except asyncio.CancelledError:
+                    raise
+                except DATA_ERRORS as e:
+                    self._failed(e, f"write of {len(batch)} records (dropped)")
+                    self.metrics["dropped"] += len(batch)
+                    break
+                except Exception as e:
+                    self._failed(e, f"write of {len(batch)} records")
+                    await asyncio.sleep(backoff)
+                    backoff = min(backoff * 2, 30.0)
+            for _ in batch:
+                self._queue.task_done()
+
+    def _failed(self, error: Exception, action: str) -> None:
+        self.metrics["errors"] += 1
+        self.last_error = f"{type(error).__name__}: {error}"
+        logger.warning(f"Persistence {action} failed: {self.last_error}")
+
+    async def flush(self, timeout: float = 10.0) -> bool:
+        """Wait until everything queued so far is committed"""
+        if self._queue is None:
+            return True
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def stop(self, timeout: float = 5.0) -> None:
+        """Drain what we can within `timeout`, then close the pool"""
+        if self._task is None:
+            return
+        if self.pool is not None:
+            await self.flush(timeout)
+        if self._queue.qsize():
+            logger.warning(f"Persistence stopped with {self._queue.qsize()} unsaved")
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        if self.pool is not None:
+            await self.pool.close()
+            self.pool = None
+
+    async def get(self, request_id: str) -> Optional[Dict[str, Any]]:
+        """Status lookup by primary key"""
+        if self.pool is None:
+            return None
+        row = await self.pool.fetchrow(
+            f"SELECT {_COLUMNS} FROM concierge_requests WHERE request_id = $1",
+            request_id,
+        )
+        return dict(row) if row else None
+
+    async def history(
+        self,
+        resident_id: str,
+        limit: int = 20,
+        before: Optional[datetime] = None,
+        property_id: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """A resident's requests, newest first (keyset-paginated by created_at).
+
+        Resident IDs repeat across buildings; `property_id` picks one.
+        """
+        if self.pool is None:
+            return []
+        rows = await self.pool.fetch(
+            f"SELECT {_COLUMNS} FROM concierge_requests WHERE resident_id = $1"
+            " AND ($2::timestamptz IS NULL OR created_at < $2)"
+            " AND ($4::text IS NULL"
+            " OR payload -> 'request' ->> 'property_id' = $4)"
+            " ORDER BY created_at DESC LIMIT $3",
+            resident_id,
+            before,
+            limit,
+            property_id,
+        )
+        return [dict(row) for row in rows]
+
+    async def open_requests(self, limit: int = 100) -> List[Dict[str, Any]]:
+        if self.pool is None:
+            return []
+        rows = await self.pool.fetch(
+            f"SELECT {_COLUMNS} FROM concierge_requests WHERE status <> 'closed'"
+            " ORDER BY created_at LIMIT $1",
+            limit,
+        )
+        return [dict(row) for row in rows]
+
+    def stats(self) -> Dict[str, Any]:
+        batches = self.metrics["batches"]
+        return {
+            **self.metrics,
+            "connected": self.pool is not None,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "avg_batch_size": (
+                round(self.metrics["written"] / batches, 2) if batches else 0.0
+            ),
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,335 @@
+"""
+Elysia Concierge - Pre-fork model sharing
+Loads the model once in a parent process, then forks workers that share its
+memory pages copy-on-write (mmap'd GGUF weights, read-only torch tensors)
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import random
+import signal
+import socket
+import sys
+import time
+import traceback
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Set
+
+
+def memory_usage(pid: Optional[int] = None) -> Dict[str, int]:
+    """Return rss/pss/uss/shared bytes for a process (Linux smaps_rollup)"""
+    path = f"/proc/{pid if pid is not None else 'self'}/smaps_rollup"
+    fields: Dict[str, int] = {}
+    with open(path) as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 3 and parts[-1] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1]) * 1024
+    return {
+        "rss": fields.get("Rss", 0),
+        "pss": fields.get("Pss", 0),
+        # Unique set size: what this process alone adds to physical memory
+        "uss": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0),
+        "shared": fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0),
+    }
+
+
+def freeze_for_fork() -> None:
+    """Stop the GC from writing to (and so un-sharing) pages inherited by workers"""
+    gc.collect()
+    gc.freeze()
+
+
+def make_tensors_read_only(model: Any) -> Any:
+    """Prepare a torch model so forked workers never write to its weights.
+
+    Parameters stay in pages shared copy-on-write with the parent as long as
+    nothing writes to them: no autograd state, eval mode only. With
+    ELYSIA_TORCH_SHARE_MEMORY=true storages are also moved to shared memory
+    (needs a /dev/shm large enough for the weights).
+    """
+    model.eval()
+    for param in model.parameters():
+        param.requires_grad_(False)
+    if os.environ.get("ELYSIA_TORCH_SHARE_MEMORY", "false").lower() == "true":
+        model.share_memory()
+    return model
+
+
+def bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    """Bind the listening socket once so every worker accepts from it"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def fork_worker(target: Callable[[], None]) -> int:
+    """Fork one child that runs `target` and exits; returns the child pid"""
+    pid = os.fork()
+    if pid == 0:
+        code = 0
+        try:
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            target()
+        except BaseException:
+            traceback.print_exc()
+            code = 1
+        finally:
+            os._exit(code)
+    return pid
+
+
+class CrashLoop(RuntimeError):
+    """Workers keep dying; restarting them any further won't help"""
+
+
+def supervise(
+    spawn: Callable[[], int],
+    workers: int,
+    graceful_timeout: Optional[float] = None,
+    crash_backoff: float = 0.5,
+    max_backoff: float = 30.0,
+    max_crashes: int = 5,
+    crash_window: float = 60.0,
+) -> None:
+    """Keep `workers` children from `spawn()` running until SIGTERM/SIGINT.
+
+    A child that exits cleanly (recycled after max_requests) is replaced at
+    once. One that crashes is replaced after an exponential backoff, and
+    `max_crashes` crashes within `crash_window` seconds stop every worker
+    and raise CrashLoop, instead of forking a broken worker forever.
+    """
+    stopping = False
+    stop_requested_at = 0.0
+    children = {spawn() for _ in range(workers)}
+    # Monotonic times at which a crashed worker is due to be replaced
+    respawns: List[float] = []
+    crashes: Deque[float] = deque()
+    gave_up: Optional[str] = None
+    # Signalled once each: a second SIGTERM makes uvicorn skip its drain
+    signalled: Set[int] = set()
+
+    def stop(signum=None, frame=None) -> None:
+        nonlocal stopping, stop_requested_at
+        if not stopping:
+            stopping = True
+            stop_requested_at = time.monotonic()
+        for pid in list(children - signalled):
+            signalled.add(pid)
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                children.discard(pid)
+
+    previous = {
+        signum: signal.signal(signum, stop)
+        for signum in (signal.SIGTERM, signal.SIGINT)
+    }
+    kill_after = (graceful_timeout or 30.0) + 5.0
+    try:
+        while children or (respawns and not stopping):
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                pid, status = 0, 0
+            now = time.monotonic()
+            if pid == 0:
+                if stopping:
+                    # A worker forked while the signal was being handled
+                    stop()
+                if stopping and now - stop_requested_at > kill_after:
+                    # Drain window is over; stop waiting for stuck generations
+                    for child in list(children):
+                        try:
+                            os.kill(child, signal.SIGKILL)
+                        except ProcessLookupError:
+                            children.discard(child)
+                if not stopping:
+                    for due in [t for t in respawns if t <= now]:
+                        respawns.remove(due)
+                        children.add(spawn())
+                time.sleep(0.05)
+                continue
+            children.discard(pid)
+            if stopping:
+                continue
+            if os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0:
+                # Recycled; replace it from the preloaded parent
+                children.add(spawn())
+                continue
+            crashes.append(now)
+            while crashes[0] < now - crash_window:
+                crashes.popleft()
+            if len(crashes) >= max_crashes:
+                gave_up = f"{len(crashes)} worker crashes within {crash_window:.0f}s"
+                print(f"Elysia pre-fork: {gave_up}, shutting down")
+                respawns.clear()
+                stop()
+                continue
+            delay = min(crash_backoff * 2 ** (len(crashes) - 1), max_backoff)
+            print(
+                f"Elysia pre-fork: worker {pid} died ({_exit_reason(status)}), "
+                f"restarting in {delay:.1f}s"
+            )
+            respawns.append(now + delay)
+    finally:
+        for signum, handler in previous.items():
+            signal.signal(signum, handler)
+    if gave_up:
+        raise CrashLoop(gave_up)
+
+
+def _exit_reason(status: int) -> str:
+    if os.WIFSIGNALED(status):
+        return f"signal {os.WTERMSIG(status)}"
+    return f"exit code {os.WEXITSTATUS(status)}"
+
+
+def serve_prefork(
+    app: Any,
+    host: str,
+    port: int,
+    workers: int,
+    log_level: str = "info",
+    max_requests: Optional[int] = None,
+    max_requests_jitter: int = 0,
+    graceful_timeout: Optional[float] = None,
+    max_crashes: int = 5,
+    **uvicorn_options: Any,
+) -> None:
+    """Serve an already-imported app from `workers` forked uvicorn processes.
+
+    The app module (and with it the model) must be imported before calling
+    this, and must not have run inference yet: thread pools in torch and
+    llama.cpp are not fork-safe, so each worker creates its own lazily.
+
+    Workers exit gracefully after `max_requests` (plus random jitter so they
+    don't all recycle at once) and are replaced from the preloaded parent.
+    Crashed workers are replaced with backoff; a crash loop raises CrashLoop
+    (see `supervise`). On SIGTERM/SIGINT every worker stops accepting,
+    finishes in-flight requests within `graceful_timeout`, and is killed if
+    it overruns.
+    """
+    import uvicorn
+
+    sock = bind_socket(host, port)
+    freeze_for_fork()
+
+    def run_worker() -> None:
+        limit = None
+        if max_requests:
+            limit = max_requests + random.randint(0, max(0, max_requests_jitter))
+        config = uvicorn.Config(
+            app,
+            log_level=log_level,
+            limit_max_requests=limit,
+            timeout_graceful_shutdown=graceful_timeout,
+            **uvicorn_options,
+        )
+        uvicorn.Server(config).run(sockets=[sock])
+
+    print(f"Elysia pre-fork: {workers} workers sharing model pages on {host}:{port}")
+    try:
+        supervise(
+            lambda: fork_worker(run_worker),
+            workers,
+            graceful_timeout=graceful_timeout,
+            max_crashes=max_crashes,
+        )
+    finally:
+        sock.close()
+
+
+def measure_sharing(
+    load: Callable[[], Any],
+    touch: Callable[[Any], None],
+    workers: int = 4,
+    settle: float = 0.2,
+) -> Dict[str, Any]:
+    """Measure memory per worker when a preloaded model is shared by fork.
+
+    `load` runs once in the parent, `touch` runs in every child (e.g. a
+    generation) so pages it reads are resident. Reports the parent RSS and
+    each worker's unique (USS) and proportional (PSS) memory.
+    """
+    model = load()
+    freeze_for_fork()
+    parent = memory_usage()
+
+    pids: List[int] = []
+    ready_fds: List[int] = []
+    for _ in range(workers):
+        read_fd, write_fd = os.pipe()
+
+        def child(write_fd: int = write_fd, read_fd: int = read_fd) -> None:
+            os.close(read_fd)
+            touch(model)
+            os.write(write_fd, b"1")
+            time.sleep(3600)
+
+        pids.append(fork_worker(child))
+        os.close(write_fd)
+        ready_fds.append(read_fd)
+
+    try:
+        for fd in ready_fds:
+            os.read(fd, 1)
+            os.close(fd)
+        time.sleep(settle)
+        per_worker = [memory_usage(pid) for pid in pids]
+    finally:
+        for pid in pids:
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+
+    return {
+        "workers": workers,
+        "parent_rss": parent["rss"],
+        "worker_uss": [m["uss"] for m in per_worker],
+        "worker_pss": [m["pss"] for m in per_worker],
+        "worker_rss": [m["rss"] for m in per_worker],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Measure memory per worker for the configured Elysia model"
+    )
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+    def load() -> Any:
+        import elysia_lite
+
+        return elysia_lite.elysia_engine
+
+    def touch(engine: Any) -> None:
+        import elysia_lite
+
+        request = elysia_lite.ResidentRequest(
+            resident_id="MEASURE",
+            unit_number="000",
+            request_type=elysia_lite.RequestType.MAINTENANCE,
+            message="The kitchen faucet is dripping",
+        )
+        asyncio.run(engine.ai.generate_response(request))
+
+    report = measure_sharing(load, touch, workers=args.workers)
+    mib = 1024 * 1024
+    print(json.dumps(report, indent=2))
+    print(f"Parent RSS (model loaded): {report['parent_rss'] / mib:.1f} MiB")
+    for i, uss in enumerate(report["worker_uss"], 1):
+        print(f"Worker {i}: +{uss / mib:.1f} MiB unique")
+
+
+if __name__ == "__main__":
+    main()
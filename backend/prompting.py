@@ -0,0 +1,127 @@
+"""
+Elysia Concierge - Token-budgeted prompt assembly
+Static prompt sections are tokenized once per model; only dynamic fields are
+tokenized per request. Over budget, the lowest-priority sections are
+truncated first, and token counts are reported per section.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+_PIECES = re.compile(r"\s*\S+|\s+")
+
+
+class WhitespaceTokenizer:
+    """Stand-in when no model tokenizer is loaded: words are tokens"""
+
+    def encode(self, text: str) -> List[str]:
+        return _PIECES.findall(text)
+
+    def decode(self, ids: List[str]) -> str:
+        return "".join(ids)
+
+
+@dataclass
+class BuiltPrompt:
+    """Assembled prompt: token ids, text and per-section token counts"""
+
+    ids: List[Any]
+    text: str
+    counts: Dict[str, int]
+    truncated: List[str] = field(default_factory=list)
+
+    @property
+    def total_tokens(self) -> int:
+        return len(self.ids)
+
+
+@dataclass
+class _Section:
+    name: str
+    priority: int
+    static_ids: Optional[List[Any]] = None
+    prefix_ids: List[Any] = field(default_factory=list)
+    suffix_ids: List[Any] = field(default_factory=list)
+
+
+class PromptBuilder:
+    """Prompt template made of static and dynamic sections, in order.
+
+    Sections are tokenized separately and concatenated, so each section
+    should end on a newline to keep token boundaries where a tokenizer
+    would put them anyway. Higher priority sections survive truncation.
+    """
+
+    def __init__(
+        self,
+        encode: Callable[[str], List[Any]],
+        decode: Callable[[List[Any]], str],
+        budget: int = 512,
+    ):
+        self.encode = encode
+        self.decode = decode
+        self.budget = budget
+        self.sections: List[_Section] = []
+
+    def static(self, name: str, text: str, priority: int = 100) -> "PromptBuilder":
+        """Fixed text, tokenized now and reused for every prompt"""
+        self.sections.append(_Section(name, priority, static_ids=self.encode(text)))
+        return self
+
+    def dynamic(
+        self, name: str, prefix: str = "", suffix: str = "\n", priority: int = 50
+    ) -> "PromptBuilder":
+        """Per-request value between a pre-tokenized prefix and suffix"""
+        self.sections.append(
+            _Section(
+                name,
+                priority,
+                prefix_ids=self.encode(prefix) if prefix else [],
+                suffix_ids=self.encode(suffix) if suffix else [],
+            )
+        )
+        return self
+
+    def build(self, **values: str) -> BuiltPrompt:
+        """Assemble the prompt from dynamic `values`, keyed by section name"""
+        parts: Dict[str, List[Any]] = {}
+        for section in self.sections:
+            if section.static_ids is not None:
+                parts[section.name] = section.static_ids
+            else:
+                value = values.get(section.name)
+                parts[section.name] = self.encode(value) if value else []
+
+        def size(section: _Section) -> int:
+            ids = parts[section.name]
+            if section.static_ids is not None or not ids:
+                return len(ids)
+            return len(section.prefix_ids) + len(ids) + len(section.suffix_ids)
+
+        truncated = []
+        excess = sum(size(s) for s in self.sections) - self.budget
+        for section in sorted(self.sections, key=lambda s: s.priority):
+            if excess <= 0:
+                break
+            before = size(section)
+            ids = parts[section.name]
+            if section.static_ids is not None or excess >= len(ids):
+                # Static text can't be cut mid-way, and framing around no
+                # text is useless; drop the section as a whole
+                parts[section.name] = []
+            else:
+                parts[section.name] = ids[: len(ids) - excess]
+            if before:
+                truncated.append(section.name)
+            excess -= before - size(section)
+
+        ids: List[Any] = []
+        counts: Dict[str, int] = {}
+        for section in self.sections:
+            section_ids = parts[section.name]
+            if section.static_ids is None and section_ids:
+                section_ids = section.prefix_ids + section_ids + section.suffix_ids
+            ids.extend(section_ids)
+            counts[section.name] = len(section_ids)
+        return BuiltPrompt(ids, self.decode(ids), counts, truncated)
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Elysia Concierge - Compact stored request records
+One __slots__ object per stored request instead of a dict holding two
+pydantic models and two datetimes: enum members and repeated strings are
+shared, timestamps are integers, long answers may be zlib-compressed
+
+Usage: python records.py [--entries N] [--baseline-entries N] [--compress]
+       (memory benchmark: bytes per stored request)
+"""
+
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+import zlib
+from collections.abc import Mapping
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, Optional, Tuple, Union
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+# Bits of RequestRecord.flags
+FOLLOW_UP = 1
+ESCALATION = 2
+SATISFACTION = 4
+DEGRADED = 8
+REQUESTED_AWARE = 16
+CREATED_AWARE = 32
+
+KEYS = ("request", "response", "timestamp", "status", "routing")
+
+
+def to_micros(dt: datetime) -> Tuple[int, bool]:
+    """Microseconds since the epoch, and whether `dt` was timezone-aware"""
+    if dt.tzinfo is not None:
+        utc = dt.astimezone(timezone.utc).replace(tzinfo=None)
+        return (utc - _EPOCH) // _MICROSECOND, True
+    return (dt - _EPOCH) // _MICROSECOND, False
+
+
+def from_micros(value: int, aware: bool = False) -> datetime:
+    dt = _EPOCH + timedelta(microseconds=value)
+    return dt.replace(tzinfo=timezone.utc) if aware else dt
+
+
+def pack_text(text: str, compress_min: Optional[int] = None) -> Union[str, bytes]:
+    """`text` as is, or zlib-compressed when at least `compress_min` long"""
+    if compress_min is None or len(text) < compress_min:
+        return text
+    packed = zlib.compress(text.encode(), 6)
+    # Short or already dense text can come out larger
+    return packed if len(packed) < len(text) else text
+
+
+def unpack_text(value: Union[str, bytes]) -> str:
+    return zlib.decompress(value).decode() if isinstance(value, bytes) else value
+
+
+def _shared(value: Optional[str]) -> Optional[str]:
+    # IDs, units and labels repeat across requests: keep one copy of each
+    return sys.intern(value) if value is not None else None
+
+
+class RequestRecord(Mapping):
+    """A stored request and its answer, in about a quarter of the memory.
+
+    Reads like the old record dict ("request", "response", "timestamp",
+    "status", "routing"); those views are rebuilt on access, so hot paths
+    should use the attributes instead. Subclasses set `request_model` and
+    `response_model` to the pydantic classes the views are built with.
+    """
+
+    __slots__ = (
+        "request_id",
+        "resident_id",
+        "unit_number",
+        "property_id",
+        "request_type",
+        "priority",
+        "contact",
+        "message",
+        "requested_at",
+        "text",
+        "eta",
+        "ticket_id",
+        "flags",
+        "created_at",
+        "status",
+        "backend",
+        "reason",
+        "complexity",
+        "latency_ms",
+    )
+
+    request_model: Any = None
+    response_model: Any = None
+
+    @classmethod
+    def create(
+        cls,
+        request: Any,
+        response: Any,
+        created_at: datetime,
+        status: str,
+        routing: Dict[str, Any],
+        compress_min: Optional[int] = None,
+    ) -> "RequestRecord":
+        record = cls()
+        record.request_id = response.request_id
+        record.resident_id = _shared(request.resident_id)
+        record.unit_number = _shared(request.unit_number)
+        record.property_id = _shared(getattr(request, "property_id", None))
+        # Enum members are singletons already
+        record.request_type = request.request_type
+        record.priority = request.priority
+        record.contact = _shared(request.preferred_contact)
+        record.message = request.message
+        record.requested_at, requested_aware = to_micros(request.timestamp)
+        record.text = pack_text(response.response, compress_min)
+        record.eta = _shared(response.estimated_resolution_time)
+        record.ticket_id = response.ticket_id
+        record.created_at, created_aware = to_micros(created_at)
+        record.flags = (
+            (FOLLOW_UP if response.follow_up_needed else 0)
+            | (ESCALATION if response.escalation_required else 0)
+            | (SATISFACTION if response.satisfaction_prompt else 0)
+            | (DEGRADED if routing.get("degraded") else 0)
+            | (REQUESTED_AWARE if requested_aware else 0)
+            | (CREATED_AWARE if created_aware else 0)
+        )
+        record.status = _shared(status)
+        record.backend = _shared(routing["backend"])
+        record.reason = _shared(routing.get("reason", ""))
+        record.complexity = _shared(routing.get("complexity", ""))
+        record.latency_ms = routing.get("latency_ms", 0.0)
+        return record
+
+    @property
+    def response_text(self) -> str:
+        return unpack_text(self.text)
+
+    @property
+    def degraded(self) -> bool:
+        return bool(self.flags & DEGRADED)
+
+    def request(self) -> Any:
+        return self.request_model.model_construct(
+            resident_id=self.resident_id,
+            unit_number=self.unit_number,
+            request_type=self.request_type,
+            message=self.message,
+            priority=self.priority,
+            preferred_contact=self.contact,
+            timestamp=from_micros(
+                self.requested_at, bool(self.flags & REQUESTED_AWARE)
+            ),
+            property_id=self.property_id,
+        )
+
+    def response(self) -> Any:
+        return self.response_model.model_construct(
+            response=self.response_text,
+            request_id=self.request_id,
+            estimated_resolution_time=self.eta,
+            follow_up_needed=bool(self.flags & FOLLOW_UP),
+            escalation_required=bool(self.flags & ESCALATION),
+            satisfaction_prompt=bool(self.flags & SATISFACTION),
+            ticket_id=self.ticket_id,
+            degraded=self.degraded,
+        )
+
+    def timestamp(self) -> datetime:
+        return from_micros(self.created_at, bool(self.flags & CREATED_AWARE))
+
+    def routing(self) -> Dict[str, Any]:
+        return {
+            "backend": self.backend,
+            "reason": self.reason,
+            "complexity": self.complexity,
+            "degraded": self.degraded,
+            "latency_ms": self.latency_ms,
+        }
+
+    def __getitem__(self, key: str) -> Any:
+        if key == "status":
+            return self.status
+        if key in KEYS:
+            return getattr(self, key)()
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(KEYS)
+
+    def __len__(self) -> int:
+        return len(KEYS)
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} {self.request_id} {self.status}>"
+
+
+def _footprint(build, entries: int) -> Tuple[float, float]:
+    """Bytes per entry held by `build(i)` results, and seconds per entry"""
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    store = {}
+    for i in range(entries):
+        store[f"AVT-20261019-{i:07d}"] = build(i)
+    elapsed = time.perf_counter() - started
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del store
+    gc.collect()
+    return current / entries, elapsed / entries
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Memory per stored request: record dicts vs compact records"
+    )
+    parser.add_argument("--entries", type=int, default=1_000_000)
+    parser.add_argument(
+        "--baseline-entries",
+        type=int,
+        default=100_000,
+        help="dict records are ~5x larger; measured on fewer entries",
+    )
+    parser.add_argument(
+        "--compress",
+        type=int,
+        nargs="?",
+        const=200,
+        default=None,
+        metavar="MIN_CHARS",
+        help="zlib-compress answers of at least MIN_CHARS (default 200)",
+    )
+    args = parser.parse_args(argv)
+
+    from elysia_lite import (
+        WARMUP_MESSAGES,
+        ConciergeResponse,
+        Priority,
+        RequestType,
+        ResidentRequest,
+        StoredRequest,
+    )
+
+    types = list(RequestType)
+    created = datetime.now()
+    answer = (
+        "Thank you for reporting this maintenance issue in Unit {unit}. I've "
+        "created a work order and our team will assess the situation within 24 "
+        "hours. You'll receive updates via the app as we progress. Is there "
+        "anything else about this issue I should know?"
+    )
+
+    def parts(i: int):
+        request_type = types[i % len(types)]
+        unit = str(100 + i % 280)
+        request = ResidentRequest(
+            resident_id=f"AVT-RES-{unit}-{i % 3:03d}",
+            unit_number=unit,
+            request_type=request_type,
+            message=f"{WARMUP_MESSAGES[request_type]} (#{i})",
+            priority=Priority.MEDIUM,
+            property_id="the-avant",
+        )
+        response = ConciergeResponse(
+            response=answer.format(unit=unit),
+            request_id=f"AVT-20261019-{i:07d}",
+            estimated_resolution_time="24-48 hours for standard requests",
+            follow_up_needed=True,
+            escalation_required=False,
+            ticket_id=(
+                f"TKT-{i:08x}" if request_type == RequestType.MAINTENANCE else None
+            ),
+        )
+        routing = {
+            "backend": "mock",
+            "reason": "FAQ-style request",
+            "complexity": "simple",
+            "degraded": False,
+            "latency_ms": round(0.5 + i % 100 / 10, 2),
+        }
+        return request, response, routing
+
+    def as_dict(i: int):
+        request, response, routing = parts(i)
+        return {
+            "request": request,
+            "response": response,
+            "timestamp": created,
+            "status": "active",
+            "routing": routing,
+        }
+
+    def as_record(i: int):
+        request, response, routing = parts(i)
+        return StoredRequest.create(
+            request, response, created, "active", routing, args.compress
+        )
+
+    baseline, _ = _footprint(as_dict, args.baseline_entries)
+    compact, seconds = _footprint(as_record, args.entries)
+    label = f"compact (zlib >= {args.compress} chars)" if args.compress else "compact"
+    print(f"dict of models: {baseline:8.0f} bytes/request ({args.baseline_entries:,})")
+    print(
+        f"{label}: {compact:8.0f} bytes/request ({args.entries:,}, "
+        f"{compact * args.entries / 2**20:.0f} MiB total, "
+        f"{seconds * 1e6:.1f} us/request to build, traced)"
+    )
+    print(f"saving: {1 - compact / baseline:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Elysia Concierge - Tail-latency protection for remote inference
+Rolling latency percentiles, hedged calls and a circuit breaker
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Optional, Tuple
+
+
+class LatencyTracker:
+    """Rolling window of recent call latencies (seconds)"""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.min_samples = min_samples
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self.samples.append(seconds)
+
+    def percentile(self, q: float, default: Optional[float] = None) -> Optional[float]:
+        """Return the q-th quantile (0-1), or `default` until enough samples exist"""
+        with self._lock:
+            if len(self.samples) < self.min_samples:
+                return default
+            ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+        return ordered[index]
+
+
+class CircuitBreaker:
+    """Closed -> open -> half-open breaker driven by error rate and latency"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        window: int = 20,
+        min_calls: int = 5,
+        error_rate_threshold: float = 0.5,
+        latency_threshold: Optional[float] = None,
+        reset_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.window = window
+        self.min_calls = min_calls
+        self.error_rate_threshold = error_rate_threshold
+        self.latency_threshold = latency_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.clock = clock
+
+        # (succeeded, latency) for the most recent calls
+        self.outcomes: Deque[Tuple[bool, float]] = deque(maxlen=window)
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def _maybe_half_open(self) -> None:
+        if (
+            self._state == self.OPEN
+            and self.clock() - self._opened_at >= self.reset_timeout
+        ):
+            self._state = self.HALF_OPEN
+            self._probes_in_flight = 0
+
+    def allow_request(self) -> bool:
+        """Return True if a call may go to the protected backend"""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.HALF_OPEN:
+                if self._probes_in_flight < self.half_open_max_calls:
+                    self._probes_in_flight += 1
+                    return True
+            return False
+
+    def record_success(self, latency: float) -> None:
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                slow = (
+                    self.latency_threshold is not None
+                    and latency > self.latency_threshold
+                )
+                if slow:
+                    self._trip()
+                else:
+                    self._state = self.CLOSED
+                    self.outcomes.clear()
+                return
+            self.outcomes.append((True, latency))
+            self._evaluate()
+
+    def record_failure(self, latency: float = 0.0) -> None:
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._trip()
+                return
+            self.outcomes.append((False, latency))
+            self._evaluate()
+
+    def record_abandoned(self) -> None:
+        """Release a half-open probe slot for a call that never completed"""
+        with self._lock:
+            if self._state == self.HALF_OPEN and self._probes_in_flight > 0:
+                self._probes_in_flight -= 1
+
+    def _evaluate(self) -> None:
+        if self._state != self.CLOSED or len(self.outcomes) < self.min_calls:
+            return
+        failures = sum(1 for ok, _ in self.outcomes if not ok)
+        if failures / len(self.outcomes) >= self.error_rate_threshold:
+            self._trip()
+            return
+        if self.latency_threshold is not None:
+            latencies = sorted(latency for _, latency in self.outcomes)
+            p95 = latencies[int(0.95 * (len(latencies) - 1))]
+            if p95 > self.latency_threshold:
+                self._trip()
+
+    def _trip(self) -> None:
+        self._state = self.OPEN
+        self._opened_at = self.clock()
+        self._probes_in_flight = 0
+        self.outcomes.clear()
+
+    def snapshot(self) -> dict:
+        state = self.state
+        with self._lock:
+            calls = len(self.outcomes)
+            failures = sum(1 for ok, _ in self.outcomes if not ok)
+        return {
+            "state": state,
+            "window_calls": calls,
+            "window_error_rate": round(failures / calls, 3) if calls else 0.0,
+        }
+
+
+async def hedged_call(
+    fn: Callable[[], Any],
+    hedge_delay: Optional[float],
+    max_attempts: int = 2,
+) -> Tuple[Any, int]:
+    """Run blocking `fn` in the default executor, hedging slow attempts.
+
+    A duplicate attempt is started every `hedge_delay` seconds while no
+    attempt has succeeded, up to `max_attempts`. The first successful result
+    wins and the remaining attempts are abandoned. Returns (result, attempts).
+    """
+    loop = asyncio.get_running_loop()
+    pending = {loop.run_in_executor(None, fn)}
+    attempts = 1
+    last_error: Optional[BaseException] = None
+
+    try:
+        while pending:
+            can_hedge = hedge_delay is not None and attempts < max_attempts
+            done, pending = await asyncio.wait(
+                pending,
+                timeout=hedge_delay if can_hedge else None,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            for future in done:
+                if future.exception() is None:
+                    return future.result(), attempts
+                last_error = future.exception()
+            if (not done or not pending) and attempts < max_attempts:
+                # Hedge timer fired, or every attempt so far failed
+                pending.add(loop.run_in_executor(None, fn))
+                attempts += 1
+    finally:
+        for future in pending:
+            future.cancel()
+
+    assert last_error is not None
+    raise last_error
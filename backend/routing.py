@@ -0,0 +1,200 @@
+"""
+Elysia Concierge - Cost and latency aware backend routing
+Sends FAQ-style requests to cheap backends and the rest to the fastest
+healthy LLM, based on live EWMA latency and error rate per backend
+"""
+
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+
+class BackendError(Exception):
+    """Raised by an LLM adapter that could not produce an answer"""
+
+
+# Backends that answer instantly and never fail
+CHEAP_BACKENDS = ("mock",)
+
+# Request types whose answers are canned procedures rather than reasoning
+SIMPLE_REQUEST_TYPES = {"package_inquiry", "guest_access"}
+
+# Never answered by the cheap backends while an LLM is healthy
+EMERGENCY = "emergency"
+
+# Keywords of short informational questions that the knowledge base answers
+FAQ_KEYWORDS = (
+    "hours",
+    "open",
+    "close",
+    "when",
+    "where",
+    "amenities",
+    "pool",
+    "gym",
+    "fitness",
+    "parking",
+    "hello",
+    "hi",
+)
+FAQ_MAX_WORDS = 12
+
+
+class BackendStats:
+    """Exponentially weighted latency and error rate for one backend"""
+
+    def __init__(self, alpha: float = 0.2):
+        self.alpha = alpha
+        self.latency_ewma: Optional[float] = None
+        self.error_ewma = 0.0
+        self.calls = 0
+        self.last_observed = 0.0
+
+    def observe(self, latency: float, ok: bool, now: float) -> None:
+        if self.latency_ewma is None:
+            self.latency_ewma = latency
+        else:
+            self.latency_ewma += self.alpha * (latency - self.latency_ewma)
+        self.error_ewma += self.alpha * ((0.0 if ok else 1.0) - self.error_ewma)
+        self.calls += 1
+        self.last_observed = now
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "latency_ewma_s": (
+                round(self.latency_ewma, 4) if self.latency_ewma is not None else None
+            ),
+            "error_rate_ewma": round(self.error_ewma, 4),
+            "calls": self.calls,
+        }
+
+
+@dataclass
+class RouteDecision:
+    """Which backend served a request and why"""
+
+    backend: str
+    reason: str
+    complexity: str
+    # An LLM answer was wanted but the fallback gave it (overload, deadline)
+    degraded: bool = False
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class BackendRouter:
+    """Per-request choice between several loaded backends"""
+
+    def __init__(
+        self,
+        backends: Dict[str, Any],
+        latency_slo: float = 8.0,
+        max_error_rate: float = 0.3,
+        probe_interval: float = 30.0,
+        enabled: bool = True,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        # Insertion order is preference order among LLM backends
+        self.backends = backends
+        self.latency_slo = latency_slo
+        self.max_error_rate = max_error_rate
+        self.probe_interval = probe_interval
+        self.enabled = enabled
+        self.clock = clock
+        self.stats: Dict[str, BackendStats] = {
+            name: BackendStats() for name in backends
+        }
+        self._lock = threading.Lock()
+
+    @property
+    def llm_backends(self) -> List[str]:
+        return [name for name in self.backends if name not in CHEAP_BACKENDS]
+
+    def classify(self, request) -> str:
+        """Return "simple" for FAQ-style requests and "complex" otherwise"""
+        if EMERGENCY in (request.request_type.value, request.priority.value):
+            return "complex"
+        if request.request_type.value in SIMPLE_REQUEST_TYPES:
+            return "simple"
+        if request.request_type.value in ("general_inquiry", "community_info"):
+            words = request.message.lower().split()
+            if len(words) <= FAQ_MAX_WORDS and any(
+                word.strip("?!.,") in FAQ_KEYWORDS for word in words
+            ):
+                return "simple"
+        return "complex"
+
+    def choose(self, request, deadline=None) -> RouteDecision:
+        complexity = self.classify(request)
+        llms = self.llm_backends
+
+        if not llms:
+            return RouteDecision("mock", "no LLM backend loaded", complexity)
+        if not self.enabled:
+            return RouteDecision(llms[0], "routing disabled", complexity)
+        if complexity == "simple":
+            return RouteDecision("mock", "FAQ-style request", complexity)
+
+        budget = deadline.remaining() if deadline is not None else None
+        now = self.clock()
+        rejected = []
+        with self._lock:
+            for name in llms:
+                stats = self.stats[name]
+                if stats.latency_ewma is None:
+                    return RouteDecision(name, "no latency data yet", complexity)
+                if now - stats.last_observed >= self.probe_interval:
+                    # Re-measure backends that have been avoided for a while
+                    stats.last_observed = now
+                    return RouteDecision(name, "periodic probe", complexity)
+                if stats.error_ewma > self.max_error_rate:
+                    rejected.append(f"{name} error rate {stats.error_ewma:.2f}")
+                elif stats.latency_ewma > self.latency_slo:
+                    rejected.append(f"{name} latency {stats.latency_ewma:.2f}s > SLO")
+                elif budget is not None and stats.latency_ewma > budget:
+                    rejected.append(f"{name} latency exceeds remaining deadline")
+                else:
+                    return RouteDecision(name, "within latency SLO", complexity)
+
+        return RouteDecision("mock", "; ".join(rejected), complexity)
+
+    def set_primary(self, name: str, backend: Any) -> None:
+        """Make `backend` the preferred LLM, replacing the current one"""
+        with self._lock:
+            if name in CHEAP_BACKENDS:
+                backends = {name: backend}
+            else:
+                llms = self.llm_backends
+                old_primary = llms[0] if llms else None
+                backends = {name: backend}
+                for other, existing in self.backends.items():
+                    if other not in (name, old_primary):
+                        backends[other] = existing
+            # Rebind rather than mutate so concurrent readers see one version
+            self.backends = backends
+            self.stats[name] = BackendStats()
+
+    def replace(self, name: str, backend: Any) -> Optional[Any]:
+        """Swap in `backend` under `name`, keeping its preference position.
+
+        Returns the backend it replaced; requests that already picked the
+        old one finish on it.
+        """
+        with self._lock:
+            old = self.backends.get(name)
+            backends = dict(self.backends)
+            backends[name] = backend
+            self.backends = backends
+            self.stats[name] = BackendStats()
+        return old
+
+    def observe(self, backend: str, latency: float, ok: bool) -> None:
+        with self._lock:
+            stats = self.stats.setdefault(backend, BackendStats())
+            stats.observe(latency, ok, self.clock())
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {name: stats.snapshot() for name, stats in self.stats.items()}
@@ -0,0 +1,353 @@
+"""
+Elysia Concierge - Multi-turn conversation sessions
+Per-resident history with a bounded token window and saved model state
+(llama-cpp KV cache), kept in an LRU under a global memory budget and
+spilled to a private directory, off the event loop, when evicted
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import queue
+import stat
+import struct
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("elysia-sessions")
+
+# Spill file: magic, header length, JSON header, raw backend state bytes
+SPILL_MAGIC = b"ELYSESS1"
+_HEADER_LEN = struct.Struct(">I")
+
+
+def private_dir(path: str) -> str:
+    """Create `path` (0700) or check an existing one belongs to us alone.
+
+    Spill files hold residents' conversations, so a directory another user
+    created or can write to is refused.
+    """
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode):
+        raise PermissionError(f"{path} is not a directory")
+    if info.st_uid != os.getuid():
+        raise PermissionError(f"{path} is owned by uid {info.st_uid}")
+    if info.st_mode & 0o077:
+        # Ours, but readable by others: tighten it
+        os.chmod(path, 0o700)
+    return path
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count when no tokenizer is at hand (~4 chars per token)"""
+    return max(1, len(text) // 4)
+
+
+class ConversationSession:
+    """One resident's conversation: turns plus optional backend state"""
+
+    def __init__(self, resident_id: str):
+        self.resident_id = resident_id
+        self.messages: List[Dict[str, str]] = []
+        self.tokens = 0
+        # Opaque backend state (e.g. llama_cpp.LlamaState) and its size
+        self.state: Any = None
+        self.state_bytes = 0
+        # Which loaded model produced `state`; it is useless to any other
+        self.state_owner: Optional[str] = None
+        self.last_used = time.time()
+
+    @property
+    def nbytes(self) -> int:
+        return self.state_bytes + sum(len(m["content"]) for m in self.messages)
+
+    def add_turn(self, user_message: str, reply: str, tokens: int) -> None:
+        self.messages.append({"role": "user", "content": user_message})
+        self.messages.append({"role": "assistant", "content": reply})
+        self.tokens += tokens
+
+    def trim(self, target_tokens: int, count_tokens: Callable[[str], int]) -> None:
+        """Drop the oldest whole turns until the history fits `target_tokens`"""
+        while self.messages and self.tokens > target_tokens:
+            for message in self.messages[:2]:
+                self.tokens -= count_tokens(message["content"])
+            del self.messages[:2]
+        self.tokens = max(0, self.tokens)
+
+
+class SessionStore:
+    """LRU of conversation sessions under a global memory budget.
+
+    Evicted sessions are written by a background thread; `load` restores
+    one in an executor. Only messages and raw state bytes reach the disk:
+    backend state is spilled through `dump_state`/`load_state` when given,
+    and dropped (rebuilt from history on the next turn) otherwise.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 256 * 1024 * 1024,
+        spill_dir: Optional[str] = None,
+        ttl: float = 1800.0,
+        max_tokens: int = 1024,
+        count_tokens: Callable[[str], int] = estimate_tokens,
+        dump_state: Optional[Callable[[Any], bytes]] = None,
+        load_state: Optional[Callable[[bytes], Any]] = None,
+    ):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir or os.path.join(
+            tempfile.gettempdir(), f"elysia-sessions-{os.getuid()}"
+        )
+        self.ttl = ttl
+        self.max_tokens = max_tokens
+        self.count_tokens = count_tokens
+        self.dump_state = dump_state
+        self.load_state = load_state
+        self._sessions: "OrderedDict[str, ConversationSession]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.RLock()
+        # Evicted sessions waiting for the writer; still served from memory
+        self._spilling: Dict[str, ConversationSession] = {}
+        self._writes: "queue.Queue[Tuple[str, ConversationSession]]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._spill_ok: Optional[bool] = None
+        self.spills = 0
+        self.restores = 0
+        self.spill_errors = 0
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    @property
+    def memory_bytes(self) -> int:
+        return self._bytes
+
+    def _spill_path(self, resident_id: str) -> str:
+        digest = hashlib.sha1(resident_id.encode()).hexdigest()
+        return os.path.join(self.spill_dir, f"{digest}.session")
+
+    async def load(self, resident_id: str) -> ConversationSession:
+        """`get` for the event loop: a spilled session is read in an executor"""
+        with self._lock:
+            cached = resident_id in self._sessions or resident_id in self._spilling
+        if cached:
+            return self.get(resident_id)
+        loop = asyncio.get_running_loop()
+        restored = await loop.run_in_executor(None, self._restore, resident_id)
+        return self._get(resident_id, lambda: restored)
+
+    def get(self, resident_id: str) -> ConversationSession:
+        """Return the resident's live session, restoring it from disk if spilled
+        (reads the disk: async code should `await load(...)` instead)"""
+        return self._get(resident_id, lambda: self._restore(resident_id))
+
+    def _get(
+        self,
+        resident_id: str,
+        restore: Callable[[], Optional[ConversationSession]],
+    ) -> ConversationSession:
+        with self._lock:
+            session = self._sessions.get(resident_id)
+            if session is None:
+                session = self._spilling.pop(resident_id, None)
+                if session is None:
+                    session = restore()
+                    if session is not None:
+                        self.restores += 1
+                session = session or ConversationSession(resident_id)
+                self._sessions[resident_id] = session
+                self._bytes += session.nbytes
+            elif time.time() - session.last_used > self.ttl:
+                # Stale conversation: start over
+                self._bytes -= session.nbytes
+                session = ConversationSession(resident_id)
+                self._sessions[resident_id] = session
+            self._sessions.move_to_end(resident_id)
+            session.last_used = time.time()
+            self._enforce_budget(keep=resident_id)
+            return session
+
+    def record_turn(self, session: ConversationSession, message: str, reply: str):
+        """Append a user/assistant turn, keeping history within `max_tokens`"""
+        with self._lock:
+            before = session.nbytes
+            tokens = self.count_tokens(message) + self.count_tokens(reply)
+            session.add_turn(message, reply, tokens)
+            if session.tokens > self.max_tokens:
+                # Shrink to half the window rather than sliding turn by turn,
+                # so the history prefix (and its cached KV state) stays
+                # stable for the next several turns
+                session.trim(self.max_tokens // 2, self.count_tokens)
+            self._resize(session, before)
+
+    def save_state(
+        self,
+        session: ConversationSession,
+        state: Any,
+        nbytes: int,
+        owner: Optional[str] = None,
+    ):
+        """Attach backend state (e.g. KV cache) to the session"""
+        with self._lock:
+            before = session.nbytes
+            session.state = state
+            session.state_bytes = nbytes
+            session.state_owner = owner
+            self._resize(session, before)
+
+    def _resize(self, session: ConversationSession, before: int) -> None:
+        if self._sessions.get(session.resident_id) is session:
+            self._bytes += session.nbytes - before
+            self._enforce_budget(keep=session.resident_id)
+
+    def _enforce_budget(self, keep: str) -> None:
+        while self._bytes > self.max_bytes and len(self._sessions) > 1:
+            resident_id, session = next(iter(self._sessions.items()))
+            if resident_id == keep:
+                self._sessions.move_to_end(resident_id)
+                continue
+            self._evict(resident_id, session)
+
+    def _evict(self, resident_id: str, session: ConversationSession) -> None:
+        del self._sessions[resident_id]
+        self._bytes -= session.nbytes
+        if time.time() - session.last_used > self.ttl or not self._can_spill():
+            return
+        self._spilling[resident_id] = session
+        self._writes.put((resident_id, session))
+        if self._writer is None:
+            self._writer = threading.Thread(
+                target=self._write_loop, name="elysia-session-spill", daemon=True
+            )
+            self._writer.start()
+
+    def _can_spill(self) -> bool:
+        if self._spill_ok is None:
+            try:
+                private_dir(self.spill_dir)
+                self._spill_ok = True
+            except OSError as e:
+                logger.warning(f"Session spilling disabled: {e}")
+                self._spill_ok = False
+        return self._spill_ok
+
+    def _write_loop(self) -> None:
+        while True:
+            resident_id, session = self._writes.get()
+            try:
+                with self._lock:
+                    # Taken back into memory before we got to it
+                    pending = self._spilling.get(resident_id) is session
+                if pending:
+                    self._write(resident_id, session)
+                    with self._lock:
+                        if self._spilling.get(resident_id) is session:
+                            del self._spilling[resident_id]
+                            self.spills += 1
+                        else:
+                            # Taken back while it was being written
+                            self._discard(resident_id)
+            except Exception as e:
+                self.spill_errors += 1
+                logger.warning(f"Session spill failed: {e}")
+                with self._lock:
+                    if self._spilling.get(resident_id) is session:
+                        del self._spilling[resident_id]
+            finally:
+                self._writes.task_done()
+
+    def flush(self) -> None:
+        """Wait for queued spills to reach the disk"""
+        self._writes.join()
+
+    def _write(self, resident_id: str, session: ConversationSession) -> None:
+        state = b""
+        if session.state is not None and self.dump_state is not None:
+            try:
+                state = self.dump_state(session.state)
+            except Exception as e:
+                # Keep the conversation; the KV cache is rebuilt from it
+                logger.warning(f"Spilling session without its state: {e}")
+        header = json.dumps(
+            {
+                "resident_id": resident_id,
+                "messages": session.messages,
+                "tokens": session.tokens,
+                "last_used": session.last_used,
+                "state_owner": session.state_owner if state else None,
+                "state_bytes": session.state_bytes if state else 0,
+            }
+        ).encode()
+        path = self._spill_path(resident_id)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(SPILL_MAGIC + _HEADER_LEN.pack(len(header)) + header + state)
+        os.replace(tmp_path, path)
+
+    def _restore(self, resident_id: str) -> Optional[ConversationSession]:
+        if not self._can_spill():
+            return None
+        path = self._spill_path(resident_id)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        self._discard(resident_id)
+        try:
+            return self._decode(resident_id, data)
+        except (ValueError, KeyError, TypeError, struct.error) as e:
+            logger.warning(f"Discarding unreadable session file {path}: {e}")
+            return None
+
+    def _discard(self, resident_id: str) -> None:
+        try:
+            os.remove(self._spill_path(resident_id))
+        except OSError:
+            pass
+
+    def _decode(self, resident_id: str, data: bytes) -> Optional[ConversationSession]:
+        if not data.startswith(SPILL_MAGIC):
+            raise ValueError("not a session file")
+        start = len(SPILL_MAGIC) + _HEADER_LEN.size
+        (length,) = _HEADER_LEN.unpack_from(data, len(SPILL_MAGIC))
+        header = json.loads(data[start : start + length])
+        if header["resident_id"] != resident_id:
+            raise ValueError("session belongs to another resident")
+        if time.time() - float(header["last_used"]) > self.ttl:
+            return None
+        session = ConversationSession(resident_id)
+        session.messages = [
+            {"role": str(m["role"]), "content": str(m["content"])}
+            for m in header["messages"]
+        ]
+        session.tokens = int(header["tokens"])
+        session.last_used = float(header["last_used"])
+        state = data[start + length :]
+        if state and self.load_state is not None:
+            try:
+                session.state = self.load_state(state)
+                session.state_bytes = int(header["state_bytes"])
+                session.state_owner = header["state_owner"]
+            except Exception as e:
+                # Still a usable conversation; the KV cache is rebuilt
+                logger.warning(f"Dropping unreadable session state: {e}")
+        return session
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "sessions": len(self._sessions),
+            "memory_bytes": self._bytes,
+            "budget_bytes": self.max_bytes,
+            "spills": self.spills,
+            "spilling": len(self._spilling),
+            "spill_errors": self.spill_errors,
+            "restores": self.restores,
+        }
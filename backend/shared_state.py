@@ -0,0 +1,584 @@
+"""
+Elysia Concierge - Shared state tier
+Optional Redis backend for the request store, response cache and rate-limit
+buckets, so workers and hosts see the same state; each worker keeps a small
+near-cache in front of it, and "memory://" selects an in-process stand-in
+"""
+
+import asyncio
+import functools
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import redis
+
+    REDIS_ERRORS: Tuple[type, ...] = (redis.RedisError, OSError)
+except ImportError:
+    redis = None
+    REDIS_ERRORS = (OSError,)
+
+logger = logging.getLogger("elysia-shared-state")
+
+_MISS = object()
+
+
+class NearCache:
+    """Small per-worker LRU with a TTL, in front of shared state"""
+
+    def __init__(self, max_entries: int = 4096, ttl: float = 5.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Any:
+        """The cached value, or _MISS"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self.misses += 1
+                return _MISS
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self._data), "hits": self.hits, "misses": self.misses}
+
+
+class MemoryRedis:
+    """In-process stand-in for the subset of redis-py used here.
+
+    Lua scripts can't run without a Redis server, so scripts are mapped to
+    Python equivalents registered in `python_scripts`.
+    """
+
+    python_scripts: Dict[str, Callable[["MemoryRedis", List[str], List[Any]], Any]] = {}
+
+    def __init__(self):
+        self._data: Dict[str, Any] = {}
+        self._expires: Dict[str, float] = {}
+        self._lock = threading.RLock()
+
+    def _live(self, name: str) -> bool:
+        expires = self._expires.get(name)
+        if expires is not None and expires <= time.time():
+            self._data.pop(name, None)
+            self._expires.pop(name, None)
+        return name in self._data
+
+    def get(self, name: str) -> Optional[bytes]:
+        with self._lock:
+            return self._data[name] if self._live(name) else None
+
+    def mget(self, names: Iterable[str]) -> List[Optional[bytes]]:
+        with self._lock:
+            return [self.get(name) for name in names]
+
+    def set(self, name: str, value: Any, ex: Optional[float] = None) -> bool:
+        with self._lock:
+            self._data[name] = value.encode() if isinstance(value, str) else value
+            self._expires.pop(name, None)
+            if ex is not None:
+                self.expire(name, ex)
+            return True
+
+    def incr(self, name: str, amount: int = 1) -> int:
+        with self._lock:
+            value = int(self.get(name) or 0) + amount
+            self._data[name] = str(value).encode()
+            return value
+
+    def expire(self, name: str, seconds: float) -> bool:
+        with self._lock:
+            if not self._live(name):
+                return False
+            self._expires[name] = time.time() + seconds
+            return True
+
+    def hmget(self, name: str, keys: Iterable[str]) -> List[Optional[bytes]]:
+        with self._lock:
+            mapping = self._data.get(name, {}) if self._live(name) else {}
+            return [mapping.get(key) for key in keys]
+
+    def hset(self, name: str, mapping: Dict[str, Any]) -> int:
+        with self._lock:
+            if not self._live(name):
+                self._data[name] = {}
+            self._data[name].update({k: str(v).encode() for k, v in mapping.items()})
+            return len(mapping)
+
+    def delete(self, *names: str) -> int:
+        with self._lock:
+            removed = sum(1 for name in names if self._live(name))
+            for name in names:
+                self._data.pop(name, None)
+                self._expires.pop(name, None)
+            return removed
+
+    def pipeline(self, transaction: bool = True) -> "_MemoryPipeline":
+        return _MemoryPipeline(self)
+
+    def register_script(self, script: str) -> Callable[..., Any]:
+        implementation = self.python_scripts[script]
+
+        def run(keys: List[str] = (), args: List[Any] = ()) -> Any:
+            with self._lock:
+                return implementation(self, list(keys), list(args))
+
+        return run
+
+    def ping(self) -> bool:
+        return True
+
+
+class _MemoryPipeline:
+    """Buffers commands and runs them in one step, like a redis-py pipeline"""
+
+    def __init__(self, client: MemoryRedis):
+        self._client = client
+        self._commands: List[Tuple[str, tuple, dict]] = []
+
+    def __getattr__(self, command: str) -> Callable[..., "_MemoryPipeline"]:
+        def queue(*args, **kwargs):
+            self._commands.append((command, args, kwargs))
+            return self
+
+        return queue
+
+    def execute(self) -> List[Any]:
+        with self._client._lock:
+            results = [
+                getattr(self._client, command)(*args, **kwargs)
+                for command, args, kwargs in self._commands
+            ]
+        self._commands = []
+        return results
+
+
+# Threads that run blocking Redis calls for async callers; one per pooled
+# connection, so a burst queues here instead of overflowing the pool
+_offload_threads = 20
+_offload_executor: Optional[ThreadPoolExecutor] = None
+_offload_pid = 0
+
+
+async def offload(client, fn: Callable[..., Any], *args: Any) -> Any:
+    """Run `fn(*args)`, a call on `client`, without blocking the event loop.
+
+    redis-py is synchronous, so every round trip (up to the socket timeout
+    while Redis is down) would stall all requests on the worker; the call
+    runs on a thread instead. Without a client, or with the in-process
+    stand-in, `fn` is called directly.
+    """
+    global _offload_executor, _offload_pid
+    if client is None or isinstance(client, MemoryRedis):
+        return fn(*args)
+    # Threads don't survive fork: each pre-forked worker starts its own
+    if _offload_executor is None or _offload_pid != os.getpid():
+        _offload_executor = ThreadPoolExecutor(
+            _offload_threads, thread_name_prefix="elysia-redis"
+        )
+        _offload_pid = os.getpid()
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_offload_executor, functools.partial(fn, *args))
+
+
+def connect(url: str, max_connections: int = 20, timeout: float = 0.5):
+    """Redis client over a bounded connection pool ("memory://" = stand-in)"""
+    global _offload_threads
+    if url.startswith("memory://"):
+        return MemoryRedis()
+    if redis is None:
+        raise RuntimeError("Shared state needs the redis package (pip install redis)")
+    _offload_threads = max_connections
+    # redis-py pools reset themselves in forked workers (pid check)
+    pool = redis.ConnectionPool.from_url(
+        url,
+        max_connections=max_connections,
+        socket_timeout=timeout,
+        socket_connect_timeout=timeout,
+        health_check_interval=30,
+    )
+    return redis.Redis(connection_pool=pool)
+
+
+class LocalRequestStore(dict):
+    """In-process request store (the default): a dict with a per-day sequence"""
+
+    # Each worker counts from 1 again (and after every restart)
+    unique_ids = False
+
+    def __init__(self):
+        super().__init__()
+        self._sequences: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def next_sequence(self, day: str) -> Optional[int]:
+        with self._lock:
+            self._sequences[day] = self._sequences.get(day, 0) + 1
+            return self._sequences[day]
+
+    # Same interface as SharedRequestStore; nothing here blocks
+    async def next_sequence_async(self, day: str) -> Optional[int]:
+        return self.next_sequence(day)
+
+    async def get_async(self, request_id: str, default: Any = None) -> Any:
+        return self.get(request_id, default)
+
+    async def set_async(self, request_id: str, record: Any) -> None:
+        self[request_id] = record
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "local", "requests": len(self)}
+
+    async def stats_async(self) -> Dict[str, Any]:
+        return self.stats()
+
+
+class SharedRequestStore:
+    """Request records in Redis, read through a per-worker near-cache.
+
+    Behaves like the `active_requests` dict. Records are serialized with
+    `encode`/`decode`; request IDs come from a shared per-day counter so
+    workers never hand out the same one. Async handlers use the `*_async`
+    methods, which keep Redis round trips off the event loop.
+    """
+
+    unique_ids = True
+
+    def __init__(
+        self,
+        client,
+        encode: Callable[[Any], Dict[str, Any]],
+        decode: Callable[[Dict[str, Any]], Any],
+        ttl: float = 7 * 24 * 3600,
+        near_cache: Optional[NearCache] = None,
+        prefix: str = "elysia:",
+    ):
+        self.client = client
+        self.encode = encode
+        self.decode = decode
+        self.ttl = int(ttl)
+        self.near = near_cache or NearCache()
+        self.prefix = prefix
+        self.errors = 0
+
+    def _key(self, request_id: str) -> str:
+        return f"{self.prefix}request:{request_id}"
+
+    def next_sequence(self, day: str) -> Optional[int]:
+        """The next shared sequence number, or None while Redis is unreachable"""
+        key = f"{self.prefix}seq:{day}"
+        try:
+            pipe = self.client.pipeline()
+            pipe.incr(key)
+            pipe.expire(key, 2 * 24 * 3600)
+            return int(pipe.execute()[0])
+        except REDIS_ERRORS as e:
+            # The caller falls back to an ID that needs no coordination
+            self.errors += 1
+            logger.warning(f"Shared request sequence unavailable: {e}")
+            return None
+
+    async def next_sequence_async(self, day: str) -> Optional[int]:
+        return await offload(self.client, self.next_sequence, day)
+
+    def __setitem__(self, request_id: str, record: Any) -> None:
+        self.near.put(request_id, record)
+        self._write(request_id, record)
+
+    async def set_async(self, request_id: str, record: Any) -> None:
+        self.near.put(request_id, record)
+        await offload(self.client, self._write, request_id, record)
+
+    def _write(self, request_id: str, record: Any) -> None:
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            pipe.set(
+                self._key(request_id), json.dumps(self.encode(record)), ex=self.ttl
+            )
+            pipe.incr(f"{self.prefix}requests")
+            pipe.execute()
+        except REDIS_ERRORS as e:
+            # This worker still serves it from the near-cache
+            self.errors += 1
+            logger.warning(f"Shared request store write failed: {e}")
+
+    def get(self, request_id: str, default: Any = None) -> Any:
+        return self.get_many([request_id]).get(request_id, default)
+
+    async def get_async(self, request_id: str, default: Any = None) -> Any:
+        record = self.near.get(request_id)
+        if record is _MISS:
+            found = await offload(self.client, self._fetch, [request_id])
+            record = found.get(request_id, default)
+        return record
+
+    def get_many(self, request_ids: List[str]) -> Dict[str, Any]:
+        """Look up several records with one MGET for the near-cache misses"""
+        found, missing = {}, []
+        for request_id in request_ids:
+            record = self.near.get(request_id)
+            if record is _MISS:
+                missing.append(request_id)
+            else:
+                found[request_id] = record
+        if missing:
+            found.update(self._fetch(missing))
+        return found
+
+    def _fetch(self, request_ids: List[str]) -> Dict[str, Any]:
+        try:
+            raw = self.client.mget([self._key(rid) for rid in request_ids])
+        except REDIS_ERRORS as e:
+            self.errors += 1
+            logger.warning(f"Shared request store read failed: {e}")
+            return {}
+        found = {}
+        for request_id, data in zip(request_ids, raw):
+            if data is not None:
+                record = self.decode(json.loads(data))
+                self.near.put(request_id, record)
+                found[request_id] = record
+        return found
+
+    def __getitem__(self, request_id: str) -> Any:
+        record = self.get(request_id, _MISS)
+        if record is _MISS:
+            raise KeyError(request_id)
+        return record
+
+    def __contains__(self, request_id: object) -> bool:
+        return isinstance(request_id, str) and self.get(request_id, _MISS) is not _MISS
+
+    def __len__(self) -> int:
+        try:
+            return int(self.client.get(f"{self.prefix}requests") or 0)
+        except REDIS_ERRORS:
+            return 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "redis",
+            "requests": len(self),
+            "errors": self.errors,
+            "near_cache": self.near.stats(),
+        }
+
+    async def stats_async(self) -> Dict[str, Any]:
+        return await offload(self.client, self.stats)
+
+
+def _normalize(message: str) -> str:
+    return " ".join(re.findall(r"[a-z0-9']+", message.lower()))
+
+
+class ResponseCache:
+    """Answers to repeated questions, shared through Redis when configured.
+
+    Without a client the near-cache alone serves as a per-worker cache.
+    """
+
+    def __init__(
+        self,
+        client=None,
+        ttl: float = 3600,
+        near_cache: Optional[NearCache] = None,
+        prefix: str = "elysia:",
+    ):
+        self.client = client
+        self.ttl = int(ttl)
+        self.near = near_cache or NearCache(ttl=ttl if client is None else 60)
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, request_type: str, message: str) -> str:
+        digest = hashlib.sha1(
+            f"{request_type}\0{_normalize(message)}".encode()
+        ).hexdigest()
+        return f"{self.prefix}response:{digest}"
+
+    def get(self, request_type: str, message: str) -> Optional[str]:
+        key = self._key(request_type, message)
+        text = self.near.get(key)
+        if text is _MISS:
+            text = self._fetch(key)
+        return self._count(text)
+
+    async def get_async(self, request_type: str, message: str) -> Optional[str]:
+        """Like `get`, with near-cache misses read off the event loop"""
+        key = self._key(request_type, message)
+        text = self.near.get(key)
+        if text is _MISS:
+            text = await offload(self.client, self._fetch, key)
+        return self._count(text)
+
+    def _fetch(self, key: str) -> Optional[str]:
+        if self.client is None:
+            return None
+        try:
+            raw = self.client.get(key)
+        except REDIS_ERRORS as e:
+            logger.warning(f"Response cache read failed: {e}")
+            return None
+        if raw is None:
+            return None
+        text = raw.decode() if isinstance(raw, bytes) else raw
+        self.near.put(key, text)
+        return text
+
+    def _count(self, text: Optional[str]) -> Optional[str]:
+        if text is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return text
+
+    def put(self, request_type: str, message: str, text: str) -> None:
+        key = self._key(request_type, message)
+        self.near.put(key, text)
+        self._store(key, text)
+
+    async def put_async(self, request_type: str, message: str, text: str) -> None:
+        key = self._key(request_type, message)
+        self.near.put(key, text)
+        await offload(self.client, self._store, key, text)
+
+    def _store(self, key: str, text: str) -> None:
+        if self.client is not None:
+            try:
+                self.client.set(key, text, ex=self.ttl)
+            except REDIS_ERRORS as e:
+                logger.warning(f"Response cache write failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "local" if self.client is None else "redis",
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+# Debit every bucket or none, in one round trip.
+# KEYS: bucket keys; ARGV: now, cost, ttl, then rate and burst per key
+TOKEN_BUCKET_LUA = """
+local now = tonumber(ARGV[1])
+local cost = tonumber(ARGV[2])
+local ttl = tonumber(ARGV[3])
+local wait = 0
+local levels = {}
+for i, key in ipairs(KEYS) do
+  local rate = tonumber(ARGV[2 + i * 2])
+  local burst = tonumber(ARGV[3 + i * 2])
+  if not (rate > 0) then
+    return redis.error_reply('rate must be positive for ' .. key)
+  end
+  local state = redis.call('HMGET', key, 't', 'u')
+  local tokens = tonumber(state[1])
+  if tokens == nil then
+    tokens = burst
+  else
+    tokens = math.min(burst, tokens + (now - tonumber(state[2])) * rate)
+  end
+  if tokens < cost then
+    wait = math.max(wait, (cost - tokens) / rate)
+  end
+  levels[i] = tokens - cost
+end
+if wait > 0 then
+  return tostring(wait)
+end
+for i, key in ipairs(KEYS) do
+  redis.call('HSET', key, 't', levels[i], 'u', now)
+  redis.call('EXPIRE', key, ttl)
+end
+return '0'
+"""
+
+
+def _token_bucket(client: MemoryRedis, keys: List[str], args: List[Any]) -> str:
+    now, cost, ttl = float(args[0]), float(args[1]), float(args[2])
+    wait, levels = 0.0, []
+    for i, key in enumerate(keys):
+        rate, burst = float(args[3 + i * 2]), float(args[4 + i * 2])
+        if not rate > 0:
+            raise ValueError(f"rate must be positive for {key}")
+        tokens, updated = client.hmget(key, ["t", "u"])
+        if tokens is None:
+            level = burst
+        else:
+            level = min(burst, float(tokens) + (now - float(updated)) * rate)
+        if level < cost:
+            wait = max(wait, (cost - level) / rate)
+        levels.append(level - cost)
+    if wait > 0:
+        return str(wait)
+    for key, level in zip(keys, levels):
+        client.hset(key, {"t": level, "u": now})
+        client.expire(key, ttl)
+    return "0"
+
+
+MemoryRedis.python_scripts[TOKEN_BUCKET_LUA] = _token_bucket
+
+
+class RedisBucketTable:
+    """Token buckets in Redis, shared by every worker and host.
+
+    Same interface as admission.BucketTable. Uses the caller's wall clock,
+    so hosts are expected to be NTP-synced. Fails open if Redis is down.
+    """
+
+    shared = True
+
+    def __init__(self, client, prefix: str = "elysia:"):
+        self.client = client
+        self.prefix = prefix
+        self._script = client.register_script(TOKEN_BUCKET_LUA)
+        self.errors = 0
+
+    def take(
+        self, buckets: Iterable[Tuple[int, float, float]], now: float, cost: float = 1.0
+    ) -> float:
+        keys, args = [], [now, cost, 0]
+        ttl = 1
+        for tag, rate, burst in buckets:
+            if not rate > 0:
+                raise ValueError(f"Token bucket rate must be positive, got {rate:g}")
+            keys.append(f"{self.prefix}bucket:{tag:x}")
+            args += [rate, burst]
+            # Idle longer than a full refill: the key can go
+            ttl = max(ttl, math.ceil(burst / rate) + 1)
+        args[2] = ttl
+        try:
+            return float(self._script(keys=keys, args=args))
+        except REDIS_ERRORS as e:
+            self.errors += 1
+            logger.warning(f"Shared rate limit check failed, admitting: {e}")
+            return 0.0
+
+    async def take_async(
+        self, buckets: Iterable[Tuple[int, float, float]], now: float, cost: float = 1.0
+    ) -> float:
+        return await offload(self.client, self.take, list(buckets), now, cost)
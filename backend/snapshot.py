@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Elysia Concierge - Build-time snapshot of precomputed artifacts
+Retrieval index and pre-encoded static payloads are serialized once, at build
+time, into a versioned file that cold starts memory-map instead of rebuilding
+
+Usage: python snapshot.py [path]   (writes the elysia_lite snapshot; the
+app only reads it, and rebuilds stale ones into a private cache directory)
+"""
+
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from typing import Any, Callable, Dict, Optional
+
+try:
+    from .sessions import private_dir
+except ImportError:
+    from sessions import private_dir
+
+logger = logging.getLogger("elysia-snapshot")
+
+MAGIC = b"ELYSNAP\0"
+# Bump when the layout or the meaning of any section changes
+FORMAT_VERSION = 1
+
+# magic, format version, table-of-contents length, source checksum
+_HEADER = struct.Struct("<8sII32s")
+
+
+class SnapshotError(Exception):
+    """Snapshot missing a section, corrupt, or built from other sources"""
+
+
+def source_checksum(*inputs: Any) -> bytes:
+    """Digest of everything the artifacts are derived from"""
+    canonical = json.dumps(
+        [FORMAT_VERSION, *inputs], sort_keys=True, default=repr, separators=(",", ":")
+    )
+    return hashlib.sha256(canonical.encode()).digest()
+
+
+def file_digest(path: str) -> str:
+    """Hex digest of a source file, so code changes invalidate the snapshot"""
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def encode_snapshot(sections: Dict[str, bytes], checksum: bytes) -> bytes:
+    """Header, JSON table of contents, then the sections back to back"""
+    toc, offset = {}, 0
+    for name, data in sections.items():
+        toc[name] = [offset, len(data), zlib.crc32(data)]
+        offset += len(data)
+    toc_bytes = json.dumps(toc).encode()
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, len(toc_bytes), checksum)
+    return b"".join([header, toc_bytes, *sections.values()])
+
+
+def write_snapshot(path: str, data: bytes) -> None:
+    """Atomic replace, so a concurrent cold start never maps a partial file"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".snapshot-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+class Snapshot:
+    """Read-only view of a snapshot file or buffer; sections are checked
+    (CRC32) the first time they are read, not at open."""
+
+    def __init__(self, buffer, checksum: Optional[bytes] = None, source: str = ""):
+        self.source = source
+        self._buffer = buffer
+        view = memoryview(buffer)
+        if len(view) < _HEADER.size:
+            raise SnapshotError("truncated header")
+        magic, version, toc_length, stored = _HEADER.unpack_from(view)
+        if magic != MAGIC:
+            raise SnapshotError("not a snapshot file")
+        if version != FORMAT_VERSION:
+            raise SnapshotError(f"format version {version}, expected {FORMAT_VERSION}")
+        if checksum is not None and stored != checksum:
+            raise SnapshotError("stale: built from different sources")
+        toc_end = _HEADER.size + toc_length
+        try:
+            self.toc = json.loads(bytes(view[_HEADER.size : toc_end]))
+        except ValueError as e:
+            raise SnapshotError(f"corrupt table of contents: {e}") from None
+        self.checksum = stored
+        self._data = view[toc_end:]
+        self._verified = set()
+
+    @classmethod
+    def open(cls, path: str, checksum: Optional[bytes] = None) -> "Snapshot":
+        with open(path, "rb") as f:
+            try:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # empty file
+                raise SnapshotError("empty file") from None
+        return cls(buffer, checksum, source=path)
+
+    @property
+    def size(self) -> int:
+        return len(self._buffer)
+
+    def section(self, name: str) -> memoryview:
+        """Zero-copy view of one section"""
+        try:
+            offset, length, crc = self.toc[name]
+        except KeyError:
+            raise SnapshotError(f"no section {name!r}") from None
+        data = self._data[offset : offset + length]
+        if name not in self._verified:
+            if len(data) != length or zlib.crc32(data) != crc:
+                raise SnapshotError(f"section {name!r} is corrupt")
+            self._verified.add(name)
+        return data
+
+    def json(self, name: str) -> Any:
+        return json.loads(bytes(self.section(name)))
+
+
+class SnapshotLoader:
+    """Loads the snapshot on first use, rebuilding it when missing or stale.
+
+    `path` is the build-time snapshot and is only written by `rebuild()`,
+    the build step. Snapshots rebuilt while serving go to `cache_path` when
+    one is given (a private directory), so the app never writes into its
+    source tree; on a read-only filesystem a rebuilt snapshot is kept in
+    memory for this process only.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        checksum: bytes,
+        build: Callable[[], Dict[str, bytes]],
+        cache_path: Optional[str] = None,
+    ):
+        self.path = path
+        self.cache_path = cache_path
+        self.checksum = checksum
+        self.build = build
+        self._snapshot: Optional[Snapshot] = None
+        # Section bytes, copied out of the mapping once they passed the CRC
+        self._sections: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+        self.origin = "unloaded"
+        self.load_ms: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    def snapshot(self) -> Snapshot:
+        if self._snapshot is None:
+            with self._lock:
+                if self._snapshot is None:
+                    self._load()
+        return self._snapshot
+
+    def _load(self) -> None:
+        started = time.perf_counter()
+        for path in (self.path, self.cache_path):
+            if path is None:
+                continue
+            try:
+                if path == self.cache_path:
+                    # Refuse a cache another user could have planted
+                    private_dir(os.path.dirname(os.path.abspath(path)))
+                self._snapshot = Snapshot.open(path, self.checksum)
+                self.origin = "file"
+                break
+            except (OSError, SnapshotError) as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+        else:
+            logger.info(f"Rebuilding snapshot ({self.last_error})")
+            self._snapshot = self._rebuild(self.cache_path or self.path)
+        self.load_ms = round((time.perf_counter() - started) * 1000, 3)
+
+    def _rebuild(self, path: str) -> Snapshot:
+        data = encode_snapshot(self.build(), self.checksum)
+        self._sections = {}
+        try:
+            if path == self.cache_path:
+                private_dir(os.path.dirname(os.path.abspath(path)))
+            write_snapshot(path, data)
+            snapshot = Snapshot.open(path, self.checksum)
+            self.origin = "rebuilt"
+            return snapshot
+        except OSError as e:
+            logger.warning(f"Snapshot kept in memory, could not write it: {e}")
+            self.origin = "memory"
+            return Snapshot(data, self.checksum, source="memory")
+
+    def rebuild(self) -> Snapshot:
+        """Build and write the snapshot to `path` now (the build step)"""
+        with self._lock:
+            self._snapshot = self._rebuild(self.path)
+        return self._snapshot
+
+    def section(self, name: str) -> bytes:
+        data = self._sections.get(name)
+        if data is not None:
+            return data
+        try:
+            data = bytes(self.snapshot().section(name))
+        except SnapshotError as e:
+            # Corrupt on disk despite a valid header: rebuild once
+            self.last_error = f"SnapshotError: {e}"
+            with self._lock:
+                self._snapshot = self._rebuild(self.cache_path or self.path)
+            data = bytes(self._snapshot.section(name))
+        self._sections[name] = data
+        return data
+
+    def json(self, name: str) -> Any:
+        return json.loads(self.section(name))
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        return {
+            "path": self.path,
+            "cache_path": self.cache_path,
+            "origin": self.origin,
+            "format_version": FORMAT_VERSION,
+            "load_ms": self.load_ms,
+            "bytes": snapshot.size if snapshot is not None else 0,
+            "sections": sorted(snapshot.toc) if snapshot is not None else [],
+            "last_error": self.last_error,
+        }
+
+
+def main(argv=None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv:
+        os.environ["ELYSIA_SNAPSHOT_PATH"] = argv[0]
+    from elysia_lite import snapshot_loader
+
+    snapshot = snapshot_loader.rebuild()
+    print(
+        f"Wrote {snapshot_loader.path} ({snapshot.size} bytes, "
+        f"sections: {', '.join(sorted(snapshot.toc))})"
+    )
+
+
+if __name__ == "__main__":
+    main()
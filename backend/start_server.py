@@ -1,23 +1,132 @@
 #!/usr/bin/env python3
 """
-Elysia Concierge Lite - Startup Script
-Simple startup without uvicorn complications
+Elysia Concierge Lite - Production Launcher
+Pre-fork server: the app and model load once, then workers are forked
+
+Usage: python start_server.py [--workers N] [--port 8000] [--max-requests 1000]
 """
 
+import argparse
+import os
+import sys
+
 import uvicorn
 
-from elysia_lite import app
 
-if __name__ == "__main__":
-    print("🏢 Elysia Concierge Lite for The Avant")
-    print("✨ Starting lightweight server...")
-    print("🚀 Server will run on http://localhost:8000")
-    print("📱 Mobile/Vercel optimized")
+def _has_module(name: str) -> bool:
+    try:
+        __import__(name)
+        return True
+    except ImportError:
+        return False
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Elysia Concierge Lite server")
+    parser.add_argument("--host", default=os.environ.get("API_HOST", "0.0.0.0"))
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=int(os.environ.get("PORT", os.environ.get("API_PORT", "8000"))),
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.environ.get("ELYSIA_WORKERS", os.cpu_count() or 1)),
+        help="worker processes (default: CPU count)",
+    )
+    parser.add_argument(
+        "--max-requests",
+        type=int,
+        default=int(os.environ.get("MAX_REQUESTS", "0")),
+        help="recycle a worker after this many requests (0 = never)",
+    )
+    parser.add_argument(
+        "--max-requests-jitter",
+        type=int,
+        default=int(os.environ.get("MAX_REQUESTS_JITTER", "0")),
+    )
+    parser.add_argument(
+        "--graceful-timeout",
+        type=float,
+        default=float(os.environ.get("WORKER_TIMEOUT", "30")),
+        help="seconds to drain in-flight requests on SIGTERM",
+    )
+    parser.add_argument(
+        "--max-crashes",
+        type=int,
+        default=int(os.environ.get("ELYSIA_MAX_WORKER_CRASHES", "5")),
+        help="give up when workers crash this often within a minute",
+    )
+    parser.add_argument(
+        "--log-level", default=os.environ.get("LOG_LEVEL", "info").lower()
+    )
+    return parser
+
+
+def served_properties(properties) -> str:
+    """ "The Avant", or "3 properties (The Avant, ...)" for the banner"""
+    names = [prop.name for prop in properties]
+    if len(names) == 1:
+        return names[0]
+    return f"{len(names)} properties ({', '.join(names)})"
+
+
+def main(argv=None) -> None:
+    args = build_parser().parse_args(argv)
+
+    # Preload: importing the app loads the configured model in this process
+    try:
+        from .elysia_lite import app, properties
+        from .prefork import CrashLoop, serve_prefork
+    except ImportError:
+        from prefork import CrashLoop, serve_prefork
+
+        from elysia_lite import app, properties
+
+    # Fastest available event loop and HTTP parser
+    loop = "uvloop" if _has_module("uvloop") else "asyncio"
+    http = "httptools" if _has_module("httptools") else "h11"
+
+    print(f"🏢 Elysia Concierge Lite for {served_properties(properties)}")
+    print(f"🚀 http://{args.host}:{args.port} - {args.workers} worker(s)")
+    print(f"⚙️  loop={loop} http={http} max_requests={args.max_requests or 'off'}")
     print("=" * 50)
 
     try:
-        uvicorn.run(app, host="0.0.0.0", port=8000, log_level="info")
+        if hasattr(os, "fork"):
+            serve_prefork(
+                app,
+                args.host,
+                args.port,
+                args.workers,
+                log_level=args.log_level,
+                max_requests=args.max_requests or None,
+                max_requests_jitter=args.max_requests_jitter,
+                graceful_timeout=args.graceful_timeout,
+                max_crashes=args.max_crashes,
+                loop=loop,
+                http=http,
+            )
+        else:
+            # No fork (Windows): single process, same settings
+            uvicorn.run(
+                app,
+                host=args.host,
+                port=args.port,
+                log_level=args.log_level,
+                loop=loop,
+                http=http,
+                limit_max_requests=args.max_requests or None,
+                timeout_graceful_shutdown=args.graceful_timeout,
+            )
     except KeyboardInterrupt:
         print("\n👋 Server stopped by user")
-    except Exception as e:
-        print(f"❌ Server error: {e}")
+    except CrashLoop as e:
+        # Leave restarting to the process manager, with its own backoff
+        print(f"💥 Workers keep crashing ({e}); exiting")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""
+Elysia Concierge - Push status updates
+Fan-out hub for request status transitions, streamed to residents over
+Server-Sent Events with heartbeats and resume from a cursor (Last-Event-ID).
+The hub is per worker process: a stream sees the events published by the
+worker that serves it, so with several workers the proxy must route a
+resident's requests and stream to the same worker (sticky sessions).
+"""
+
+import asyncio
+import json
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, Optional
+
+
+class StatusEvent:
+    """One status transition of a resident's request"""
+
+    __slots__ = ("seq", "resident_id", "request_id", "status", "detail", "timestamp")
+
+    def __init__(
+        self,
+        seq: int,
+        resident_id: str,
+        request_id: str,
+        status: str,
+        detail: Optional[Dict[str, Any]],
+        timestamp: float,
+    ):
+        self.seq = seq
+        self.resident_id = resident_id
+        self.request_id = request_id
+        self.status = status
+        self.detail = detail
+        self.timestamp = timestamp
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "seq": self.seq,
+            "request_id": self.request_id,
+            "status": self.status,
+            "detail": self.detail or {},
+            "timestamp": self.timestamp,
+        }
+
+
+class _Channel:
+    """Recent events of one resident plus the futures idle subscribers await"""
+
+    __slots__ = ("log", "latest", "waiters", "subscribers", "updated")
+
+    def __init__(self, history: int):
+        self.log: Deque[StatusEvent] = deque(maxlen=history)
+        # Newest event per request, kept even after it leaves the log
+        self.latest: "OrderedDict[str, StatusEvent]" = OrderedDict()
+        # One shared future per event loop: publishing wakes every subscriber
+        # at once, and an idle connection costs no queue of its own
+        self.waiters: Dict[asyncio.AbstractEventLoop, asyncio.Future] = {}
+        self.subscribers = 0
+        # Clock time of the newest event
+        self.updated: Optional[float] = None
+
+
+def format_sse(event: Optional[StatusEvent]) -> str:
+    """Server-Sent Events frame; None is a heartbeat comment"""
+    if event is None:
+        return ": keepalive\n\n"
+    return f"id: {event.seq}\nevent: status\ndata: {json.dumps(event.as_dict())}\n\n"
+
+
+class StatusHub:
+    """Per-resident status channels; publish is safe from any thread.
+
+    A channel lives while it has subscribers or events younger than
+    `retention` seconds; idle ones are swept out as events are published,
+    so memory follows recent activity rather than every resident ever seen.
+    """
+
+    def __init__(
+        self,
+        heartbeat: float = 15.0,
+        history: int = 50,
+        tracked_requests: int = 20,
+        retention: float = 3600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.heartbeat = heartbeat
+        self.history = history
+        self.tracked_requests = tracked_requests
+        self.retention = retention
+        self.clock = clock
+        self.closed = False
+        self._channels: Dict[str, _Channel] = {}
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._swept_at = clock()
+        self.published = 0
+        self.pruned = 0
+
+    def _channel(self, resident_id: str) -> _Channel:
+        channel = self._channels.get(resident_id)
+        if channel is None:
+            channel = self._channels[resident_id] = _Channel(self.history)
+        return channel
+
+    def publish(
+        self,
+        resident_id: str,
+        request_id: str,
+        status: str,
+        detail: Optional[Dict[str, Any]] = None,
+    ) -> StatusEvent:
+        with self._lock:
+            # Time-based so cursors stay valid across worker restarts
+            self._seq = max(self._seq + 1, time.time_ns() // 1000)
+            event = StatusEvent(
+                self._seq, resident_id, request_id, status, detail, time.time()
+            )
+            channel = self._channel(resident_id)
+            channel.updated = self.clock()
+            channel.log.append(event)
+            channel.latest[request_id] = event
+            channel.latest.move_to_end(request_id)
+            while len(channel.latest) > self.tracked_requests:
+                channel.latest.popitem(last=False)
+            waiters = list(channel.waiters.values())
+            channel.waiters.clear()
+            self.published += 1
+            if channel.updated - self._swept_at >= min(self.retention, 60.0):
+                self._sweep(channel.updated)
+        for waiter in waiters:
+            self._wake(waiter)
+        return event
+
+    def _sweep(self, now: float) -> None:
+        """Drop unwatched channels whose events are all older than retention"""
+        self._swept_at = now
+        idle = [
+            key
+            for key, channel in self._channels.items()
+            if not channel.subscribers
+            and (channel.updated is None or now - channel.updated > self.retention)
+        ]
+        for key in idle:
+            del self._channels[key]
+        self.pruned += len(idle)
+
+    @staticmethod
+    def _wake(waiter: asyncio.Future) -> None:
+        loop = waiter.get_loop()
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            if not waiter.done():
+                waiter.set_result(None)
+        elif not loop.is_closed():
+            loop.call_soon_threadsafe(lambda: waiter.done() or waiter.set_result(None))
+
+    def _pending(self, channel: _Channel, cursor: int) -> List[StatusEvent]:
+        # The latest-per-request map covers events that already left the log
+        events = {e.seq: e for e in channel.log if e.seq > cursor}
+        for event in channel.latest.values():
+            if event.seq > cursor:
+                events[event.seq] = event
+        return [events[seq] for seq in sorted(events)]
+
+    def history_for(self, resident_id: str, request_id: str) -> List[StatusEvent]:
+        with self._lock:
+            channel = self._channels.get(resident_id)
+            if channel is None:
+                return []
+            return [e for e in channel.log if e.request_id == request_id]
+
+    def latest(self, resident_id: str, request_id: str) -> Optional[StatusEvent]:
+        with self._lock:
+            channel = self._channels.get(resident_id)
+            return channel.latest.get(request_id) if channel else None
+
+    async def subscribe(
+        self, resident_id: str, cursor: int = 0
+    ) -> AsyncIterator[Optional[StatusEvent]]:
+        """Yield events after `cursor` as they happen; None for heartbeats"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            channel = self._channel(resident_id)
+            channel.subscribers += 1
+        try:
+            while True:
+                with self._lock:
+                    events = self._pending(channel, cursor)
+                    waiter = None
+                    if not events and not self.closed:
+                        waiter = channel.waiters.get(loop)
+                        if waiter is None:
+                            waiter = channel.waiters[loop] = loop.create_future()
+                for event in events:
+                    cursor = event.seq
+                    yield event
+                if events:
+                    continue
+                if self.closed:
+                    return
+                try:
+                    await asyncio.wait_for(asyncio.shield(waiter), self.heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            with self._lock:
+                channel.subscribers -= 1
+                # Subscribing alone doesn't keep a channel: one that never
+                # got an event goes with its last subscriber
+                if not channel.subscribers and channel.updated is None:
+                    if self._channels.get(resident_id) is channel:
+                        del self._channels[resident_id]
+
+    def close(self) -> None:
+        """End every subscription (e.g. when the worker drains)"""
+        with self._lock:
+            self.closed = True
+            waiters = [w for c in self._channels.values() for w in c.waiters.values()]
+            for channel in self._channels.values():
+                channel.waiters.clear()
+        for waiter in waiters:
+            self._wake(waiter)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "channels": len(self._channels),
+                "subscribers": sum(c.subscribers for c in self._channels.values()),
+                "published": self.published,
+                "pruned": self.pruned,
+            }
@@ -0,0 +1,181 @@
+"""
+Elysia Concierge - Multi-property tenancy
+Each building is a JSON data file (name, location, request ID prefix and
+knowledge); requests pick one by property_id. Models are shared by every
+property: only small per-property artifacts (prompt prefixes, retrieval
+indexes, booking books) are kept, each built on first use.
+"""
+
+import json
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+PROPERTIES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "properties")
+
+_ID = re.compile(r"^[a-z0-9][a-z0-9-]*$")
+_PREFIX = re.compile(r"^[A-Z0-9]{2,8}$")
+REQUIRED = ("property_id", "name", "location", "id_prefix", "knowledge")
+
+
+class UnknownProperty(LookupError):
+    """No property with that ID is configured"""
+
+
+def resident_key(property_id: str, resident_id: str) -> str:
+    """Key for per-resident state: resident IDs are only unique per building"""
+    # Property IDs never contain "/", so keys can't collide
+    return f"{property_id}/{resident_id}"
+
+
+@dataclass(frozen=True)
+class Property:
+    """One building: identity plus everything Elysia knows about it"""
+
+    property_id: str
+    name: str
+    location: str
+    id_prefix: str
+    knowledge: Dict[str, Any]
+    management: str = ""
+    amenity_hours: Dict[str, str] = field(default_factory=dict)
+    local_highlights: List[str] = field(default_factory=list)
+
+    @property
+    def amenities(self) -> List[str]:
+        return self.knowledge.get("amenities", [])
+
+    # Prompt prefixes are built once per property and reused verbatim, so
+    # chat models see an identical (KV-cacheable) start for every request
+
+    @cached_property
+    def system_prompt(self) -> str:
+        return (
+            f"You are Elysia, a professional concierge at {self.name} luxury "
+            f"apartments in {self.location}. You are helpful, warm, and "
+            "knowledgeable about apartment living."
+        )
+
+    @cached_property
+    def request_intro(self) -> str:
+        return f"Resident request at {self.name}: "
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Property":
+        missing = [key for key in REQUIRED if not data.get(key)]
+        if missing:
+            raise ValueError(f"Property is missing {', '.join(missing)}")
+        if not _ID.match(data["property_id"]):
+            raise ValueError(
+                f"Invalid property_id {data['property_id']!r}, "
+                "expected lowercase letters, digits and dashes"
+            )
+        if not _PREFIX.match(data["id_prefix"]):
+            raise ValueError(
+                f"Invalid id_prefix {data['id_prefix']!r}, "
+                "expected 2-8 uppercase letters or digits"
+            )
+        fields = cls.__dataclass_fields__
+        return cls(**{key: value for key, value in data.items() if key in fields})
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__dataclass_fields__}
+
+
+def load_properties(directory: str = PROPERTIES_DIR) -> List[Property]:
+    """Every *.json property file in `directory`, sorted by file name"""
+    properties = []
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(".json"):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            with open(path, encoding="utf-8") as f:
+                properties.append(Property.from_dict(json.load(f)))
+        except (OSError, ValueError) as e:
+            raise ValueError(f"{path}: {e}") from e
+    return properties
+
+
+class PropertyRegistry:
+    """Configured properties, and their derived artifacts built on first use.
+
+    `derived(property_id, kind, build)` keeps one `build(property)` result
+    per property and kind, so only properties that get traffic cost memory.
+    """
+
+    def __init__(self, properties: List[Property], default: Optional[str] = None):
+        if not properties:
+            raise ValueError("No properties configured")
+        self._properties: Dict[str, Property] = {}
+        prefixes: Dict[str, str] = {}
+        for prop in properties:
+            if prop.property_id in self._properties:
+                raise ValueError(f"Duplicate property_id {prop.property_id!r}")
+            if prop.id_prefix in prefixes:
+                raise ValueError(
+                    f"id_prefix {prop.id_prefix!r} used by both "
+                    f"{prefixes[prop.id_prefix]} and {prop.property_id}"
+                )
+            self._properties[prop.property_id] = prop
+            prefixes[prop.id_prefix] = prop.property_id
+        self.default_id = default or properties[0].property_id
+        if self.default_id not in self._properties:
+            raise ValueError(f"Default property {self.default_id!r} is not configured")
+        self._derived: Dict[Tuple[str, str], Any] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(
+        cls, directory: str = PROPERTIES_DIR, default: Optional[str] = None
+    ) -> "PropertyRegistry":
+        return cls(load_properties(directory), default)
+
+    @property
+    def default(self) -> Property:
+        return self._properties[self.default_id]
+
+    def get(self, property_id: Optional[str] = None) -> Property:
+        """The property with `property_id`, or the default one for None"""
+        if property_id is None:
+            return self.default
+        try:
+            return self._properties[property_id]
+        except KeyError:
+            raise UnknownProperty(f"Unknown property {property_id}") from None
+
+    def __contains__(self, property_id: str) -> bool:
+        return property_id in self._properties
+
+    def __iter__(self) -> Iterator[Property]:
+        return iter(self._properties.values())
+
+    def __len__(self) -> int:
+        return len(self._properties)
+
+    def derived(self, property_id: str, kind: str, build: Callable[[Property], Any]):
+        key = (property_id, kind)
+        value = self._derived.get(key)
+        if value is None:
+            with self._lock:
+                value = self._derived.get(key)
+                if value is None:
+                    value = self._derived[key] = build(self.get(property_id))
+        return value
+
+    def sources(self) -> List[Dict[str, Any]]:
+        """Everything artifacts are built from (for snapshot checksums)"""
+        return [prop.as_dict() for prop in self]
+
+    def stats(self) -> Dict[str, Any]:
+        loaded: Dict[str, List[str]] = {}
+        for property_id, kind in list(self._derived):
+            loaded.setdefault(property_id, []).append(kind)
+        return {
+            "properties": len(self),
+            "default": self.default_id,
+            "loaded": loaded,
+        }
@@ -0,0 +1,535 @@
+"""
+Elysia Concierge - Maintenance ticket pipeline
+Request handlers enqueue tickets and return at once; a background worker
+group-commits them to a local SQLite outbox and delivers them to the
+property management system (PMS) through a pluggable sink, with retries
+"""
+
+import hashlib
+import json
+import logging
+import os
+import queue
+import sqlite3
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    from .resilience import LatencyTracker
+except ImportError:
+    from resilience import LatencyTracker
+
+logger = logging.getLogger("elysia-tickets")
+
+
+@dataclass
+class Ticket:
+    ticket_id: str
+    idempotency_key: str
+    resident_id: str
+    unit_number: str
+    message: str
+    priority: str
+    request_id: str
+    created_at: float
+    property_id: Optional[str] = None
+
+
+def scoped_key(key: str, resident_id: str, property_id: Optional[str] = None) -> str:
+    """Client idempotency keys are only unique per resident and building"""
+    scope = json.dumps([property_id, resident_id, key])
+    return hashlib.sha1(scope.encode()).hexdigest()
+
+
+def ticket_id_for(idempotency_key: str) -> str:
+    """Deterministic ID, so a retried submission maps to the same ticket"""
+    digest = hashlib.sha1(idempotency_key.encode()).hexdigest()[:12].upper()
+    return f"MAINT-{digest}"
+
+
+class LocalPMSSink:
+    """Stand-in PMS: appends tickets to a JSON-lines file, once per ticket"""
+
+    name = "local"
+
+    def __init__(self, path: str):
+        self.path = path
+        self._seen: Dict[str, str] = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    record = json.loads(line)
+                    self._seen[record["ticket_id"]] = record["external_id"]
+
+    @staticmethod
+    def external_id_for(ticket: Ticket) -> str:
+        # Derived from the ticket, not a counter: every worker process appends
+        # to the same file and would hand out the same next number
+        return "WO-" + ticket.ticket_id.split("-", 1)[-1]
+
+    def deliver(self, tickets: List[Ticket]) -> Dict[str, str]:
+        """Return external work-order IDs by ticket_id"""
+        delivered = {}
+        lines = []
+        for ticket in tickets:
+            if ticket.ticket_id not in self._seen:
+                external_id = self.external_id_for(ticket)
+                lines.append(
+                    json.dumps({**asdict(ticket), "external_id": external_id}) + "\n"
+                )
+                self._seen[ticket.ticket_id] = external_id
+            delivered[ticket.ticket_id] = self._seen[ticket.ticket_id]
+        if lines:
+            # One append per batch, so lines from other workers never interleave
+            with open(self.path, "a") as f:
+                f.write("".join(lines))
+        return delivered
+
+
+class HTTPPMSSink:
+    """PMS REST endpoint (Yardi/RentManager gateway) taking ticket batches"""
+
+    name = "http"
+
+    def __init__(self, url: str, api_key: str = "", timeout: float = 30.0):
+        self.url = url
+        self.api_key = api_key
+        # Bounds a whole batch, not each ticket in it
+        self.timeout = timeout
+
+    def deliver(self, tickets: List[Ticket]) -> Dict[str, str]:
+        """Post tickets until the batch timeout runs out; tickets left out of
+        the result are retried by the pipeline"""
+        import requests
+
+        deadline = time.monotonic() + self.timeout
+        delivered = {}
+        for ticket in tickets:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                r = requests.post(
+                    self.url,
+                    json=asdict(ticket),
+                    headers={
+                        "Authorization": f"Bearer {self.api_key}",
+                        # The PMS drops duplicates of a ticket we already sent
+                        "Idempotency-Key": ticket.idempotency_key,
+                    },
+                    timeout=remaining,
+                )
+                r.raise_for_status()
+                body = r.json() if r.content else {}
+            except Exception as e:
+                if not delivered:
+                    raise
+                logger.warning(f"PMS delivery stopped after {len(delivered)}: {e}")
+                break
+            delivered[ticket.ticket_id] = str(body.get("id", ticket.ticket_id))
+        return delivered
+
+
+class TicketOutbox:
+    """SQLite outbox; one connection per thread"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS tickets (
+            ticket_id TEXT PRIMARY KEY,
+            payload TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL DEFAULT 0,
+            lease_until REAL NOT NULL DEFAULT 0,
+            leased_by INTEGER,
+            last_error TEXT,
+            external_id TEXT,
+            created_at REAL NOT NULL,
+            delivered_at REAL
+        );
+        CREATE INDEX IF NOT EXISTS tickets_due
+            ON tickets (status, next_attempt_at);
+    """
+
+    def __init__(self, path: str, check_same_thread: bool = True):
+        self.path = path
+        # Writes take the lock up front: persisting and delivering threads
+        # (and other workers) write concurrently, and a deferred transaction
+        # upgrading to a write fails at once instead of waiting its turn
+        self.conn = sqlite3.connect(
+            path,
+            timeout=30,
+            check_same_thread=check_same_thread,
+            isolation_level="IMMEDIATE",
+        )
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self.SCHEMA)
+
+    def insert_batch(self, tickets: List[Ticket]) -> int:
+        """Write a batch in one transaction; returns the number of new tickets"""
+        with self.conn:
+            cursor = self.conn.executemany(
+                "INSERT OR IGNORE INTO tickets (ticket_id, payload, created_at) "
+                "VALUES (?, ?, ?)",
+                [(t.ticket_id, json.dumps(asdict(t)), t.created_at) for t in tickets],
+            )
+        return cursor.rowcount
+
+    def lease_due(self, limit: int, lease: float) -> List[Ticket]:
+        """Claim due tickets for this process so other workers skip them"""
+        now = time.time()
+        pid = os.getpid()
+        with self.conn:
+            self.conn.execute(
+                "UPDATE tickets SET lease_until = ?, leased_by = ? WHERE ticket_id IN ("
+                " SELECT ticket_id FROM tickets WHERE status = 'pending'"
+                " AND next_attempt_at <= ? AND lease_until <= ?"
+                " ORDER BY created_at LIMIT ?)",
+                (now + lease, pid, now, now, limit),
+            )
+            rows = self.conn.execute(
+                "SELECT payload FROM tickets WHERE status = 'pending'"
+                " AND leased_by = ? AND lease_until > ? ORDER BY created_at",
+                (pid, now),
+            ).fetchall()
+        return [Ticket(**json.loads(payload)) for (payload,) in rows]
+
+    def mark_delivered(self, external_ids: Dict[str, str]) -> None:
+        now = time.time()
+        with self.conn:
+            self.conn.executemany(
+                "UPDATE tickets SET status = 'delivered', external_id = ?,"
+                " delivered_at = ?, attempts = attempts + 1, lease_until = 0"
+                " WHERE ticket_id = ?",
+                [
+                    (external, now, ticket_id)
+                    for ticket_id, external in external_ids.items()
+                ],
+            )
+
+    def mark_retry(
+        self, ticket_ids: List[str], error: str, backoff: float, max_attempts: int
+    ) -> int:
+        """Schedule another attempt; tickets out of attempts become 'failed'"""
+        now = time.time()
+        with self.conn:
+            self.conn.executemany(
+                "UPDATE tickets SET attempts = attempts + 1, last_error = ?,"
+                " lease_until = 0, next_attempt_at = ? + ? * (1 << MIN(attempts, 10)),"
+                " status = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE status END"
+                " WHERE ticket_id = ?",
+                [(error, now, backoff, max_attempts, tid) for tid in ticket_ids],
+            )
+            placeholders = ",".join("?" * len(ticket_ids))
+            (dead,) = self.conn.execute(
+                f"SELECT COUNT(*) FROM tickets WHERE status = 'failed'"
+                f" AND ticket_id IN ({placeholders})",
+                ticket_ids,
+            ).fetchone()
+        return dead
+
+    def status(self, ticket_id: str) -> Optional[Dict[str, Any]]:
+        row = self.conn.execute(
+            "SELECT status, attempts, external_id, last_error, created_at,"
+            " delivered_at FROM tickets WHERE ticket_id = ?",
+            (ticket_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        keys = (
+            "status",
+            "attempts",
+            "external_id",
+            "last_error",
+            "created_at",
+            "delivered_at",
+        )
+        return dict(zip(keys, row))
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+class TicketPipeline:
+    """Enqueue-and-return ticket creation with background workers: one thread
+    persists batches to the outbox, another delivers them to the sink, so a
+    slow PMS never holds up persistence"""
+
+    def __init__(
+        self,
+        sink=None,
+        outbox_path: Optional[str] = None,
+        batch_size: int = 50,
+        flush_interval: float = 0.2,
+        max_attempts: int = 8,
+        backoff: float = 1.0,
+        lease: float = 60.0,
+        on_status: Optional[Callable[[Ticket, str, Dict[str, Any]], None]] = None,
+    ):
+        tmp = tempfile.gettempdir()
+        self.outbox_path = outbox_path or os.path.join(tmp, "elysia-tickets.db")
+        self.sink = sink or LocalPMSSink(os.path.join(tmp, "elysia-pms.jsonl"))
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.lease = lease
+        # Called from the delivery thread after each delivery attempt
+        self.on_status = on_status
+
+        self._queue: "queue.Queue[Optional[Ticket]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._delivery_thread: Optional[threading.Thread] = None
+        # Set by the persisting thread after each batch it writes
+        self._wake = threading.Event()
+        self._pid: Optional[int] = None
+        self._start_lock = threading.Lock()
+        self._stopping = threading.Event()
+        # Status lookups share one connection per worker process
+        self._reader: Optional[TicketOutbox] = None
+        self._reader_pid: Optional[int] = None
+        self._reader_lock = threading.Lock()
+        self.delivery_latency = LatencyTracker(window=500, min_samples=1)
+        self.metrics = {
+            "enqueued": 0,
+            "persisted": 0,
+            "duplicates": 0,
+            "batches": 0,
+            "delivered": 0,
+            "delivery_errors": 0,
+            "dead_lettered": 0,
+        }
+        self._started_at = time.time()
+
+    def submit(
+        self,
+        idempotency_key: str,
+        resident_id: str,
+        unit_number: str,
+        message: str,
+        priority: str,
+        request_id: str,
+        property_id: Optional[str] = None,
+    ) -> str:
+        """Queue a ticket and return its ID immediately"""
+        key = scoped_key(idempotency_key, resident_id, property_id)
+        ticket = Ticket(
+            ticket_id=ticket_id_for(key),
+            idempotency_key=key,
+            resident_id=resident_id,
+            unit_number=unit_number,
+            message=message,
+            priority=priority,
+            request_id=request_id,
+            created_at=time.time(),
+            property_id=property_id,
+        )
+        self.start()
+        self._queue.put(ticket)
+        self.metrics["enqueued"] += 1
+        return ticket.ticket_id
+
+    def start(self) -> None:
+        """Start the workers, which also deliver tickets left pending in the
+        outbox by an earlier run; call at startup in every worker process"""
+        self._ensure_worker()
+
+    def _ensure_worker(self) -> None:
+        # Started again in a forked child: threads don't survive fork
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._stopping.clear()
+                self._thread = threading.Thread(
+                    target=self._run, name="elysia-tickets", daemon=True
+                )
+                self._delivery_thread = threading.Thread(
+                    target=self._deliver_loop,
+                    name="elysia-ticket-delivery",
+                    daemon=True,
+                )
+                self._thread.start()
+                self._delivery_thread.start()
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Wait until every queued ticket is persisted to the outbox"""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Persist what is queued and stop; undelivered tickets stay in the outbox"""
+        if self._thread is None or self._pid != os.getpid():
+            return
+        deadline = time.monotonic() + timeout
+        self._stopping.set()
+        self._queue.put(None)
+        self._thread.join(timeout)
+        self._wake.set()
+        self._delivery_thread.join(max(0.0, deadline - time.monotonic()))
+        self._thread = None
+        self._delivery_thread = None
+        with self._reader_lock:
+            if self._reader is not None and self._reader_pid == os.getpid():
+                self._reader.close()
+            self._reader = None
+
+    def _run(self) -> None:
+        outbox = TicketOutbox(self.outbox_path)
+        try:
+            while True:
+                batch = self._next_batch()
+                if batch:
+                    self._persist(outbox, batch)
+                if self._stopping.is_set() and self._queue.empty():
+                    break
+        finally:
+            outbox.close()
+
+    def _deliver_loop(self) -> None:
+        # Its own connection: SQLite connections stay on the thread that made them
+        outbox = TicketOutbox(self.outbox_path)
+        try:
+            while True:
+                self._wake.wait(self.flush_interval)
+                self._wake.clear()
+                try:
+                    self._deliver(outbox)
+                except sqlite3.Error as e:
+                    # Leased tickets come due again when the lease runs out
+                    logger.warning(f"Ticket outbox update failed: {e}")
+                    time.sleep(self.flush_interval)
+                if self._stopping.is_set() and not self._queue.unfinished_tasks:
+                    break
+        finally:
+            outbox.close()
+
+    def _next_batch(self) -> List[Ticket]:
+        """Block for the first ticket, then gather more for one flush interval"""
+        batch: List[Ticket] = []
+        try:
+            first = self._queue.get(timeout=self.flush_interval)
+        except queue.Empty:
+            return batch
+        if first is None:
+            self._queue.task_done()
+            return batch
+        batch.append(first)
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                ticket = self._queue.get(timeout=max(0.0, remaining))
+            except queue.Empty:
+                break
+            if ticket is None:
+                self._queue.task_done()
+                break
+            batch.append(ticket)
+        return batch
+
+    def _persist(self, outbox: TicketOutbox, batch: List[Ticket]) -> None:
+        try:
+            inserted = outbox.insert_batch(batch)
+        except sqlite3.Error as e:
+            # Put them back; the next loop retries the write
+            logger.warning(f"Ticket outbox write failed: {e}")
+            for ticket in batch:
+                self._queue.put(ticket)
+            time.sleep(self.flush_interval)
+        else:
+            self.metrics["persisted"] += inserted
+            self.metrics["duplicates"] += len(batch) - inserted
+            self.metrics["batches"] += 1
+            self._wake.set()
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+    def _deliver(self, outbox: TicketOutbox) -> None:
+        tickets = outbox.lease_due(self.batch_size, self.lease)
+        if not tickets:
+            return
+        try:
+            external_ids = self.sink.deliver(tickets)
+        except Exception as e:
+            external_ids, error = {}, str(e)
+        else:
+            # The sink ran out of batch time before reaching the rest
+            error = "not delivered within the PMS batch timeout"
+        undelivered = [t for t in tickets if t.ticket_id not in external_ids]
+        if external_ids:
+            outbox.mark_delivered(external_ids)
+            now = time.time()
+            for ticket in tickets:
+                if ticket.ticket_id in external_ids:
+                    self.delivery_latency.record(now - ticket.created_at)
+                    self._notify(
+                        ticket,
+                        "delivered",
+                        {"external_id": external_ids[ticket.ticket_id]},
+                    )
+            self.metrics["delivered"] += len(external_ids)
+        if undelivered:
+            self.metrics["delivery_errors"] += 1
+            dead = outbox.mark_retry(
+                [t.ticket_id for t in undelivered],
+                error,
+                self.backoff,
+                self.max_attempts,
+            )
+            self.metrics["dead_lettered"] += dead
+            logger.warning(
+                f"PMS delivery of {len(undelivered)} tickets failed: {error}"
+            )
+            for ticket in undelivered:
+                self._notify(ticket, "delivery_failed", {"error": error})
+
+    def _notify(self, ticket: Ticket, status: str, detail: Dict[str, Any]) -> None:
+        if self.on_status is None:
+            return
+        try:
+            self.on_status(ticket, status, detail)
+        except Exception as e:
+            logger.warning(f"Ticket status callback failed: {e}")
+
+    def status(self, ticket_id: str) -> Optional[Dict[str, Any]]:
+        """Outbox state of one ticket"""
+        with self._reader_lock:
+            if self._reader is None or self._reader_pid != os.getpid():
+                # Opened once per process (a forked child can't reuse ours),
+                # used from whichever executor thread asks
+                self._reader = TicketOutbox(self.outbox_path, check_same_thread=False)
+                self._reader_pid = os.getpid()
+            return self._reader.status(ticket_id)
+
+    def stats(self) -> Dict[str, Any]:
+        elapsed = max(time.time() - self._started_at, 1e-9)
+        p50 = self.delivery_latency.percentile(0.5)
+        p95 = self.delivery_latency.percentile(0.95)
+        return {
+            **self.metrics,
+            "sink": getattr(self.sink, "name", type(self.sink).__name__),
+            "queue_depth": self._queue.qsize(),
+            "avg_batch_size": (
+                round(self.metrics["persisted"] / self.metrics["batches"], 2)
+                if self.metrics["batches"]
+                else 0.0
+            ),
+            "persisted_per_s": round(self.metrics["persisted"] / elapsed, 2),
+            "delivery_latency_p50_ms": (
+                round(p50 * 1000, 1) if p50 is not None else None
+            ),
+            "delivery_latency_p95_ms": (
+                round(p95 * 1000, 1) if p95 is not None else None
+            ),
+        }
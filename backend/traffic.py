@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Elysia Concierge - Traffic capture and replay
+Records anonymized concierge requests to JSON lines with their arrival
+times, and replays them against a running server or an in-process ASGI app
+to measure throughput, tail latency and errors per request type and backend
+
+Usage: python traffic.py capture.jsonl --target http://localhost:8000 --speed 10
+       python traffic.py capture.jsonl --app elysia_lite:app --closed --concurrency 64
+"""
+
+import argparse
+import asyncio
+import hashlib
+import importlib
+import json
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+# Headers that change how a request is served and are safe to keep
+REPLAYED_HEADERS = ("x-elysia-deadline-ms", "idempotency-key")
+
+_EMAIL = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+_PHONE = re.compile(r"[+(]?\d[\d\s().-]{6,}\d")
+
+
+def scrub(message: str) -> str:
+    """Remove contact details residents sometimes type into messages"""
+    return _PHONE.sub("<phone>", _EMAIL.sub("<email>", message))
+
+
+class TrafficRecorder:
+    """Append-only JSONL capture of API requests, anonymized and sampled.
+
+    Resident and unit identifiers are replaced by salted hashes, so replayed
+    traffic keeps its per-resident and per-unit shape (sessions, rate
+    limits) without identifying anyone.
+
+    `record` only queues the line; a writer thread per process appends
+    batches of whole lines with one os.write on an O_APPEND descriptor, so
+    pre-forked workers sharing the file never interleave partial lines.
+    When the queue is full (disk too slow) lines are dropped and counted.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        sample_rate: float = 1.0,
+        salt: str = "",
+        flush_every: int = 100,
+        max_queue: int = 10000,
+    ):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.salt = salt or f"{random.getrandbits(64):x}"
+        # Most lines per write
+        self.flush_every = flush_every
+        self.max_queue = max_queue
+        # Created on first record so each pre-forked worker has its own
+        self._queue: Optional["queue.Queue[Optional[bytes]]"] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.recorded = 0
+        self.dropped = 0
+        self.write_errors = 0
+
+    def _pseudonym(self, prefix: str, value: str) -> str:
+        digest = hashlib.sha256(f"{self.salt}\0{value}".encode()).hexdigest()
+        return f"{prefix}-{digest[:12]}"
+
+    def anonymize(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        body = dict(body)
+        if "resident_id" in body:
+            body["resident_id"] = self._pseudonym("RES", str(body["resident_id"]))
+        if "unit_number" in body:
+            body["unit_number"] = self._pseudonym("UNIT", str(body["unit_number"]))
+        if "message" in body:
+            body["message"] = scrub(str(body["message"]))
+        return body
+
+    def record(self, path: str, body: Dict[str, Any], headers: Any) -> None:
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return
+        headers = {name.lower(): value for name, value in headers.items()}
+        line = json.dumps(
+            {
+                "ts": time.time(),
+                "method": "POST",
+                "path": path,
+                "headers": {
+                    name: headers[name] for name in REPLAYED_HEADERS if name in headers
+                },
+                "body": self.anonymize(body),
+            }
+        )
+        try:
+            self._writer().put_nowait(line.encode() + b"\n")
+        except queue.Full:
+            self.dropped += 1
+            return
+        self.recorded += 1
+
+    def _writer(self) -> "queue.Queue[Optional[bytes]]":
+        if self._thread is None or self._pid != os.getpid():
+            with self._lock:
+                if self._thread is None or self._pid != os.getpid():
+                    # Threads don't survive fork: a worker starts its own
+                    self._queue = queue.Queue(self.max_queue)
+                    self._thread = threading.Thread(
+                        target=self._write_loop,
+                        args=(self._queue,),
+                        name="elysia-capture",
+                        daemon=True,
+                    )
+                    self._thread.start()
+                    self._pid = os.getpid()
+        return self._queue
+
+    def _write_loop(self, lines: "queue.Queue[Optional[bytes]]") -> None:
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        try:
+            while True:
+                batch = [lines.get()]
+                while batch[-1] is not None and len(batch) < self.flush_every:
+                    try:
+                        batch.append(lines.get_nowait())
+                    except queue.Empty:
+                        break
+                done = batch[-1] is None
+                data = b"".join(line for line in batch if line is not None)
+                if data:
+                    try:
+                        os.write(fd, data)
+                    except OSError:
+                        self.write_errors += 1
+                for _ in batch:
+                    lines.task_done()
+                if done:
+                    return
+        finally:
+            os.close(fd)
+
+    def flush(self) -> None:
+        """Wait until every line recorded so far is written"""
+        if self._queue is not None and self._pid == os.getpid():
+            self._queue.join()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                self._queue.put(None)
+                self._thread.join()
+            self._thread = None
+            self._queue = None
+
+
+def load_traffic(path: str) -> List[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    return sorted(records, key=lambda record: record["ts"])
+
+
+@dataclass
+class Result:
+    request_type: str
+    backend: str
+    status: int
+    latency: float
+    error: Optional[str] = None
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    """Nearest-rank quantile (0-1) of an already sorted list"""
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def summarize(results: List[Result], elapsed: float) -> Dict[str, Any]:
+    """Throughput, latency percentiles (ms) and error rates"""
+
+    def stats(group: List[Result]) -> Dict[str, Any]:
+        ordered = sorted(r.latency for r in group)
+        errors = sum(1 for r in group if r.error or r.status >= 500)
+        return {
+            "requests": len(group),
+            "throughput_rps": round(len(group) / elapsed, 2) if elapsed else 0.0,
+            "p50_ms": round(percentile(ordered, 0.50) * 1000, 2),
+            "p95_ms": round(percentile(ordered, 0.95) * 1000, 2),
+            "p99_ms": round(percentile(ordered, 0.99) * 1000, 2),
+            "p999_ms": round(percentile(ordered, 0.999) * 1000, 2),
+            "error_rate": round(errors / len(group), 4) if group else 0.0,
+            # Shed or throttled on purpose, not failures
+            "rejected": sum(1 for r in group if r.status in (429, 503)),
+        }
+
+    def grouped(attribute: str) -> Dict[str, Any]:
+        groups: Dict[str, List[Result]] = {}
+        for result in results:
+            groups.setdefault(getattr(result, attribute), []).append(result)
+        return {name: stats(group) for name, group in sorted(groups.items())}
+
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "overall": stats(results),
+        "by_request_type": grouped("request_type"),
+        "by_backend": grouped("backend"),
+    }
+
+
+def make_client(target: Any, timeout: float = 30.0):
+    """httpx client for a base URL or an in-process ASGI app"""
+    import httpx
+
+    if isinstance(target, str):
+        return httpx.AsyncClient(base_url=target, timeout=timeout)
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=target),
+        base_url="http://elysia.test",
+        timeout=timeout,
+    )
+
+
+async def _send(client, record: Dict[str, Any], intended: float) -> Result:
+    body = record.get("body", {})
+    request_type = body.get("request_type", "unknown")
+    try:
+        response = await client.request(
+            record.get("method", "POST"),
+            record["path"],
+            json=body,
+            headers=record.get("headers", {}),
+        )
+    except Exception as e:
+        return Result(request_type, "error", 0, time.perf_counter() - intended, str(e))
+    # Measured from the intended send time so a backed-up server can't
+    # hide its queueing delay (coordinated omission)
+    return Result(
+        request_type,
+        response.headers.get("x-elysia-backend", "none"),
+        response.status_code,
+        time.perf_counter() - intended,
+    )
+
+
+async def replay(
+    records: List[Dict[str, Any]],
+    target: Any,
+    speed: float = 1.0,
+    closed_loop: bool = False,
+    concurrency: int = 32,
+    timeout: float = 30.0,
+) -> Dict[str, Any]:
+    """Replay captured traffic and summarize it.
+
+    Open loop (default) sends each request at its captured offset divided
+    by `speed`, however slow responses are, like real residents. Closed
+    loop keeps `concurrency` requests in flight back to back, which finds
+    peak throughput.
+    """
+    results: List[Result] = []
+    async with make_client(target, timeout) as client:
+        started = time.perf_counter()
+        if closed_loop:
+            queue = iter(records)
+
+            async def worker() -> None:
+                for record in queue:
+                    results.append(await _send(client, record, time.perf_counter()))
+
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+        else:
+            first = records[0]["ts"] if records else 0.0
+            tasks = []
+            for record in records:
+                intended = started + (record["ts"] - first) / speed
+                delay = intended - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                tasks.append(asyncio.create_task(_send(client, record, intended)))
+            results = list(await asyncio.gather(*tasks))
+        elapsed = time.perf_counter() - started
+    return summarize(results, elapsed)
+
+
+def _load_app(spec: str):
+    module, _, attribute = spec.partition(":")
+    return getattr(importlib.import_module(module), attribute or "app")
+
+
+def _print_report(report: Dict[str, Any]) -> None:
+    columns = ("requests", "throughput_rps", "p50_ms", "p95_ms", "p99_ms", "p999_ms")
+    header = f"{'':24}" + "".join(f"{c:>15}" for c in columns) + f"{'errors':>10}"
+    print(f"Replayed in {report['elapsed_s']} s")
+    for title, rows in (
+        ("overall", {"all": report["overall"]}),
+        ("by request type", report["by_request_type"]),
+        ("by backend", report["by_backend"]),
+    ):
+        print(f"\n{title}\n{header}")
+        for name, row in rows.items():
+            cells = "".join(f"{row[c]:>15}" for c in columns)
+            print(f"{name:24}{cells}{row['error_rate']:>10.2%}")
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Replay captured Elysia traffic")
+    parser.add_argument("capture", help="JSONL written by ELYSIA_CAPTURE_PATH")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--target", help="base URL of a running server")
+    target.add_argument("--app", help="in-process ASGI app, e.g. elysia_lite:app")
+    parser.add_argument("--speed", type=float, default=1.0, help="1, 10, 100, ...")
+    parser.add_argument("--closed", action="store_true", help="closed-loop mode")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--json", action="store_true", help="print the raw report")
+    args = parser.parse_args(argv)
+
+    records = load_traffic(args.capture)
+    report = asyncio.run(
+        replay(
+            records,
+            args.target or _load_app(args.app),
+            speed=args.speed,
+            closed_loop=args.closed,
+            concurrency=args.concurrency,
+            timeout=args.timeout,
+        )
+    )
+    if args.json:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        _print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,4 +7,6 @@ if (-not $Token) {
   exit 1
 }
 npm i -g vercel
+# Precomputed artifacts, so cold starts map them instead of rebuilding
+python backend/snapshot.py
 vercel --prod --token $Token
@@ -0,0 +1,159 @@
+"""
+Tests for per-resident / per-unit admission control
+"""
+
+import os
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.append("backend")
+
+from backend.admission import AdmissionController, parse_limits
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_controller(**kwargs):
+    clock = FakeClock()
+    limits = {"general_inquiry": (6, 3), "maintenance": (60, 2)}
+    return AdmissionController(limits, clock=clock, **kwargs), clock
+
+
+def test_burst_then_refill():
+    admission, clock = make_controller()
+    for _ in range(3):
+        assert admission.admit("R-1", "101", "general_inquiry") == 0
+    # 6 per minute: the next token arrives in 10 seconds
+    assert admission.admit("R-1", "101", "general_inquiry") == pytest.approx(10)
+
+    clock.now += 10
+    assert admission.admit("R-1", "101", "general_inquiry") == 0
+    assert admission.stats()["rejected_by_type"] == {"general_inquiry": 1}
+
+
+def test_budgets_are_separate_per_type_and_resident():
+    admission, _ = make_controller()
+    for _ in range(3):
+        admission.admit("R-1", "101", "general_inquiry")
+    assert admission.admit("R-1", "101", "general_inquiry") > 0
+
+    assert admission.admit("R-1", "101", "maintenance") == 0
+    assert admission.admit("R-2", "102", "general_inquiry") == 0
+
+
+def test_unit_budget_is_shared_by_its_residents():
+    admission, _ = make_controller(unit_factor=2.0)
+    for resident in ("R-1", "R-2"):
+        for _ in range(3):
+            assert admission.admit(resident, "305", "general_inquiry") == 0
+    # Each resident has budget left only if the unit does
+    assert admission.admit("R-3", "305", "general_inquiry") > 0
+    assert admission.admit("R-3", "306", "general_inquiry") == 0
+
+
+def test_emergency_is_never_throttled():
+    admission, _ = make_controller()
+    for _ in range(50):
+        assert admission.admit("R-1", "101", "emergency") == 0
+    assert admission.stats()["exempt"] == 50
+
+
+def test_rejection_does_not_spend_tokens():
+    admission, clock = make_controller()
+    for _ in range(6):
+        admission.admit("R-1", "101", "general_inquiry")
+    clock.now += 10
+    assert admission.admit("R-1", "101", "general_inquiry") == 0
+
+
+def test_parse_limits():
+    assert parse_limits("maintenance=4:6, general_inquiry=20:30") == {
+        "maintenance": (4.0, 6.0),
+        "general_inquiry": (20.0, 30.0),
+    }
+    assert parse_limits("") == {}
+    with pytest.raises(ValueError):
+        parse_limits("maintenance=4")
+    for spec in ("maintenance=0:6", "maintenance=4:0", "maintenance=-1:6"):
+        with pytest.raises(ValueError):
+            parse_limits(spec)
+    with pytest.raises(ValueError):
+        AdmissionController({"maintenance": (0, 6)})
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork")
+def test_shared_table_spans_forked_workers():
+    admission, _ = make_controller(shared=True)
+    assert admission.table.shared
+
+    pid = os.fork()
+    if pid == 0:
+        # Child worker spends the whole burst
+        for _ in range(3):
+            admission.admit("R-1", "101", "general_inquiry")
+        os._exit(0)
+    os.waitpid(pid, 0)
+    assert admission.admit("R-1", "101", "general_inquiry") > 0
+
+
+def test_over_limit_request_gets_429():
+    from backend.elysia_lite import app, elysia_engine
+
+    client = TestClient(app)
+    original = elysia_engine.admission
+    elysia_engine.admission = AdmissionController({"general_inquiry": (1, 1)})
+    try:
+        payload = {
+            "resident_id": "TEST-A1",
+            "unit_number": "401",
+            "request_type": "general_inquiry",
+            "message": "What time does the pool open?",
+        }
+        assert client.post("/api/elysia/request", json=payload).status_code == 200
+        r = client.post("/api/elysia/request", json=payload)
+        assert r.status_code == 429
+        assert int(r.headers["Retry-After"]) >= 1
+        # Residents pick the priority, so it can't buy past the limit
+        payload["priority"] = "emergency"
+        assert client.post("/api/elysia/request", json=payload).status_code == 429
+
+        payload["request_type"] = "emergency"
+        payload["message"] = "Water is pouring through the ceiling"
+        assert client.post("/api/elysia/request", json=payload).status_code == 200
+    finally:
+        elysia_engine.admission = original
+
+
+def test_resident_budgets_are_per_property():
+    from backend.elysia_lite import app, elysia_engine
+
+    class Recorder:
+        calls = []
+
+        async def admit_async(self, resident_id, unit_number, request_type):
+            self.calls.append((resident_id, unit_number))
+            return 0.0
+
+    original, elysia_engine.admission = elysia_engine.admission, Recorder()
+    try:
+        TestClient(app).post(
+            "/api/elysia/request",
+            json={
+                "resident_id": "TEST-A2",
+                "unit_number": "402",
+                "request_type": "general_inquiry",
+                "message": "What time does the pool open?",
+            },
+        )
+    finally:
+        elysia_engine.admission = original
+    # Resident R-1 of one building must not spend another building's R-1 budget
+    assert Recorder.calls == [("the-avant/TEST-A2", "the-avant:402")]
@@ -0,0 +1,152 @@
+"""
+Tests for streaming dashboard analytics
+"""
+
+import os
+import random
+import sys
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+
+sys.path.append("backend")
+
+from backend.analytics import (
+    Analytics,
+    CountMinSketch,
+    HeavyHitters,
+    RollingCounts,
+    amenity_terms,
+)
+
+NAMES = {
+    "fitness_center": "Fitness Center",
+    "swimming_pool": "Swimming Pool",
+    "clubhouse": "Clubhouse",
+    "ev_charging_stations": "EV Charging Stations",
+}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_800_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_count_min_never_underestimates():
+    sketch = CountMinSketch(width=64, depth=4)
+    truth = {}
+    for i in range(2000):
+        key = f"k{random.randint(0, 200)}"
+        truth[key] = truth.get(key, 0) + 1
+        sketch.add(key)
+    assert all(sketch.estimate(key) >= count for key, count in truth.items())
+    assert sketch.total == 2000
+
+
+def test_heavy_hitters_find_the_frequent_keys():
+    hitters = HeavyHitters(k=3)
+    stream = ["pool"] * 50 + ["gym"] * 30 + ["clubhouse"] * 20
+    stream += [f"rare-{i}" for i in range(200)]
+    random.Random(7).shuffle(stream)
+    for key in stream:
+        hitters.add(key)
+    assert [key for key, _ in hitters.items()] == ["pool", "gym", "clubhouse"]
+
+
+def test_rolling_counts_expire_old_buckets():
+    rolling = RollingCounts(window=60, buckets=6)
+    rolling.add("maintenance", 0)
+    rolling.add("maintenance", 25)
+    rolling.add("emergency", 55)
+    assert rolling.counts(59) == {"maintenance": 2, "emergency": 1}
+    assert rolling.counts(65) == {"maintenance": 1, "emergency": 1}
+    assert rolling.counts(500) == {}
+
+
+def test_amenity_terms_include_synonyms():
+    terms = amenity_terms(NAMES)
+    assert terms["pool"] == "swimming_pool"
+    assert terms["gym"] == "fitness_center"
+    assert terms["charge"] == "ev_charging_stations"
+    assert "center" not in terms
+
+
+def test_record_updates_every_aggregate():
+    clock = FakeClock()
+    analytics = Analytics(amenity_terms(NAMES), clock=clock)
+    friday_evening = datetime(2026, 10, 16, 18, 30)
+    for i in range(3):
+        analytics.record(
+            f"R-{i}",
+            "304",
+            "amenity_booking",
+            "medium",
+            "Book the pool?",
+            friday_evening,
+        )
+    analytics.record(
+        "R-1",
+        "210",
+        "maintenance",
+        "high",
+        "The dishwasher is leaking",
+        datetime(2026, 10, 12, 8),
+        backend="llamacpp",
+        escalated=True,
+    )
+    clock.now += 2 * 3600
+    analytics.record("R-2", "210", "general_inquiry", "low", "Hi", friday_evening)
+
+    snapshot = analytics.snapshot()
+    assert snapshot["total_requests"] == 5
+    assert snapshot["escalations"] == 1
+    assert snapshot["by_type"]["amenity_booking"] == 3
+    assert snapshot["top_units"][0] == {"property_id": None, "unit": "304", "count": 3}
+    assert snapshot["peak_times"][0] == {"day": "Fri", "hour": 18, "count": 4}
+    assert sum(snapshot["hour_of_week"]["maintenance"]) == 1
+    assert snapshot["top_amenities"] == [{"amenity": "swimming_pool", "count": 3}]
+    terms = {entry["term"] for entry in snapshot["maintenance_patterns"]}
+    assert terms == {"dishwasher", "leaking"}
+    assert snapshot["last_hour"] == {"general_inquiry": 1}
+    assert snapshot["last_24h"]["amenity_booking"] == 3
+
+
+def test_units_are_counted_per_property_in_fixed_memory():
+    analytics = Analytics(top_k=3)
+    when = datetime(2026, 10, 16, 18, 30)
+    for prop in ("the-avant", "maple-court") * 2 + ("the-avant",):
+        analytics.record(
+            "R-1", "304", "maintenance", "low", "Leak", when, property_id=prop
+        )
+    # Clients make up unit numbers; they must not grow the aggregates
+    for i in range(1000):
+        analytics.record("R-2", f"X{i}", "general_inquiry", "low", "Hi", when)
+
+    assert len(analytics.units.top) == 3
+    top = analytics.snapshot()["top_units"]
+    assert top[0] == {"property_id": "the-avant", "unit": "304", "count": 3}
+    assert top[1] == {"property_id": "maple-court", "unit": "304", "count": 2}
+
+
+def test_analytics_endpoint():
+    from backend.elysia_lite import app
+
+    client = TestClient(app)
+    client.post(
+        "/api/elysia/request",
+        json={
+            "resident_id": "TEST-AN1",
+            "unit_number": "707",
+            "request_type": "amenity_booking",
+            "message": "Can I reserve the clubhouse Saturday?",
+        },
+    )
+    r = client.get("/api/elysia/analytics")
+    assert r.status_code == 200
+    data = r.json()
+    assert data["total_requests"] >= 1
+    assert data["worker"] == os.getpid()
+    assert "clubhouse" in [entry["amenity"] for entry in data["top_amenities"]]
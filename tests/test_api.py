@@ -46,3 +46,58 @@ def test_submit_request_maintenance():
     data = r.json()
     assert "response" in data
     assert "request_id" in data
+
+
+def test_submit_request_with_exhausted_deadline_still_answers():
+    payload = {
+        "resident_id": "TEST-2",
+        "unit_number": "102",
+        "request_type": "general_inquiry",
+        "message": "Hello",
+    }
+    r = client.post(
+        "/api/elysia/request", json=payload, headers={"X-Elysia-Deadline-Ms": "0"}
+    )
+    assert r.status_code == 200
+    assert r.json()["response"]
+
+
+def test_ready_is_503_until_warmup_completes():
+    import time
+
+    from backend.elysia_lite import elysia_engine
+
+    elysia_engine.warmup = {"state": "pending", "timings_ms": {}}
+    assert client.get("/ready").status_code == 503
+
+    with TestClient(app) as live_client:
+        for _ in range(50):
+            if live_client.get("/ready").status_code == 200:
+                break
+            time.sleep(0.05)
+        r = live_client.get("/ready")
+        assert r.status_code == 200
+
+        health = live_client.get("/health").json()
+        assert health["warmup"]["state"] == "complete"
+        timings = health["warmup"]["timings_ms"]["mock"]
+        assert set(timings) >= {"maintenance", "emergency", "amenity_booking"}
+
+    # Shutdown drains the worker out of rotation
+    assert client.get("/ready").status_code == 503
+
+
+def test_health_reports_active_backend(monkeypatch):
+    from unittest.mock import Mock
+
+    from backend.elysia_lite import LlamaCppAI, elysia_engine
+
+    original = elysia_engine.router.backends
+    try:
+        elysia_engine.ai = LlamaCppAI(Mock())
+        data = client.get("/health").json()
+        assert data["active_backend"] == "llamacpp"
+        assert data["mode"] == "llamacpp"
+        assert "mock" in data["backends"]
+    finally:
+        elysia_engine.router.backends = original
@@ -0,0 +1,223 @@
+"""
+Tests for the amenity booking engine and its endpoints
+"""
+
+import os
+import stat
+import sys
+import threading
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.append("backend")
+
+from backend.booking import (
+    AmenityBookings,
+    BookingConflict,
+    BookingError,
+    UnknownAmenity,
+    parse_hours,
+)
+from backend.elysia_lite import app, elysia_engine, properties
+
+THE_AVANT_KNOWLEDGE = properties.get("the-avant").knowledge
+
+TODAY = date(2026, 10, 19)
+DAY = date(2026, 11, 7)
+
+
+def make_bookings(**options):
+    return AmenityBookings.from_amenities(
+        THE_AVANT_KNOWLEDGE["amenities"], today=lambda: TODAY, **options
+    )
+
+
+def test_parse_hours():
+    assert parse_hours("Swimming Pool (6 AM - 10 PM)") == (360, 1320)
+    assert parse_hours("Fitness Center (24/7)") == (0, 1440)
+    assert parse_hours("EV Charging Stations") == (0, 1440)
+
+
+def test_amenities_resolve_by_partial_name():
+    bookings = make_bookings()
+    assert bookings.resolve("pool").key == "swimming_pool"
+    assert bookings.resolve("Clubhouse").capacity == 1
+    with pytest.raises(UnknownAmenity):
+        bookings.resolve("package room")
+
+
+def test_capacity_one_conflicts():
+    bookings = make_bookings()
+    bookings.book("clubhouse", "R-1", "101", DAY, "18:00", "21:00")
+
+    with pytest.raises(BookingConflict):
+        bookings.book("clubhouse", "R-2", "102", DAY, "20:00", "22:00")
+    # Adjacent slot is fine
+    bookings.book("clubhouse", "R-2", "102", DAY, "21:00", "22:00")
+
+
+def test_capacity_counts_party_size():
+    bookings = make_bookings()
+    bookings.book("ev charging", "R-1", "101", DAY, "08:00", "10:00", party_size=3)
+
+    with pytest.raises(BookingConflict):
+        bookings.book("ev charging", "R-2", "102", DAY, "09:00", "09:30", party_size=2)
+    bookings.book("ev charging", "R-2", "102", DAY, "09:00", "09:30")
+
+
+def test_operating_hours_enforced():
+    bookings = make_bookings()
+    with pytest.raises(BookingError):
+        bookings.book("pool", "R-1", "101", DAY, "05:00", "07:00")
+    with pytest.raises(BookingError):
+        bookings.book("pool", "R-1", "101", DAY, "07:15", "08:00")
+
+
+def test_recurring_booking_is_all_or_nothing():
+    bookings = make_bookings()
+    # Occupy the third week
+    bookings.book("clubhouse", "R-9", "109", date(2026, 11, 21), "18:00", "19:00")
+
+    with pytest.raises(BookingConflict):
+        bookings.book("clubhouse", "R-1", "101", DAY, "18:00", "19:00", repeat_weeks=3)
+    assert len(bookings) == 1
+
+    created = bookings.book(
+        "clubhouse", "R-1", "101", DAY, "19:00", "20:00", repeat_weeks=3
+    )
+    assert [b.day.isoformat() for b in created] == [
+        "2026-11-07",
+        "2026-11-14",
+        "2026-11-21",
+        "2026-11-28",
+    ]
+    assert len({b.series_id for b in created}) == 1
+
+
+def test_free_slots_and_cancel():
+    bookings = make_bookings()
+    booking = bookings.book("clubhouse", "R-1", "101", DAY, "12:00", "14:00")[0]
+
+    free = bookings.free_slots("clubhouse", DAY, DAY)["free"][DAY.isoformat()]
+    assert free == [
+        {"start": "06:00", "end": "12:00"},
+        {"start": "14:00", "end": "23:00"},
+    ]
+
+    bookings.cancel(booking.booking_id)
+    free = bookings.free_slots("clubhouse", DAY, DAY)["free"][DAY.isoformat()]
+    assert free == [{"start": "06:00", "end": "23:00"}]
+
+
+def test_concurrent_bookings_never_overbook():
+    bookings = make_bookings()
+    results = []
+
+    def attempt(i):
+        try:
+            bookings.book("clubhouse", f"R-{i}", "100", DAY, "10:00", "11:00")
+            results.append(True)
+        except BookingConflict:
+            results.append(False)
+
+    threads = [threading.Thread(target=attempt, args=(i,)) for i in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results.count(True) == 1
+
+
+def test_invalid_and_past_times_are_rejected():
+    bookings = make_bookings()
+    for start, end in [("23:90", "23:30"), ("24:30", "25:00"), ("-1:00", "01:00")]:
+        with pytest.raises(BookingError):
+            bookings.book("fitness", "R-1", "101", DAY, start, end)
+    with pytest.raises(BookingError):
+        bookings.book("fitness", "R-1", "101", date(2026, 10, 18), "08:00", "09:00")
+    # The end of the day is "24:00"
+    bookings.book("fitness", "R-1", "101", TODAY, "23:00", "24:00")
+
+
+def test_workers_share_one_book(tmp_path):
+    path = str(tmp_path / "bookings.db")
+    first = make_bookings(path=path, scope="the-avant")
+    first.book("clubhouse", "R-1", "101", DAY, "18:00", "19:00")
+    if hasattr(os, "fork"):
+        # A forked worker reopens the file and sees the parent's bookings
+        pid = os.fork()
+        if pid == 0:
+            try:
+                first.book("clubhouse", "R-2", "102", DAY, "18:00", "19:00")
+                code = 1
+            except BookingConflict:
+                first.book("clubhouse", "R-2", "102", DAY, "19:00", "20:00")
+                code = 0
+            except BaseException:
+                code = 2
+            os._exit(code)
+        assert os.waitpid(pid, 0)[1] == 0
+
+    second = make_bookings(path=path, scope="the-avant")
+    with pytest.raises(BookingConflict):
+        second.book("clubhouse", "R-3", "103", DAY, "18:30", "19:30")
+    other_property = make_bookings(path=path, scope="the-elm")
+    other_property.book("clubhouse", "R-3", "103", DAY, "18:30", "19:30")
+    assert len(second) == (2 if hasattr(os, "fork") else 1)
+
+
+def test_booking_endpoints(tmp_path, monkeypatch):
+    book = make_bookings(path=str(tmp_path / "bookings.db"), scope="the-avant")
+    monkeypatch.setattr(elysia_engine, "bookings", lambda property_id=None: book)
+    client = TestClient(app)
+    payload = {
+        "resident_id": "R-1",
+        "unit_number": "304",
+        "amenity": "rooftop terrace",
+        "date": "2026-12-05",
+        "start_time": "17:00",
+        "end_time": "19:00",
+    }
+    r = client.post("/api/elysia/bookings", json=payload)
+    assert r.status_code == 201
+    booking = r.json()["bookings"][0]
+    assert booking["start_time"] == "17:00"
+
+    assert client.post("/api/elysia/bookings", json=payload).status_code == 409
+
+    r = client.get(
+        "/api/elysia/amenities/availability",
+        params={"amenity": "rooftop", "start": "2026-12-05", "end": "2026-12-06"},
+    )
+    assert r.status_code == 200
+    free = r.json()["free"]
+    assert {"start": "19:00", "end": "23:00"} in free["2026-12-05"]
+    assert free["2026-12-06"] == [{"start": "06:00", "end": "23:00"}]
+
+    url = f"/api/elysia/bookings/{booking['booking_id']}"
+    # Only the resident who booked can cancel
+    assert client.delete(url).status_code == 422
+    assert client.delete(url, params={"resident_id": "R-2"}).status_code == 404
+    r = client.delete(url, params={"resident_id": "R-1"})
+    assert r.status_code == 200
+    assert (
+        client.get(
+            "/api/elysia/amenities/availability",
+            params={"amenity": "sauna", "start": "2026-12-05"},
+        ).status_code
+        == 404
+    )
+
+
+def test_default_booking_db_is_private(tmp_path, monkeypatch):
+    import backend.elysia_lite as lite
+
+    monkeypatch.setattr(lite, "BOOKING_DB", None)
+    monkeypatch.setattr(lite, "BOOKING_DIR", str(tmp_path / "bookings"))
+    monkeypatch.setattr(lite.properties, "_derived", {})
+    book = lite.ElysiaLiteEngine().bookings("the-avant")
+    assert book.path == str(tmp_path / "bookings" / "bookings.db")
+    assert stat.S_IMODE(os.stat(tmp_path / "bookings").st_mode) == 0o700
@@ -0,0 +1,219 @@
+"""
+Tests for the adaptive concurrency limiter
+"""
+
+import asyncio
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.append("backend")
+
+from backend.concurrency import (
+    AdaptiveLimiter,
+    LimitExceeded,
+    LoadShedder,
+    parse_thresholds,
+)
+
+
+def run_saturated(limiter, latency_at, samples=2000):
+    """Closed loop that always fills the limit; latency_at(n) per generation"""
+    for _ in range(samples):
+        n = max(1, int(limiter.limit))
+        limiter.in_flight = n
+        limiter.release(latency_at(n))
+
+
+@pytest.mark.parametrize("algorithm", ["gradient", "aimd"])
+def test_limit_converges_near_backend_capacity(algorithm):
+    # Latency stays flat up to 12 parallel generations, then queues
+    capacity = 12
+    limiter = AdaptiveLimiter(algorithm, initial_limit=2)
+    run_saturated(limiter, lambda n: 0.1 * max(1, n / capacity))
+    assert capacity <= limiter.limit <= 2 * capacity
+    assert limiter.stats()["baseline_ms"] == 100.0
+
+
+@pytest.mark.parametrize("algorithm", ["gradient", "aimd"])
+def test_limit_shrinks_when_latency_inflates(algorithm):
+    limiter = AdaptiveLimiter(algorithm, initial_limit=32)
+    run_saturated(limiter, lambda n: 0.1, samples=20)
+    before = limiter.limit
+    # The backend slows down (e.g. a longer prompt mix) at the same load
+    run_saturated(limiter, lambda n: 0.4, samples=20)
+    assert limiter.limit < before / 2
+
+
+def test_idle_backend_does_not_grow_the_limit():
+    limiter = AdaptiveLimiter(initial_limit=8)
+    for _ in range(100):
+        limiter.in_flight = 1
+        limiter.release(0.1)
+    assert limiter.limit == 8
+
+
+def test_waiters_are_served_in_order_and_time_out():
+    async def scenario():
+        limiter = AdaptiveLimiter(initial_limit=1)
+        order = []
+
+        async def request(name, timeout=None):
+            async with limiter.slot(timeout):
+                order.append(name)
+                await asyncio.sleep(0.02)
+
+        first = asyncio.create_task(request("a"))
+        await asyncio.sleep(0)
+        rest = [asyncio.create_task(request(name)) for name in "bcd"]
+        await asyncio.sleep(0)
+        assert limiter.in_flight == 1 and limiter.queued == 3
+        with pytest.raises(LimitExceeded):
+            await request("late", timeout=0.01)
+        await asyncio.gather(first, *rest)
+        return limiter, order
+
+    limiter, order = asyncio.run(scenario())
+    assert order == ["a", "b", "c", "d"]
+    assert limiter.in_flight == 0 and limiter.queued == 0
+    assert limiter.metrics["timeouts"] == 1
+
+
+def test_failed_generation_backs_off():
+    async def scenario():
+        limiter = AdaptiveLimiter(initial_limit=10)
+        with pytest.raises(asyncio.TimeoutError):
+            async with limiter.slot():
+                raise asyncio.TimeoutError
+        return limiter
+
+    limiter = asyncio.run(scenario())
+    assert limiter.limit == 9 and limiter.in_flight == 0
+    assert limiter.metrics["dropped"] == 1
+
+
+def test_engine_limits_llm_backends_and_reports_the_limit(monkeypatch):
+    from backend.deadline import Deadline
+    from backend.elysia_lite import RequestType, ResidentRequest, app, elysia_engine
+    from backend.routing import RouteDecision
+
+    class SlowLLM:
+        error_count = 0
+
+        async def generate_response(self, request, deadline=None):
+            await asyncio.sleep(0.05)
+            return "llm answer"
+
+    original = elysia_engine.router.backends
+    elysia_engine.router.backends = {"llamacpp": SlowLLM(), **original}
+    elysia_engine.limiters["llamacpp"] = AdaptiveLimiter(initial_limit=1)
+    request = ResidentRequest(
+        resident_id="R-1",
+        unit_number="304",
+        request_type=RequestType.MAINTENANCE,
+        message="The dishwasher is leaking onto the floor",
+    )
+
+    async def scenario():
+        async def one(budget):
+            return await elysia_engine._generate(request, Deadline.after(budget))
+
+        return await asyncio.gather(one(5), one(0.02))
+
+    monkeypatch.setattr(
+        elysia_engine.router,
+        "choose",
+        lambda request, deadline: RouteDecision("llamacpp", "test", "complex"),
+    )
+    try:
+        (text, decision), (late_text, late_decision) = asyncio.run(scenario())
+        assert text == "llm answer" and decision.backend == "llamacpp"
+        # The second request could not get a slot before its deadline
+        assert late_decision.backend == "mock"
+        assert late_decision.reason == "llamacpp concurrency limit"
+        health = TestClient(app).get("/health").json()
+        assert health["concurrency"]["llamacpp"]["timeouts"] == 1
+    finally:
+        elysia_engine.router.backends = original
+        elysia_engine.limiters.pop("llamacpp", None)
+
+
+def test_estimated_wait_and_shedding_thresholds():
+    limiter = AdaptiveLimiter(initial_limit=4)
+    assert limiter.estimated_wait() == 0
+    limiter.short_rtt = limiter.long_rtt = 8.0
+    limiter.in_flight = 4
+    # Full limit, nobody queued yet: the next slot frees in ~8s / 4
+    assert limiter.estimated_wait() == 2.0
+
+    shedder = LoadShedder(parse_thresholds("low=1, medium=5"))
+    assert shedder.check("low", limiter) == 2.0
+    assert shedder.check("medium", limiter) == 0
+    assert shedder.check("emergency", limiter) == 0
+    with pytest.raises(ValueError):
+        parse_thresholds("low")
+
+
+def test_overloaded_engine_degrades_low_priority_first(monkeypatch):
+    from backend.deadline import Deadline
+    from backend.elysia_lite import (
+        Priority,
+        RequestType,
+        ResidentRequest,
+        app,
+        elysia_engine,
+    )
+    from backend.routing import RouteDecision
+
+    class BusyLLM:
+        error_count = 0
+
+        async def generate_response(self, request, deadline=None):
+            raise AssertionError("a saturated backend should not be called")
+
+    # Every slot taken and generations take 20s: ~5s queue for newcomers
+    limiter = AdaptiveLimiter(initial_limit=4)
+    limiter.short_rtt = limiter.long_rtt = 20.0
+    limiter.in_flight = 4
+    original = elysia_engine.router.backends
+    elysia_engine.router.backends = {"llamacpp": BusyLLM(), **original}
+    elysia_engine.limiters["llamacpp"] = limiter
+    monkeypatch.setattr(
+        elysia_engine.router,
+        "choose",
+        lambda request, deadline: RouteDecision("llamacpp", "test", "complex"),
+    )
+    monkeypatch.setattr(
+        elysia_engine, "shedder", LoadShedder({"low": 2, "medium": 5, "high": 10})
+    )
+
+    def request(priority):
+        return ResidentRequest(
+            resident_id="R-1",
+            unit_number="304",
+            request_type=RequestType.MAINTENANCE,
+            message="The dishwasher is leaking onto the floor",
+            priority=priority,
+        )
+
+    async def scenario():
+        low = await elysia_engine.process_request(request(Priority.LOW))
+        # Not shed, but the queue outlasts its short deadline
+        _, urgent = await elysia_engine._generate(
+            request(Priority.URGENT), Deadline.after(0.02)
+        )
+        return low, urgent
+
+    try:
+        low, urgent = asyncio.run(scenario())
+        assert low.degraded and low.response
+        assert elysia_engine.active_requests[low.request_id]["routing"]["degraded"]
+        assert urgent.degraded and urgent.reason == "llamacpp concurrency limit"
+        limiter.in_flight = 0
+        shedding = TestClient(app).get("/health").json()["load_shedding"]
+        assert shedding["by_reason"] == {"shed": 1, "concurrency_limit": 1}
+        assert shedding["by_priority"] == {"low": 1, "urgent": 1}
+    finally:
+        elysia_engine.router.backends = original
+        elysia_engine.limiters.pop("llamacpp", None)
@@ -0,0 +1,173 @@
+import asyncio
+import sys
+import time
+
+sys.path.append("backend")
+from backend.deadline import DEADLINE_HEADER, Deadline, DeadlineExceeded
+from backend.elysia_lite import (
+    ElysiaLiteEngine,
+    HostedBloomAI,
+    LlamaCppAI,
+    RequestType,
+    ResidentRequest,
+)
+
+
+def _request(request_type=RequestType.MAINTENANCE, message="My faucet is leaking"):
+    return ResidentRequest(
+        resident_id="T1",
+        unit_number="100",
+        request_type=request_type,
+        message=message,
+    )
+
+
+def test_deadline_from_headers_is_capped_by_config():
+    deadline = Deadline.from_headers({DEADLINE_HEADER: "2000"}, 25.0, margin=0.5)
+    assert 1.0 < deadline.remaining() <= 1.5
+
+    deadline = Deadline.from_headers({DEADLINE_HEADER: "600000"}, 3.0)
+    assert deadline.remaining() <= 3.0
+
+    deadline = Deadline.from_headers({DEADLINE_HEADER: "bogus"}, 3.0)
+    assert 2.0 < deadline.remaining() <= 3.0
+
+
+def test_deadline_cancel_expires_immediately():
+    deadline = Deadline.after(60)
+    assert not deadline.expired()
+    deadline.cancel()
+    assert deadline.expired()
+    assert deadline.remaining() == 0.0
+
+
+class SlowAI:
+    async def generate_response(self, request, deadline=None):
+        await asyncio.sleep(5)
+        return "too late"
+
+
+def test_engine_answers_with_fallback_when_backend_overruns():
+    engine = ElysiaLiteEngine()
+    engine.ai = SlowAI()
+
+    started = time.perf_counter()
+    response = asyncio.run(
+        engine.process_request(_request(), deadline=Deadline.after(0.1))
+    )
+    assert time.perf_counter() - started < 2
+    assert "water-related issue" in response.response
+
+
+class FakeStreamingLlama:
+    def __init__(self, tokens, delay):
+        self.tokens = tokens
+        self.delay = delay
+        self.emitted = 0
+
+    def n_ctx(self):
+        return 2048
+
+    def tokenize(self, text, add_bos=True):
+        return text.split()
+
+    def detokenize(self, tokens):
+        return b" ".join(tokens)
+
+    def create_chat_completion(self, **kwargs):
+        assert kwargs["stream"] is True
+
+        def stream():
+            for token in self.tokens:
+                time.sleep(self.delay)
+                self.emitted += 1
+                yield {"choices": [{"delta": {"content": token}}]}
+
+        return stream()
+
+
+def test_llamacpp_stops_at_token_boundary_and_returns_partial():
+    model = FakeStreamingLlama(["Hello", " there", "!"] * 50, delay=0.02)
+    adapter = LlamaCppAI(model)
+
+    result = asyncio.run(
+        adapter.generate_response(_request(), deadline=Deadline.after(0.15))
+    )
+    assert result.startswith("Hello")
+    assert 0 < model.emitted < 150
+
+
+def test_llamacpp_raises_when_no_time_left():
+    adapter = LlamaCppAI(FakeStreamingLlama(["Hi"], delay=0))
+    deadline = Deadline.after(0)
+
+    try:
+        asyncio.run(adapter.generate_response(_request(), deadline=deadline))
+    except DeadlineExceeded:
+        pass
+    else:
+        raise AssertionError("expected DeadlineExceeded")
+
+
+def test_hosted_call_is_abandoned_at_deadline(monkeypatch):
+    class DummyResponse:
+        def raise_for_status(self):
+            return None
+
+        def json(self):
+            return [{"generated_text": "late"}]
+
+    def slow_post(url, headers=None, json=None, timeout=60):
+        time.sleep(0.5)
+        return DummyResponse()
+
+    monkeypatch.setattr("requests.post", slow_post)
+    adapter = HostedBloomAI("fake-key", "fake/model")
+    adapter.hedge_enabled = False
+
+    async def timed():
+        started = time.perf_counter()
+        result = await adapter.generate_response(
+            _request(), deadline=Deadline.after(0.05)
+        )
+        return result, time.perf_counter() - started
+
+    result, elapsed = asyncio.run(timed())
+    assert elapsed < 0.4
+    assert "water-related issue" in result
+    # Running out of request time is not held against the hosted API
+    assert len(adapter.breaker.outcomes) == 0
+
+
+def test_concierge_endpoint_passes_the_header_deadline(tmp_path, monkeypatch):
+    # The engine logs to a file in the working directory
+    monkeypatch.chdir(tmp_path)
+    from fastapi.testclient import TestClient
+
+    from backend import elysia_concierge
+
+    class TimedModel:
+        tokenizer = None
+        max_times = []
+
+        async def chat_completion(self, prompt, max_time=None, **kwargs):
+            self.max_times.append(max_time)
+            return {"choices": [{"message": {"content": "On it!"}}]}
+
+    model = TimedModel()
+    engine = elysia_concierge.ElysiaConciergeEngine(model, elysia_concierge.properties)
+    monkeypatch.setattr(elysia_concierge, "_engine", engine)
+    monkeypatch.setattr(elysia_concierge, "DEADLINE_MARGIN", 0.5)
+
+    r = TestClient(elysia_concierge.app).post(
+        "/api/elysia/request",
+        json={
+            "resident_id": "T1",
+            "unit_number": "100",
+            "request_type": "general_inquiry",
+            "message": "When does the pool open?",
+        },
+        headers={DEADLINE_HEADER: "2000"},
+    )
+    assert r.status_code == 200
+    assert 0 < model.max_times[0] <= 1.5
@@ -41,5 +41,78 @@ def test_hosted_adapter_monkeypatch(monkeypatch):
     # run the coroutine
     import asyncio
 
-    result = asyncio.get_event_loop().run_until_complete(adapter.generate_response(req))
+    result = asyncio.run(adapter.generate_response(req))
     assert "Hello from hosted HF adapter" in result
+
+
+def _request():
+    return ResidentRequest(
+        resident_id="T1",
+        unit_number="100",
+        request_type=RequestType.MAINTENANCE,
+        message="My faucet is leaking",
+    )
+
+
+def test_hosted_adapter_hedges_slow_call(monkeypatch):
+    import threading
+    import time
+
+    calls = []
+    lock = threading.Lock()
+
+    def slow_then_fast_post(url, headers=None, json=None, timeout=60):
+        with lock:
+            calls.append(time.perf_counter())
+            first = len(calls) == 1
+        if first:
+            time.sleep(0.5)
+            return DummyResponse([{"generated_text": "slow"}])
+        return DummyResponse([{"generated_text": "fast"}])
+
+    monkeypatch.setattr("requests.post", slow_then_fast_post)
+    adapter = HostedBloomAI("fake-key", "fake/model")
+    adapter.hedge_delay = 0.05
+
+    import asyncio
+
+    result = asyncio.run(adapter.generate_response(_request()))
+    assert result == "fast"
+    assert len(calls) == 2
+
+
+def test_hosted_adapter_falls_back_and_trips_breaker(monkeypatch):
+    def failing_post(url, headers=None, json=None, timeout=60):
+        raise ConnectionError("upstream unavailable")
+
+    monkeypatch.setattr("requests.post", failing_post)
+    adapter = HostedBloomAI("fake-key", "fake/model")
+    adapter.hedge_enabled = False
+
+    import asyncio
+
+    for _ in range(adapter.breaker.min_calls):
+        result = asyncio.run(adapter.generate_response(_request()))
+        # Residents get the mock concierge answer, never a raw error string
+        assert "Hosted BLOOM error" not in result
+        assert "water-related issue" in result
+
+    assert adapter.breaker.state == adapter.breaker.OPEN
+    assert adapter.stats()["circuit"]["state"] == "open"
+
+
+def test_hosted_adapter_treats_error_payload_as_failure(monkeypatch):
+    monkeypatch.setattr(
+        "requests.post",
+        lambda url, headers=None, json=None, timeout=60: DummyResponse(
+            {"error": "Model is currently loading"}
+        ),
+    )
+    adapter = HostedBloomAI("fake-key", "fake/model")
+    adapter.hedge_enabled = False
+
+    import asyncio
+
+    result = asyncio.run(adapter.generate_response(_request()))
+    assert "Model is currently loading" not in result
+    assert adapter.breaker.outcomes[-1][0] is False
@@ -0,0 +1,45 @@
+"""
+Startup budget: importing an app must stay cheap and free of ML frameworks
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+BACKEND = os.path.join(os.path.dirname(os.path.dirname(__file__)), "backend")
+
+# Cumulative import time of the app module, in microseconds. FastAPI and
+# pydantic alone account for most of it on a cold interpreter.
+IMPORT_BUDGET_US = 1_200_000
+
+# Loaded by model backends on demand, never at import
+HEAVY_MODULES = {"torch", "transformers", "llama_cpp", "whisper"}
+
+
+def import_times(module):
+    """Per-module cumulative import time (us) from `python -X importtime`"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND,
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+@pytest.mark.parametrize("module", ["elysia_concierge", "elysia_lite"])
+def test_app_import_stays_within_budget(module):
+    times = import_times(module)
+    assert times[module] < IMPORT_BUDGET_US, f"{module}: {times[module]} us"
+    assert not HEAVY_MODULES & times.keys()
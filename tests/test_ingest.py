@@ -0,0 +1,86 @@
+"""
+Tests for fast request body decoding
+"""
+
+import json
+import sys
+
+import pytest
+from fastapi import APIRouter, FastAPI, Request, Response
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+
+sys.path.append("backend")
+
+from backend.elysia_lite import submit_request
+from backend.ingest import FastBodyRoute
+
+VALID = {
+    "resident_id": "R-1",
+    "unit_number": "304",
+    "request_type": "community_info",
+    "message": "Where is the pool?",
+    "priority": "low",
+}
+
+BAD_BODIES = [
+    ("application/json", b'{"resident_id": "R-1",'),
+    ("application/json", b""),
+    ("application/json", b"[]"),
+    ("application/json", b'{"resident_id": 1}'),
+    ("application/json", json.dumps({**VALID, "request_type": "pizza"}).encode()),
+    ("application/json", json.dumps({**VALID, "timestamp": "yesterday"}).encode()),
+    ("text/plain", json.dumps(VALID).encode()),
+    ("application/x-www-form-urlencoded", b"resident_id=R-1"),
+]
+
+
+def make_app(route_class):
+    router = APIRouter(route_class=route_class)
+    router.post("/api/elysia/request")(submit_request)
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app)
+
+
+def test_invalid_bodies_get_identical_errors():
+    default, fast = make_app(APIRoute), make_app(FastBodyRoute)
+    for content_type, body in BAD_BODIES:
+        headers = {"Content-Type": content_type}
+        expected = default.post("/api/elysia/request", content=body, headers=headers)
+        got = fast.post("/api/elysia/request", content=body, headers=headers)
+        assert expected.status_code in (400, 422)
+        assert (got.status_code, got.content) == (
+            expected.status_code,
+            expected.content,
+        ), body
+
+
+def test_valid_body_is_answered_like_the_default_route():
+    default, fast = make_app(APIRoute), make_app(FastBodyRoute)
+    body = {**VALID, "message": "When is the next community event?"}
+    expected = default.post("/api/elysia/request", json=body)
+    got = fast.post("/api/elysia/request", json=body)
+    assert got.status_code == expected.status_code == 200
+    assert got.headers["content-type"] == expected.headers["content-type"]
+    assert got.headers["x-elysia-backend"] == expected.headers["x-elysia-backend"]
+    # Same answer (cached), only the request ID differs
+    fields = set(expected.json()) - {"request_id"}
+    assert {k: got.json()[k] for k in fields} == {k: expected.json()[k] for k in fields}
+    assert set(fast.app.openapi()["paths"]) == set(default.app.openapi()["paths"])
+
+
+def test_unsupported_endpoints_are_rejected():
+    router = APIRouter(route_class=FastBodyRoute)
+
+    async def with_query(data: dict, limit: int = 10) -> dict:
+        return data
+
+    with pytest.raises(ValueError):
+        router.post("/x")(with_query)
+
+    def sync(http_request: Request, http_response: Response) -> dict:
+        return {}
+
+    with pytest.raises(ValueError):
+        router.post("/y")(sync)
@@ -0,0 +1,81 @@
+"""
+Tests for BM25 retrieval over property knowledge
+"""
+
+import sys
+
+sys.path.append("backend")
+
+from backend.elysia_lite import (
+    RequestType,
+    ResidentRequest,
+    PROMPT_TOKEN_BUDGET,
+    format_turn,
+    knowledge_context,
+    properties,
+    request_prompt,
+)
+from backend.knowledge import BM25Index, property_snippets, tokenize
+
+THE_AVANT_KNOWLEDGE = properties.get("the-avant").knowledge
+
+
+def make_index():
+    return BM25Index(property_snippets(THE_AVANT_KNOWLEDGE))
+
+
+def test_tokenize_drops_stopwords_and_plurals():
+    assert tokenize("When are the Pools open?") == ["when", "pool", "open"]
+
+
+def test_snippets_cover_every_section():
+    sections = {snippet.section for snippet in property_snippets(THE_AVANT_KNOWLEDGE)}
+    assert sections == set(THE_AVANT_KNOWLEDGE)
+
+
+def test_pool_hours_ranks_pool_first():
+    results = make_index().search("What time does the pool close?", k=3)
+    assert "Swimming Pool" in results[0][0].text
+
+
+def test_resident_vocabulary_is_expanded():
+    results = make_index().search("Is the gym busy in the morning?", k=1)
+    assert "Fitness Center" in results[0][0].text
+
+
+def test_emergency_contacts_found():
+    texts = [s.text for s, _ in make_index().search("emergency security", k=3)]
+    assert any("303-555-SECURITY" in text for text in texts)
+
+
+def test_unrelated_query_returns_nothing():
+    assert make_index().search("xylophone quantum", k=3) == []
+
+
+def test_prompt_carries_only_relevant_facts():
+    request = ResidentRequest(
+        resident_id="R-1",
+        unit_number="304",
+        request_type=RequestType.COMMUNITY_INFO,
+        message="Any good restaurants for dinner?",
+    )
+    context = knowledge_context(request)
+    assert "Centennial Promenade restaurants" in context
+    assert "EV Charging Stations" not in context
+    # History keeps the bare turn; facts are added per request
+    assert "Property facts" not in format_turn(request)
+
+
+def test_completion_prompt_stays_within_budget():
+    request = ResidentRequest(
+        resident_id="R-1",
+        unit_number="304",
+        request_type=RequestType.COMMUNITY_INFO,
+        message="Any good restaurants for dinner? " + "Please answer soon. " * 400,
+    )
+    prompt = request_prompt(request)
+    assert len(prompt.split()) <= PROMPT_TOKEN_BUDGET
+    # Facts go first; the framing and the start of the message are kept
+    assert "Property facts" not in prompt
+    assert "Any good restaurants for dinner?" in prompt
+    assert prompt.endswith("Unit: 304\nReply as a luxury apartment concierge.")
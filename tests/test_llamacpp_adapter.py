@@ -38,6 +38,9 @@ def test_llamacpp_adapter_monkeypatch():
     # Mock llama model
     mock_llama = Mock()
     mock_llama.create_chat_completion.return_value = mock_response
+    mock_llama.n_ctx.return_value = 2048
+    mock_llama.tokenize.side_effect = lambda text, add_bos=True: text.split()
+    mock_llama.detokenize.side_effect = lambda tokens: b" ".join(tokens)
 
     try:
         with patch("llama_cpp.Llama.from_pretrained", return_value=mock_llama):
@@ -63,9 +66,7 @@ def test_llamacpp_adapter_monkeypatch():
             )
 
             # Test the adapter
-            result = asyncio.get_event_loop().run_until_complete(
-                adapter.generate_response(req)
-            )
+            result = asyncio.run(adapter.generate_response(req))
 
             # Verify response
             assert "maintenance concern" in result
@@ -98,6 +99,11 @@ def test_llamacpp_error_handling():
     # Mock a failing model
     mock_llama = Mock()
     mock_llama.create_chat_completion.side_effect = Exception("Model loading failed")
+    mock_llama.n_ctx.return_value = 2048
+    mock_llama.tokenize.side_effect = lambda text, add_bos=True: text.split()
+    mock_llama.detokenize.side_effect = lambda tokens: b" ".join(tokens)
+
+    from routing import BackendError
 
     from elysia_lite import LlamaCppAI, Priority, RequestType, ResidentRequest
 
@@ -111,13 +117,10 @@ def test_llamacpp_error_handling():
         priority=Priority.LOW,
     )
 
-    # Test error handling
-    result = asyncio.get_event_loop().run_until_complete(adapter.generate_response(req))
-
-    # Should contain error message but still be helpful
-    assert "technical difficulties" in result.lower()
-    assert "management office" in result.lower()
-    assert "[LlamaCpp error:" in result
+    # Errors are raised for the engine to fall back, never returned as text
+    with pytest.raises(BackendError, match="Model loading failed"):
+        asyncio.run(adapter.generate_response(req))
+    assert adapter.error_count == 1
 
 
 @pytest.mark.skipif(not LLAMA_CPP_AVAILABLE, reason="llama-cpp-python not installed")
@@ -133,6 +136,9 @@ def test_llamacpp_engine_selection():
         os.environ["ELYSIA_USE_LLAMACPP"] = "true"
 
         mock_llama = Mock()
+        mock_llama.n_ctx.return_value = 2048
+        mock_llama.tokenize.side_effect = lambda text, add_bos=True: text.split()
+        mock_llama.detokenize.side_effect = lambda tokens: b" ".join(tokens)
         with patch("llama_cpp.Llama.from_pretrained", return_value=mock_llama):
             import importlib
 
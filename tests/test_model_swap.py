@@ -0,0 +1,184 @@
+"""
+Tests for zero-downtime model swaps
+"""
+
+import asyncio
+import sys
+import time
+
+from fastapi.testclient import TestClient
+
+sys.path.append("backend")
+
+from backend.elysia_lite import (
+    LlamaCppAI,
+    RequestType,
+    ResidentRequest,
+    app,
+    elysia_engine,
+)
+from backend.model_swap import InFlight, ModelSwapper
+from backend.routing import BackendRouter
+from backend.sessions import SessionStore
+
+
+class FakeLLM:
+    def __init__(self, name, delay=0.0, broken=False):
+        self.name = name
+        self.delay = delay
+        self.broken = broken
+        self.error_count = 0
+        self.closed_at = None
+
+    async def generate_response(self, request, deadline=None):
+        await asyncio.sleep(self.delay)
+        if self.broken:
+            self.error_count += 1
+            return "[error: weights corrupt]"
+        return f"{self.name} answer"
+
+    def close(self):
+        self.closed_at = time.monotonic()
+
+
+async def canary(backend):
+    errors = backend.error_count
+    text = await backend.generate_response(None)
+    if backend.error_count != errors:
+        raise RuntimeError(text)
+    return text
+
+
+def make_swapper(old):
+    router = BackendRouter({"llamacpp": old, "mock": FakeLLM("mock")})
+    in_flight = InFlight()
+    swapper = ModelSwapper(router.replace, canary, in_flight, drain_timeout=5)
+    return router, in_flight, swapper
+
+
+def test_in_flight_requests_finish_on_old_model_before_it_is_freed():
+    old, new = FakeLLM("old", delay=0.2), FakeLLM("new")
+    router, in_flight, swapper = make_swapper(old)
+
+    async def request():
+        backend = router.backends["llamacpp"]
+        with in_flight.track(backend):
+            return await backend.generate_response(None), time.monotonic()
+
+    async def scenario():
+        running = asyncio.create_task(request())
+        await asyncio.sleep(0.01)
+        swapper.start("llamacpp", "new.gguf", lambda: new)
+        await asyncio.sleep(0.05)
+        # Switched while the old request is still generating
+        assert router.backends["llamacpp"] is new
+        assert old.closed_at is None
+        answer, finished_at = await running
+        record = await swapper.wait()
+        return answer, finished_at, record
+
+    answer, finished_at, record = asyncio.run(scenario())
+    assert answer == "old answer"
+    assert old.closed_at >= finished_at
+    assert record.state == "complete"
+    assert record.canary == "new answer"
+    assert set(record.timings_ms) == {"loading", "canary", "draining"}
+    assert list(router.backends) == ["llamacpp", "mock"]
+
+
+def test_failed_canary_keeps_the_old_model():
+    old, broken = FakeLLM("old"), FakeLLM("new", broken=True)
+    router, _, swapper = make_swapper(old)
+
+    async def scenario():
+        swapper.start("llamacpp", "bad.gguf", lambda: broken)
+        return await swapper.wait()
+
+    record = asyncio.run(scenario())
+    assert record.state == "failed"
+    assert "weights corrupt" in record.error
+    assert router.backends["llamacpp"] is old
+    assert broken.closed_at is not None and old.closed_at is None
+
+
+def test_failed_load_is_reported():
+    router, _, swapper = make_swapper(FakeLLM("old"))
+
+    def load():
+        raise FileNotFoundError("missing.gguf")
+
+    async def scenario():
+        swapper.start("llamacpp", "missing.gguf", load)
+        return await swapper.wait()
+
+    record = asyncio.run(scenario())
+    assert record.state == "failed"
+    assert record.error.startswith("FileNotFoundError")
+
+
+def test_kv_state_from_another_model_is_not_loaded(tmp_path):
+    class Model:
+        loaded = []
+
+        def n_ctx(self):
+            return 2048
+
+        def tokenize(self, text, add_bos=True):
+            return text.split()
+
+        def detokenize(self, tokens):
+            return b" ".join(tokens)
+
+        def load_state(self, state):
+            self.loaded.append(state)
+
+        def save_state(self):
+            return type("State", (), {"llama_state_size": 1})()
+
+    store = SessionStore(spill_dir=str(tmp_path))
+    store.save_state(store.get("R-1"), "old-kv", 10, owner="llamacpp-old")
+    adapter = LlamaCppAI(Model(), sessions=store)
+    request = ResidentRequest(
+        resident_id="R-1",
+        unit_number="304",
+        request_type=RequestType.MAINTENANCE,
+        message="still leaking",
+    )
+    adapter._chat(request, lambda messages: "ok")
+    assert Model.loaded == []
+
+
+def test_admin_endpoint_swaps_model(monkeypatch):
+    import backend.elysia_lite as lite
+
+    new = FakeLLM("new")
+    original = elysia_engine.router.backends
+    monkeypatch.setattr(
+        elysia_engine, "backend_loader", lambda name, model, filename: lambda: new
+    )
+    body = {"backend": "llamacpp", "filename": "Elysia-Q4_K_M.gguf"}
+    try:
+        with TestClient(app) as client:
+            monkeypatch.setattr(lite, "ADMIN_TOKEN", "")
+            assert client.post("/api/elysia/admin/models", json=body).status_code == 404
+            monkeypatch.setattr(lite, "ADMIN_TOKEN", "s3cret")
+            r = client.post(
+                "/api/elysia/admin/models",
+                json=body,
+                headers={"X-Elysia-Admin-Token": "wrong"},
+            )
+            assert r.status_code == 403
+
+            headers = {"X-Elysia-Admin-Token": "s3cret"}
+            r = client.post("/api/elysia/admin/models", json=body, headers=headers)
+            assert r.status_code == 202
+            assert r.json()["model"] == "Elysia-Q4_K_M.gguf"
+            for _ in range(100):
+                status = client.get("/api/elysia/admin/models", headers=headers).json()
+                if not status["busy"]:
+                    break
+                time.sleep(0.02)
+            assert status["current"]["state"] == "complete"
+            assert elysia_engine.router.backends["llamacpp"] is new
+    finally:
+        elysia_engine.router.backends = original
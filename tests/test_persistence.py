@@ -0,0 +1,195 @@
+"""
+Tests for the PostgreSQL write-behind persistence layer
+"""
+
+import asyncio
+import os
+import sys
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+sys.path.append("backend")
+
+from backend.elysia_lite import (
+    ElysiaLiteEngine,
+    RequestType,
+    ResidentRequest,
+    persisted_request,
+)
+from backend.persistence import PersistedRequest, RequestPersistence
+
+
+class NullPool:
+    async def close(self):
+        pass
+
+
+class RecordingPersistence(RequestPersistence):
+    """Writer whose "database" is a list; can be made slow or failing"""
+
+    def __init__(self, delay=0.0, failures=0, **kwargs):
+        kwargs.setdefault("retry_backoff", 0.01)
+        super().__init__("postgresql://unused", **kwargs)
+        self.delay = delay
+        self.failures = failures
+        self.batches = []
+
+    async def _connect(self):
+        self.pool = NullPool()
+
+    async def _write(self, batch):
+        await asyncio.sleep(self.delay)
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("database restarting")
+        self.batches.append([r.request_id for r in batch])
+
+
+def make_record(i, resident_id="R-1", when=None):
+    return PersistedRequest(
+        request_id=f"AVT-TEST-{i:04d}",
+        resident_id=resident_id,
+        unit_number="304",
+        request_type="general_inquiry",
+        priority="medium",
+        status="active",
+        message=f"question {i}",
+        response=f"answer {i}",
+        backend="mock",
+        ticket_id=None,
+        escalation_required=False,
+        latency_ms=1.5,
+        created_at=when or datetime.now(timezone.utc),
+        payload={"i": i},
+    )
+
+
+def test_concurrent_writes_are_group_committed():
+    async def scenario():
+        db = RecordingPersistence(delay=0.01, flush_interval=0.02, batch_size=50)
+        await db.start()
+        for i in range(120):
+            assert db.enqueue(make_record(i))
+        assert await db.flush(5)
+        await db.stop()
+        return db
+
+    db = asyncio.run(scenario())
+    assert sum(len(batch) for batch in db.batches) == 120
+    assert len(db.batches) <= 5
+    assert max(len(batch) for batch in db.batches) == 50
+    assert db.stats()["avg_batch_size"] >= 24
+
+
+def test_slow_database_fills_bounded_queue_then_drops():
+    async def scenario():
+        db = RecordingPersistence(delay=0.2, batch_size=5, max_queue=10)
+        await db.start()
+        accepted = [db.enqueue(make_record(i)) for i in range(30)]
+        await db.stop(timeout=2)
+        return db, accepted
+
+    db, accepted = asyncio.run(scenario())
+    # Enqueueing never blocks the caller; overflow is counted, not awaited
+    assert accepted.count(True) == 10
+    assert db.stats()["dropped"] == 20
+
+
+def test_failed_batches_are_retried_not_lost():
+    async def scenario():
+        db = RecordingPersistence(failures=2)
+        await db.start()
+        for i in range(3):
+            db.enqueue(make_record(i))
+        assert await db.flush(5)
+        await db.stop()
+        return db
+
+    db = asyncio.run(scenario())
+    assert [rid for batch in db.batches for rid in batch] == [
+        f"AVT-TEST-{i:04d}" for i in range(3)
+    ]
+    assert db.stats()["errors"] == 2
+
+
+def test_engine_record_maps_to_row():
+    engine = ElysiaLiteEngine()
+    request = ResidentRequest(
+        resident_id="R-7",
+        unit_number="512",
+        request_type=RequestType.MAINTENANCE,
+        message="Oven won't heat",
+    )
+    response = asyncio.run(engine.process_request(request))
+    row = persisted_request(
+        response.request_id, engine.active_requests[response.request_id]
+    )
+
+    assert row.request_type == "maintenance"
+    assert row.ticket_id == response.ticket_id
+    assert row.created_at.tzinfo is not None
+    values = row.as_row()
+    assert len(values) == 14
+    assert '"unit_number": "512"' in values[-1]
+
+
+def test_workers_with_the_same_sequence_get_distinct_ids(monkeypatch):
+    import backend.elysia_lite as lite
+
+    monkeypatch.setattr(lite, "PERSISTENCE_ENABLED", True)
+    # Two prefork workers (or one recycled worker) with their own counters
+    workers = [ElysiaLiteEngine(), ElysiaLiteEngine()]
+    ids = []
+    for i, worker in enumerate(workers):
+        request = ResidentRequest(
+            resident_id=f"R-{i}",
+            unit_number="304",
+            request_type=RequestType.GENERAL_INQUIRY,
+            message="Is the rooftop open tonight?",
+        )
+        ids.append(asyncio.run(worker.process_request(request)).request_id)
+    day = datetime.now().strftime("%Y%m%d")
+    assert all(rid.startswith(f"AVT-{day}-0001-") for rid in ids)
+    assert ids[0] != ids[1]
+
+
+@pytest.mark.integration
+def test_round_trip_against_postgres():
+    pytest.importorskip("asyncpg")
+    dsn = os.environ.get("TEST_DATABASE_URL")
+    if not dsn:
+        pytest.skip("TEST_DATABASE_URL not set")
+
+    async def scenario():
+        db = RequestPersistence(dsn, pool_size=2, flush_interval=0.01)
+        await db.start()
+        resident = f"R-{uuid.uuid4().hex[:8]}"
+        start = datetime.now(timezone.utc)
+        for i in range(5):
+            record = make_record(i, resident, start + timedelta(seconds=i))
+            record.request_id = f"{resident}-{i}"
+            db.enqueue(record)
+        for _ in range(100):
+            if db.pool is not None:
+                break
+            await asyncio.sleep(0.05)
+        assert await db.flush(10)
+        # A clashing ID never overwrites the stored request
+        clash = make_record(9, "R-other", start)
+        clash.request_id = f"{resident}-0"
+        db.enqueue(clash)
+        assert await db.flush(10)
+
+        stored = await db.get(f"{resident}-0")
+        newest = await db.history(resident, limit=2)
+        older = await db.history(resident, limit=10, before=newest[-1]["created_at"])
+        await db.stop()
+        return resident, stored, newest, older
+
+    resident, stored, newest, older = asyncio.run(scenario())
+    assert stored["message"] == "question 0"
+    assert stored["resident_id"] == resident
+    assert [r["request_id"] for r in newest] == [f"{resident}-4", f"{resident}-3"]
+    assert len(older) == 3
@@ -0,0 +1,97 @@
+import mmap
+import os
+import signal
+import sys
+import tempfile
+import time
+
+import pytest
+
+sys.path.append("backend")
+from backend.prefork import (
+    CrashLoop,
+    fork_worker,
+    measure_sharing,
+    memory_usage,
+    supervise,
+)
+
+pytestmark = pytest.mark.skipif(
+    not os.path.exists("/proc/self/smaps_rollup") or not hasattr(os, "fork"),
+    reason="needs Linux /proc smaps_rollup and fork",
+)
+
+MODEL_BYTES = 64 * 1024 * 1024
+MIB = 1024 * 1024
+
+
+def _touch_every_page(buffer):
+    # Read one byte per page, like a forward pass reading all weights
+    return sum(buffer[i] for i in range(0, len(buffer), 4096))
+
+
+def test_memory_usage_reports_current_process():
+    usage = memory_usage()
+    assert usage["rss"] > 0
+    assert usage["uss"] <= usage["rss"]
+
+
+def test_mmapped_weights_add_near_constant_memory_per_worker():
+    with tempfile.TemporaryFile() as weights:
+        weights.truncate(MODEL_BYTES)
+
+        def load():
+            # Same access pattern as llama-cpp with use_mmap=True
+            return mmap.mmap(weights.fileno(), MODEL_BYTES, prot=mmap.PROT_READ)
+
+        report = measure_sharing(load, _touch_every_page, workers=3)
+
+    # Every worker maps the full model but owns only a few MiB privately
+    assert all(rss > MODEL_BYTES for rss in report["worker_rss"])
+    assert all(uss < 24 * MIB for uss in report["worker_uss"])
+    assert max(report["worker_uss"]) - min(report["worker_uss"]) < 8 * MIB
+
+
+def test_heap_weights_are_shared_copy_on_write():
+    def load():
+        # Same shape as torch weights loaded into the parent's heap
+        return bytearray(os.urandom(MODEL_BYTES))
+
+    report = measure_sharing(load, _touch_every_page, workers=3)
+
+    assert report["parent_rss"] > MODEL_BYTES
+    assert all(uss < 24 * MIB for uss in report["worker_uss"])
+
+
+def test_supervisor_backs_off_and_gives_up_on_a_crash_loop():
+    spawned = []
+
+    def spawn():
+        spawned.append(time.monotonic())
+        return fork_worker(lambda: os._exit(3))
+
+    started = time.monotonic()
+    with pytest.raises(CrashLoop):
+        supervise(spawn, workers=1, crash_backoff=0.1, max_crashes=4)
+    # One worker and three replacements, 0.1 + 0.2 + 0.4s apart
+    assert len(spawned) == 4
+    gaps = [b - a for a, b in zip(spawned, spawned[1:])]
+    assert gaps[0] >= 0.1 and gaps[1] >= 0.2 and gaps[2] >= 0.4
+    assert time.monotonic() - started < 5
+
+
+def test_supervisor_replaces_recycled_workers_at_once(tmp_path):
+    marker = tmp_path / "spawns"
+
+    def worker():
+        with open(marker, "a") as f:
+            f.write("x")
+        # The third worker stays up until the supervisor stops it
+        if len(marker.read_text()) >= 3:
+            os.kill(os.getppid(), signal.SIGTERM)
+            time.sleep(30)
+
+    started = time.monotonic()
+    supervise(lambda: fork_worker(worker), workers=1, graceful_timeout=1)
+    assert marker.read_text() == "xxx"
+    assert time.monotonic() - started < 5
@@ -0,0 +1,102 @@
+"""
+Tests for the token-budgeted prompt builder
+"""
+
+import sys
+
+sys.path.append("backend")
+
+from backend.prompting import PromptBuilder, WhitespaceTokenizer
+
+
+class CountingTokenizer(WhitespaceTokenizer):
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, text):
+        self.encoded.append(text)
+        return super().encode(text)
+
+
+def make_builder(tokenizer, budget=100):
+    return (
+        PromptBuilder(tokenizer.encode, tokenizer.decode, budget)
+        .static("persona", "You are Elysia, the concierge.\n")
+        .dynamic("facts", prefix="Facts:\n", priority=40)
+        .static("guidelines", "Be warm and helpful.\n", priority=30)
+        .dynamic("request", prefix="Request: ", priority=90)
+        .static("cue", "Elysia:")
+    )
+
+
+def test_static_sections_are_tokenized_once():
+    tokenizer = CountingTokenizer()
+    builder = make_builder(tokenizer)
+    setup_calls = len(tokenizer.encoded)
+
+    for _ in range(3):
+        builder.build(facts="- Pool (6 AM - 10 PM)", request="When does the pool open?")
+
+    # Only the two dynamic values are tokenized per request
+    assert len(tokenizer.encoded) - setup_calls == 6
+
+
+def test_prompt_text_and_counts():
+    prompt = make_builder(WhitespaceTokenizer()).build(
+        facts="- Pool (6 AM - 10 PM)", request="When does the pool open?"
+    )
+
+    assert prompt.text == (
+        "You are Elysia, the concierge.\n"
+        "Facts:\n- Pool (6 AM - 10 PM)\n"
+        "Be warm and helpful.\n"
+        "Request: When does the pool open?\n"
+        "Elysia:"
+    )
+    assert prompt.counts["persona"] == 6
+    assert sum(prompt.counts.values()) == prompt.total_tokens == len(prompt.ids)
+    assert prompt.truncated == []
+
+
+def test_empty_dynamic_section_is_omitted():
+    prompt = make_builder(WhitespaceTokenizer()).build(request="Hello")
+    assert "Facts:" not in prompt.text
+    assert prompt.counts["facts"] == 0
+
+
+def test_budget_truncates_lowest_priority_first():
+    facts = "\n".join(f"- Fact number {i}" for i in range(20))
+    prompt = make_builder(WhitespaceTokenizer(), budget=30).build(
+        facts=facts, request="Is the gym open?"
+    )
+
+    assert prompt.total_tokens <= 30
+    # Guidelines (priority 30) go before facts (40)
+    assert prompt.truncated[0] == "guidelines"
+    assert "Request: Is the gym open?" in prompt.text
+    assert prompt.text.startswith("You are Elysia")
+
+
+def test_dynamic_section_is_cut_not_dropped_when_enough():
+    facts = "\n".join(f"- Fact number {i}" for i in range(20))
+    prompt = make_builder(WhitespaceTokenizer(), budget=50).build(
+        facts=facts, request="Is the gym open?"
+    )
+
+    assert prompt.total_tokens == 50
+    assert prompt.truncated == ["guidelines", "facts"]
+    assert "Facts:\n- Fact number 0" in prompt.text
+
+
+def test_section_cut_down_to_nothing_drops_its_framing():
+    # Facts are 4 tokens plus 3 of framing; guidelines go first (5 tokens)
+    builder = make_builder(WhitespaceTokenizer(), budget=17)
+    prompt = builder.build(facts="- a b c", request="Is the gym open?")
+    assert prompt.counts["facts"] == 0
+    assert "Facts:" not in prompt.text
+    assert prompt.truncated == ["guidelines", "facts"]
+
+    builder = make_builder(WhitespaceTokenizer(), budget=18)
+    prompt = builder.build(facts="- a b c", request="Is the gym open?")
+    assert prompt.counts["facts"] == 4
+    assert prompt.total_tokens == 18
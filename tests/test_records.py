@@ -0,0 +1,124 @@
+"""
+Tests for compact stored request records
+"""
+
+import asyncio
+import sys
+import tracemalloc
+from datetime import datetime, timezone
+
+sys.path.append("backend")
+
+from backend.elysia_lite import (
+    ConciergeResponse,
+    ElysiaLiteEngine,
+    Priority,
+    RequestType,
+    ResidentRequest,
+    StoredRequest,
+    decode_record,
+    encode_record,
+)
+from backend.records import from_micros, pack_text, to_micros, unpack_text
+
+ROUTING = {
+    "backend": "llamacpp",
+    "reason": "complex request",
+    "complexity": "complex",
+    "degraded": True,
+    "latency_ms": 812.5,
+}
+
+
+def make_pair(i=0, timestamp=None):
+    request = ResidentRequest(
+        resident_id=f"R-{i}",
+        unit_number="304",
+        request_type=RequestType.MAINTENANCE,
+        message=f"Dishwasher is leaking again #{i}",
+        priority=Priority.URGENT,
+        timestamp=timestamp or datetime(2026, 10, 19, 9, 30, 15, 123456),
+        property_id="the-avant",
+    )
+    response = ConciergeResponse(
+        response="We'll send maintenance today. " * 20,
+        request_id=f"AVT-20261019-{i:04d}",
+        estimated_resolution_time="24-48 hours",
+        follow_up_needed=True,
+        escalation_required=True,
+        ticket_id="TKT-1",
+        degraded=True,
+    )
+    return request, response
+
+
+def test_record_reads_back_as_the_original_models():
+    request, response = make_pair()
+    created = datetime(2026, 10, 19, 9, 30, 16)
+    for compress_min in (None, 100):
+        record = StoredRequest.create(
+            request, response, created, "active", ROUTING, compress_min
+        )
+        assert isinstance(record.text, bytes) == (compress_min is not None)
+        assert record["request"] == request
+        assert record["response"] == response
+        assert record["timestamp"] == created
+        assert record["routing"] == ROUTING
+        assert dict(record)["status"] == "active"
+        assert record.backend == "llamacpp" and record.degraded
+
+
+def test_timestamps_keep_their_timezone_and_microseconds():
+    aware = datetime(2026, 10, 19, 9, 30, 15, 1, tzinfo=timezone.utc)
+    naive = datetime(2026, 3, 29, 1, 59, 59, 999999)
+    assert from_micros(*to_micros(aware)) == aware
+    assert from_micros(*to_micros(naive)) == naive
+    request, response = make_pair(timestamp=aware)
+    record = StoredRequest.create(request, response, naive, "active", ROUTING)
+    assert record["request"].timestamp == aware
+    assert record["timestamp"].tzinfo is None
+
+
+def test_short_text_is_not_compressed():
+    assert pack_text("thanks!", 4) == "thanks!"
+    assert unpack_text(pack_text("thanks! " * 100, 4)) == "thanks! " * 100
+
+
+def test_shared_store_format_is_unchanged():
+    engine = ElysiaLiteEngine()
+    response = asyncio.run(engine.process_request(make_pair(7)[0]))
+    record = engine.active_requests[response.request_id]
+    assert isinstance(record, StoredRequest)
+    data = encode_record(record)
+    assert set(data) == {"request", "response", "timestamp", "status", "routing"}
+    assert data["request"]["request_type"] == "maintenance"
+    assert dict(decode_record(data)) == dict(record)
+
+
+def test_compact_records_use_less_memory_than_dicts():
+    pairs = [make_pair(i) for i in range(2000)]
+    created = datetime.now()
+
+    def measure(build):
+        tracemalloc.start()
+        store = [build(request, response) for request, response in pairs]
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        assert len(store) == len(pairs)
+        return size
+
+    dicts = measure(
+        lambda request, response: {
+            "request": request.model_copy(),
+            "response": response.model_copy(),
+            "timestamp": created,
+            "status": "active",
+            "routing": dict(ROUTING),
+        }
+    )
+    compact = measure(
+        lambda request, response: StoredRequest.create(
+            request, response, created, "active", ROUTING
+        )
+    )
+    assert compact < dicts / 2
@@ -0,0 +1,86 @@
+import asyncio
+import sys
+import time
+
+import pytest
+
+sys.path.append("backend")
+from backend.resilience import CircuitBreaker, LatencyTracker, hedged_call
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_latency_tracker_percentile():
+    tracker = LatencyTracker(window=100, min_samples=5)
+    assert tracker.percentile(0.95, default=1.5) == 1.5
+    for i in range(1, 101):
+        tracker.record(i / 100)
+    assert tracker.percentile(0.5) == pytest.approx(0.5, abs=0.02)
+    assert tracker.percentile(0.95) == pytest.approx(0.95, abs=0.02)
+
+
+def test_breaker_trips_on_error_rate_and_recovers_via_half_open():
+    clock = FakeClock()
+    breaker = CircuitBreaker(
+        min_calls=4, error_rate_threshold=0.5, reset_timeout=10, clock=clock
+    )
+    breaker.record_success(0.1)
+    breaker.record_success(0.1)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+
+    clock.now = 11
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    # Only one probe is allowed through while half-open
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+    breaker.record_success(0.1)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_breaker_failed_probe_reopens():
+    clock = FakeClock()
+    breaker = CircuitBreaker(min_calls=1, reset_timeout=5, clock=clock)
+    breaker.record_failure()
+    clock.now = 6
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_breaker_trips_on_latency():
+    breaker = CircuitBreaker(min_calls=3, latency_threshold=1.0)
+    for _ in range(3):
+        breaker.record_success(2.5)
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_hedged_call_retries_after_failure():
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("boom")
+        return "ok"
+
+    result, count = asyncio.run(hedged_call(flaky, hedge_delay=1.0))
+    assert result == "ok"
+    assert count == 2
+
+
+def test_hedged_call_without_hedging_raises():
+    def broken():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(hedged_call(broken, hedge_delay=None, max_attempts=1))
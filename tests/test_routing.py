@@ -0,0 +1,153 @@
+import asyncio
+import sys
+
+sys.path.append("backend")
+from backend.deadline import Deadline
+from backend.elysia_lite import (
+    ElysiaLiteEngine,
+    IntelligentMockAI,
+    Priority,
+    RequestType,
+    ResidentRequest,
+)
+from backend.routing import BackendRouter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class EchoAI:
+    def __init__(self, text="llm answer"):
+        self.text = text
+        self.error_count = 0
+
+    async def generate_response(self, request, deadline=None):
+        return self.text
+
+
+def _request(request_type, message):
+    return ResidentRequest(
+        resident_id="R1",
+        unit_number="204",
+        request_type=request_type,
+        message=message,
+    )
+
+
+def _router(clock=None, **kwargs):
+    backends = {"hosted": EchoAI(), "llamacpp": EchoAI(), "mock": IntelligentMockAI()}
+    return BackendRouter(backends, clock=clock or FakeClock(), **kwargs)
+
+
+def test_faq_requests_go_to_mock():
+    router = _router()
+    decision = router.choose(
+        _request(RequestType.GENERAL_INQUIRY, "What are the pool hours?")
+    )
+    assert decision.backend == "mock"
+    assert decision.complexity == "simple"
+
+    decision = router.choose(_request(RequestType.PACKAGE_INQUIRY, "Any packages?"))
+    assert decision.backend == "mock"
+
+
+def test_emergencies_never_get_the_mock_while_an_llm_is_healthy():
+    router = _router()
+    router.observe("hosted", 0.5, ok=True)
+    router.observe("llamacpp", 0.5, ok=True)
+    emergency_type = _request(RequestType.EMERGENCY, "Water everywhere")
+    emergency_priority = _request(RequestType.GENERAL_INQUIRY, "When is the gym open?")
+    emergency_priority.priority = Priority.EMERGENCY
+    for request in (emergency_type, emergency_priority):
+        decision = router.choose(request)
+        assert decision.complexity == "complex"
+        assert decision.backend != "mock"
+
+
+def test_complex_requests_prefer_healthy_llm_within_slo():
+    clock = FakeClock()
+    router = _router(clock, latency_slo=2.0)
+    request = _request(
+        RequestType.MAINTENANCE, "The dishwasher makes a grinding noise after cycles"
+    )
+    assert router.choose(request).reason == "no latency data yet"
+
+    router.observe("hosted", 5.0, ok=True)
+    router.observe("llamacpp", 0.5, ok=True)
+    decision = router.choose(request)
+    assert decision.backend == "llamacpp"
+    assert decision.reason == "within latency SLO"
+
+
+def test_unhealthy_llms_fall_back_to_mock_with_reason():
+    clock = FakeClock()
+    router = _router(clock, max_error_rate=0.3)
+    request = _request(RequestType.MAINTENANCE, "The heater is broken again")
+    for _ in range(5):
+        router.observe("hosted", 0.5, ok=False)
+        router.observe("llamacpp", 0.5, ok=False)
+
+    decision = router.choose(request)
+    assert decision.backend == "mock"
+    assert "hosted error rate" in decision.reason
+    assert "llamacpp error rate" in decision.reason
+
+    # After the probe interval the preferred backend is re-measured
+    clock.now += 60
+    assert router.choose(request).reason == "periodic probe"
+
+
+def test_remaining_deadline_excludes_slow_backend():
+    router = _router(latency_slo=30.0)
+    router.observe("hosted", 4.0, ok=True)
+    router.observe("llamacpp", 0.2, ok=True)
+    request = _request(RequestType.MAINTENANCE, "Garbage disposal is jammed")
+
+    decision = router.choose(request, deadline=Deadline.after(1.0))
+    assert decision.backend == "llamacpp"
+
+
+def test_engine_records_routing_decision_per_request():
+    engine = ElysiaLiteEngine()
+    engine.ai = EchoAI("from the llm")
+
+    complex_request = _request(RequestType.MAINTENANCE, "The bathroom fan rattles")
+    response = asyncio.run(engine.process_request(complex_request))
+    assert response.response == "from the llm"
+    routing = engine.active_requests[response.request_id]["routing"]
+    assert routing["backend"] == "echoai"
+    assert routing["complexity"] == "complex"
+    assert routing["latency_ms"] >= 0
+
+    faq_request = _request(RequestType.GENERAL_INQUIRY, "Hello!")
+    response = asyncio.run(engine.process_request(faq_request))
+    assert engine.active_requests[response.request_id]["routing"]["backend"] == "mock"
+    assert engine.router.snapshot()["echoai"]["calls"] == 1
+
+
+def test_fallback_behind_an_open_circuit_is_not_credited_to_the_llm():
+    from backend.elysia_lite import HostedBloomAI
+
+    engine = ElysiaLiteEngine()
+    hosted = HostedBloomAI("fake-key", "fake/model", fallback=IntelligentMockAI())
+    for _ in range(hosted.breaker.min_calls):
+        hosted.breaker.record_failure()
+    engine.ai = hosted
+    question = (
+        "Could you explain how to get from The Avant to downtown Denver "
+        "using public transit, and how long the trip usually takes?"
+    )
+
+    response = asyncio.run(
+        engine.process_request(_request(RequestType.COMMUNITY_INFO, question))
+    )
+    assert response.degraded
+    routing = engine.active_requests[response.request_id]["routing"]
+    assert routing["backend"] == "mock"
+    assert engine.router.snapshot()["hosted"]["error_rate_ewma"] > 0
+    assert engine.responses.get("community_info", question) is None
@@ -0,0 +1,258 @@
+"""
+Tests for multi-turn sessions and llama-cpp KV state reuse
+"""
+
+import asyncio
+import os
+import pickle
+import stat
+import sys
+import threading
+
+import pytest
+
+sys.path.append("backend")
+
+from backend.elysia_lite import LlamaCppAI, RequestType, ResidentRequest, resident_of
+from backend.sessions import SessionStore, private_dir
+
+
+class FakeState:
+    def __init__(self, owner, llama_state_size=1000):
+        self.owner = owner
+        self.llama_state_size = llama_state_size
+
+
+class FakeLlama:
+    """Records messages and which state was loaded before each generation"""
+
+    def __init__(self, n_ctx=2048):
+        self.calls = []
+        self.loaded = []
+        self.context = None
+        self._n_ctx = n_ctx
+
+    def n_ctx(self):
+        return self._n_ctx
+
+    def tokenize(self, text, add_bos=True):
+        return text.split()
+
+    def detokenize(self, tokens):
+        return b" ".join(tokens)
+
+    def create_chat_completion(self, messages, **kwargs):
+        self.context = messages[-1]["content"]
+        self.calls.append(messages)
+        return {"choices": [{"message": {"content": f"reply {len(self.calls)}"}}]}
+
+    def save_state(self):
+        return FakeState(self.context)
+
+    def load_state(self, state):
+        self.loaded.append(state.owner)
+        self.context = state.owner
+
+
+def make_request(resident_id, message):
+    return ResidentRequest(
+        resident_id=resident_id,
+        unit_number="304",
+        request_type=RequestType.MAINTENANCE,
+        message=message,
+    )
+
+
+def test_follow_up_sees_history_and_restores_kv_state(tmp_path):
+    store = SessionStore(spill_dir=str(tmp_path))
+    model = FakeLlama()
+    adapter = LlamaCppAI(model, sessions=store)
+
+    async def turn(resident_id, message):
+        request = make_request(resident_id, message)
+        reply = await adapter.generate_response(request)
+        store.record_turn(store.get(resident_of(request)), f"msg {message}", reply)
+
+    asyncio.run(turn("R-1", "My sink is leaking"))
+    asyncio.run(turn("R-2", "Package question"))
+    asyncio.run(turn("R-1", "yes, it's leaking onto the floor"))
+
+    follow_up = model.calls[-1]
+    assert [m["role"] for m in follow_up] == ["system", "user", "assistant", "user"]
+    assert follow_up[2]["content"] == "reply 1"
+    # R-2 took over the context, so R-1's saved KV cache was loaded back
+    assert len(model.loaded) == 1
+    assert model.loaded[0].endswith("Unit 304 - maintenance: My sink is leaking")
+
+
+def test_same_resident_keeps_context_without_reload(tmp_path):
+    store = SessionStore(spill_dir=str(tmp_path))
+    model = FakeLlama()
+    adapter = LlamaCppAI(model, sessions=store)
+
+    for message in ("first", "second"):
+        asyncio.run(adapter.generate_response(make_request("R-1", message)))
+
+    assert model.loaded == []
+
+
+def test_history_is_fitted_into_the_model_context(tmp_path):
+    store = SessionStore(spill_dir=str(tmp_path), max_tokens=10**6)
+    model = FakeLlama(n_ctx=400)
+    adapter = LlamaCppAI(model, sessions=store)
+    request = make_request("R-1", "and another thing")
+    session = store.get(resident_of(request))
+    for i in range(20):
+        store.record_turn(session, f"question {i} " + "word " * 20, f"answer {i}")
+
+    asyncio.run(adapter.generate_response(request))
+    messages = model.calls[-1]
+    used = sum(len(m["content"].split()) + 8 for m in messages)
+    assert used + 128 <= 400
+    # The newest turns survive, whole
+    assert messages[-2]["content"] == "answer 19"
+    assert [m["role"] for m in messages[1:-1]] == ["user", "assistant"] * (
+        (len(messages) - 2) // 2
+    )
+    # Retrieved facts are sent with the turn but never kept in history
+    assert all("Property facts" not in m["content"] for m in session.messages)
+
+
+def test_long_turn_is_cut_to_its_reserved_room(tmp_path):
+    from backend.elysia_lite import LLAMACPP_TURN_TOKENS
+
+    model = FakeLlama()
+    adapter = LlamaCppAI(model, sessions=SessionStore(spill_dir=str(tmp_path)))
+    request = make_request("R-1", "The pool gate is broken " + "again " * 1000)
+
+    asyncio.run(adapter.generate_response(request))
+    turn = model.calls[-1][-1]["content"]
+    assert len(turn.split()) <= LLAMACPP_TURN_TOKENS
+    assert "Unit 304 - maintenance: The pool gate is broken" in turn
+
+
+def test_history_window_is_bounded():
+    store = SessionStore(max_tokens=100, count_tokens=lambda text: 10)
+    session = store.get("R-1")
+    for i in range(20):
+        store.record_turn(session, f"question {i}", f"answer {i}")
+
+    assert session.tokens <= 100
+    assert session.messages[-1]["content"] == "answer 19"
+    assert len(session.messages) % 2 == 0
+
+
+def spilling_store(path, **kwargs):
+    return SessionStore(
+        max_bytes=2500,
+        spill_dir=str(path),
+        dump_state=lambda state: state.owner.encode(),
+        load_state=lambda data: FakeState(data.decode()),
+        **kwargs,
+    )
+
+
+def fill(store):
+    first = store.get("R-1")
+    store.record_turn(first, "hello", "hi there")
+    store.save_state(first, FakeState("R-1"), 1000, owner="llamacpp-1")
+    store.save_state(store.get("R-2"), FakeState("R-2"), 1000)
+    # Third session pushes the least recently used one (R-1) to disk
+    store.save_state(store.get("R-3"), FakeState("R-3"), 1000)
+
+
+def test_lru_eviction_spills_and_restores(tmp_path):
+    store = spilling_store(tmp_path / "spill")
+    fill(store)
+    store.flush()
+
+    assert store.spills == 1
+    assert store.memory_bytes <= 2500
+    files = list((tmp_path / "spill").iterdir())
+    assert len(files) == 1
+    assert stat.S_IMODE(files[0].stat().st_mode) == 0o600
+    assert stat.S_IMODE((tmp_path / "spill").stat().st_mode) == 0o700
+
+    restored = asyncio.run(store.load("R-1"))
+    assert store.restores == 1
+    assert restored.state.owner == "R-1"
+    assert restored.state_owner == "llamacpp-1"
+    assert restored.messages[1]["content"] == "hi there"
+    assert not files[0].exists()
+
+
+def test_session_evicted_but_not_yet_written_comes_back_from_memory(tmp_path):
+    store = spilling_store(tmp_path)
+    gate = threading.Event()
+    write = store._write
+    store._write = lambda *args: (gate.wait(5), write(*args))
+    first = store.get("R-1")
+    fill(store)
+    assert store.get("R-1") is first
+    gate.set()
+    store.flush()
+    assert store.restores == 0
+    assert not os.path.exists(store._spill_path("R-1"))
+
+
+def test_spill_files_are_never_unpickled(tmp_path):
+    store = spilling_store(tmp_path)
+    ran = []
+
+    class Exploit:
+        def __reduce__(self):
+            return (ran.append, ("pwned",))
+
+    with open(store._spill_path("R-1"), "wb") as f:
+        pickle.dump(Exploit(), f)
+
+    assert store.get("R-1").messages == []
+    assert ran == []
+
+
+def test_spill_dir_owned_by_someone_else_is_refused(tmp_path, monkeypatch):
+    loose = tmp_path / "shared"
+    loose.mkdir(mode=0o777)
+    os.chmod(loose, 0o777)
+    private_dir(str(loose))
+    assert stat.S_IMODE(loose.stat().st_mode) == 0o700
+
+    monkeypatch.setattr(os, "getuid", lambda: os.stat(loose).st_uid + 1)
+    with pytest.raises(PermissionError):
+        private_dir(str(loose))
+    store = spilling_store(loose)
+    fill(store)
+    store.flush()
+    assert store.spills == 0 and list(loose.iterdir()) == []
+
+
+def test_expired_session_starts_over(tmp_path):
+    store = SessionStore(ttl=60, spill_dir=str(tmp_path))
+    session = store.get("R-1")
+    store.record_turn(session, "hello", "hi")
+    session.last_used -= 120
+
+    assert store.get("R-1").messages == []
+
+
+def test_failed_llm_answer_stays_out_of_the_conversation():
+    from backend.elysia_lite import ElysiaLiteEngine
+    from backend.routing import BackendError
+
+    class FailingAI:
+        error_count = 0
+
+        async def generate_response(self, request, deadline=None):
+            self.error_count += 1
+            raise BackendError("context overflow")
+
+    engine = ElysiaLiteEngine()
+    engine.ai = FailingAI()
+    request = make_request("R-1", "The dishwasher makes a grinding noise")
+
+    response = asyncio.run(engine.process_request(request))
+    assert response.degraded
+    routing = engine.active_requests[response.request_id]["routing"]
+    assert routing["backend"] == "mock"
+    assert engine.sessions.get(resident_of(request)).messages == []
+    assert engine.shedder.stats()["by_reason"] == {"backend_error": 1}
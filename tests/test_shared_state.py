@@ -0,0 +1,271 @@
+"""
+Tests for the shared state tier (Redis or the in-memory stand-in)
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.append("backend")
+
+from backend import elysia_lite
+from backend.admission import AdmissionController
+from backend.elysia_lite import (
+    ElysiaLiteEngine,
+    RequestType,
+    ResidentRequest,
+    decode_record,
+    encode_record,
+)
+from backend.shared_state import (
+    MemoryRedis,
+    NearCache,
+    RedisBucketTable,
+    ResponseCache,
+    SharedRequestStore,
+    connect,
+)
+
+# Also run the Redis-facing tests against a real server when one is given
+REDIS_URLS = ["memory://"]
+if os.environ.get("ELYSIA_TEST_REDIS_URL"):
+    REDIS_URLS.append(os.environ["ELYSIA_TEST_REDIS_URL"])
+
+
+@pytest.fixture(params=REDIS_URLS)
+def client(request):
+    client = connect(request.param)
+    yield client
+    if not isinstance(client, MemoryRedis):
+        keys = client.keys("elysia-test:*")
+        if keys:
+            client.delete(*keys)
+
+
+class EchoAI:
+    def __init__(self, text="llm answer"):
+        self.text = text
+        self.error_count = 0
+        self.calls = 0
+
+    async def generate_response(self, request, deadline=None):
+        self.calls += 1
+        return self.text
+
+
+def make_request(resident_id, request_type, message):
+    return ResidentRequest(
+        resident_id=resident_id,
+        unit_number="204",
+        request_type=request_type,
+        message=message,
+    )
+
+
+def test_near_cache_expires_and_evicts():
+    cache = NearCache(max_entries=2, ttl=0.05)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.put("c", 3)
+    assert cache.get("a") != 1  # evicted
+    assert cache.get("c") == 3
+    time.sleep(0.06)
+    assert cache.get("c") != 3
+
+
+def test_request_store_is_shared_between_workers(client):
+    workers = [
+        SharedRequestStore(client, encode_record, decode_record, prefix="elysia-test:")
+        for _ in range(2)
+    ]
+    day = "20261019"
+    ids = [f"AVT-{day}-{workers[i % 2].next_sequence(day):04d}" for i in range(6)]
+    assert len(set(ids)) == 6
+
+    engine = ElysiaLiteEngine()
+    request = make_request("R-1", RequestType.MAINTENANCE, "Sink is leaking")
+    response = asyncio.run(engine.process_request(request))
+    workers[0][ids[0]] = engine.active_requests[response.request_id]
+
+    record = workers[1][ids[0]]
+    assert record["request"].message == "Sink is leaking"
+    assert record["response"].response == response.response
+    assert ids[0] in workers[1]
+    assert "AVT-missing" not in workers[1]
+    assert list(workers[1].get_many([ids[0], "AVT-missing"])) == [ids[0]]
+    with pytest.raises(KeyError):
+        workers[1]["AVT-missing"]
+
+
+def test_response_cache_shared_and_normalized(client):
+    first = ResponseCache(client, prefix="elysia-test:")
+    second = ResponseCache(client, prefix="elysia-test:")
+    first.put("community_info", "What's near The Avant?", "Cherry Creek Park")
+
+    assert second.get("community_info", "what's near the  avant") == "Cherry Creek Park"
+    assert second.get("general_inquiry", "What's near The Avant?") is None
+    assert second.stats() == {"backend": "redis", "hits": 1, "misses": 1}
+
+
+def test_rate_limit_buckets_span_workers(client):
+    def worker():
+        table = RedisBucketTable(client, prefix="elysia-test:")
+        limits = {"general_inquiry": (6, 2)}
+        return AdmissionController(limits, table=table, clock=lambda: 5000.0)
+
+    first, second = worker(), worker()
+    assert first.admit("R-1", "101", "general_inquiry") == 0
+    assert second.admit("R-1", "101", "general_inquiry") == 0
+    assert first.admit("R-1", "101", "general_inquiry") == pytest.approx(10)
+    assert second.admit("R-2", "102", "general_inquiry") == 0
+
+
+def test_engine_reuses_llm_answers_for_repeated_questions():
+    engine = ElysiaLiteEngine()
+    llm = EchoAI("The light rail is a short walk from The Avant.")
+    engine.ai = llm
+    question = (
+        "Could you explain how to get from The Avant to downtown Denver "
+        "using public transit, and how long the trip usually takes?"
+    )
+
+    for resident in ("R-1", "R-2"):
+        response = asyncio.run(
+            engine.process_request(
+                make_request(resident, RequestType.COMMUNITY_INFO, question)
+            )
+        )
+        assert response.response == llm.text
+    assert llm.calls == 1
+    routing = engine.active_requests[response.request_id]["routing"]
+    assert routing["backend"] == "cache"
+
+    # A follow-up depends on the conversation, so it is not served from cache
+    asyncio.run(
+        engine.process_request(
+            make_request("R-1", RequestType.COMMUNITY_INFO, question)
+        )
+    )
+    assert llm.calls == 2
+
+
+def test_engine_with_shared_state(monkeypatch):
+    shared = MemoryRedis()
+    monkeypatch.setattr(elysia_lite, "SHARED_STATE_ENABLED", True)
+    monkeypatch.setattr(elysia_lite, "connect", lambda *args: shared)
+    workers = [ElysiaLiteEngine(), ElysiaLiteEngine()]
+
+    request = make_request("R-9", RequestType.PACKAGE_INQUIRY, "Any packages?")
+    first = asyncio.run(workers[0].process_request(request))
+    second = asyncio.run(workers[1].process_request(request))
+    assert first.request_id != second.request_id
+    assert workers[1].active_requests[first.request_id]["response"] == first
+    assert workers[0].admission.stats()["shared"]
+
+
+class DownRedis:
+    """A Redis client whose server is unreachable"""
+
+    def __getattr__(self, command):
+        def fail(*args, **kwargs):
+            raise ConnectionRefusedError("Connection refused")
+
+        return fail
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def register_script(self, script):
+        return self.evalsha
+
+
+class SlowRedis:
+    """A client that blocks for a network round trip, as redis-py does"""
+
+    def __init__(self):
+        self.memory = MemoryRedis()
+
+    def get(self, name):
+        time.sleep(0.2)
+        return self.memory.get(name)
+
+
+def test_engine_keeps_answering_while_redis_is_down(monkeypatch):
+    monkeypatch.setattr(elysia_lite, "SHARED_STATE_ENABLED", True)
+    monkeypatch.setattr(elysia_lite, "connect", lambda *args: DownRedis())
+    engine = ElysiaLiteEngine()
+
+    request = make_request("R-9", RequestType.PACKAGE_INQUIRY, "Any packages?")
+    ids = {asyncio.run(engine.process_request(request)).request_id for _ in range(3)}
+    assert len(ids) == 3
+    assert all(request_id.startswith("AVT-") for request_id in ids)
+    assert engine.active_requests.stats()["errors"] >= 3
+    assert asyncio.run(engine.admission.admit_async("R-9", "204", "maintenance")) == 0
+
+
+def test_redis_round_trips_do_not_block_the_event_loop():
+    cache = ResponseCache(SlowRedis(), prefix="elysia-test:")
+
+    async def main():
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker = asyncio.create_task(tick())
+        await asyncio.sleep(0)
+        found = await cache.get_async("community_info", "Where is the gym?")
+        ticker.cancel()
+        return found, ticks
+
+    found, ticks = asyncio.run(main())
+    assert found is None
+    assert ticks >= 5
+
+
+def test_error_text_from_an_llm_is_never_cached():
+    class FailingAI(EchoAI):
+        async def generate_response(self, request, deadline=None):
+            # Older adapters report errors in-band and bump their counter
+            self.error_count += 1
+            return "I'm experiencing technical difficulties right now."
+
+    engine = ElysiaLiteEngine()
+    engine.ai = FailingAI()
+    question = (
+        "Could you explain how to get from The Avant to downtown Denver "
+        "using public transit, and how long the trip usually takes?"
+    )
+    request = make_request("R-1", RequestType.COMMUNITY_INFO, question)
+
+    response = asyncio.run(engine.process_request(request))
+    assert response.degraded
+    assert "technical difficulties" not in response.response
+    assert engine.responses.get("community_info", question) is None
+
+
+def test_backend_header_survives_an_expired_record(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    async def gone(request_id):
+        # Another worker's store entry expired before the handler read it back
+        return None
+
+    monkeypatch.setattr(elysia_lite.elysia_engine.active_requests, "get_async", gone)
+    r = TestClient(elysia_lite.app).post(
+        "/api/elysia/request",
+        json={
+            "resident_id": "TEST-EXP1",
+            "unit_number": "204",
+            "request_type": "package_inquiry",
+            "message": "Any packages for me?",
+        },
+    )
+    assert r.status_code == 200
+    assert r.headers["x-elysia-backend"] == "mock"
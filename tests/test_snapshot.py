@@ -0,0 +1,147 @@
+"""
+Tests for the build-time artifact snapshot
+"""
+
+import json
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.append("backend")
+
+from backend.knowledge import BM25Index, property_snippets
+from backend.snapshot import (
+    Snapshot,
+    SnapshotError,
+    SnapshotLoader,
+    encode_snapshot,
+    source_checksum,
+)
+
+SECTIONS = {"index": b'{"terms": [1, 2, 3]}', "payload": b'{"ok": true}'}
+
+
+def counting_build(calls):
+    def build():
+        calls.append(1)
+        return dict(SECTIONS)
+
+    return build
+
+
+def test_round_trip_and_zero_copy_sections():
+    checksum = source_checksum({"a": 1})
+    snapshot = Snapshot(encode_snapshot(SECTIONS, checksum), checksum)
+    assert snapshot.json("index") == {"terms": [1, 2, 3]}
+    assert isinstance(snapshot.section("payload"), memoryview)
+    with pytest.raises(SnapshotError):
+        snapshot.section("missing")
+
+
+def test_stale_or_corrupt_snapshots_are_rejected():
+    data = encode_snapshot(SECTIONS, source_checksum("v1"))
+    with pytest.raises(SnapshotError, match="stale"):
+        Snapshot(data, source_checksum("v2"))
+    with pytest.raises(SnapshotError):
+        Snapshot(b"not a snapshot at all, just some bytes here")
+    corrupt = bytearray(data)
+    corrupt[-2] ^= 0xFF
+    with pytest.raises(SnapshotError, match="corrupt"):
+        Snapshot(bytes(corrupt)).section("payload")
+
+
+def test_loader_builds_once_then_maps_the_file(tmp_path):
+    path = str(tmp_path / "app.snapshot")
+    calls = []
+    loader = SnapshotLoader(path, source_checksum("v1"), counting_build(calls))
+    assert loader.json("payload") == {"ok": True}
+    assert loader.stats()["origin"] == "rebuilt"
+
+    # Next cold start: same sources, nothing rebuilt
+    again = SnapshotLoader(path, source_checksum("v1"), counting_build(calls))
+    assert again.json("index") == {"terms": [1, 2, 3]}
+    assert again.stats()["origin"] == "file"
+    assert len(calls) == 1
+
+    # Sources changed: the stale file is rebuilt and replaced
+    changed = SnapshotLoader(path, source_checksum("v2"), counting_build(calls))
+    changed.snapshot()
+    assert changed.stats()["origin"] == "rebuilt"
+    assert len(calls) == 2
+    assert Snapshot.open(path, source_checksum("v2")).json("payload") == {"ok": True}
+
+
+def test_loader_falls_back_to_memory_when_unwritable(tmp_path):
+    path = str(tmp_path / "missing-dir" / "app.snapshot")
+    loader = SnapshotLoader(path, source_checksum("v1"), counting_build([]))
+    assert loader.json("payload") == {"ok": True}
+    assert loader.stats()["origin"] == "memory"
+
+
+def test_serving_rebuilds_into_the_cache_not_the_build_path(tmp_path):
+    (tmp_path / "src").mkdir()
+    path = str(tmp_path / "src" / "app.snapshot")
+    cache = str(tmp_path / "cache" / "app.snapshot")
+    calls = []
+    loader = SnapshotLoader(path, source_checksum("v1"), counting_build(calls), cache)
+    assert loader.json("payload") == {"ok": True}
+    assert list((tmp_path / "src").iterdir()) == []
+    assert Snapshot.open(cache).json("payload") == {"ok": True}
+
+    # Next cold start maps the cached copy
+    again = SnapshotLoader(path, source_checksum("v1"), counting_build(calls), cache)
+    assert again.snapshot().source == cache
+    assert len(calls) == 1
+    # Only the build step writes the build-time snapshot
+    again.rebuild()
+    assert Snapshot.open(path, source_checksum("v1")).toc == again.snapshot().toc
+
+
+def test_section_bytes_are_copied_once(tmp_path):
+    loader = SnapshotLoader(
+        str(tmp_path / "app.snapshot"), source_checksum("v1"), counting_build([])
+    )
+    first = loader.section("payload")
+    assert first == SECTIONS["payload"]
+    assert loader.section("payload") is first
+
+
+def test_bm25_state_round_trip():
+    from backend.elysia_lite import properties
+
+    index = BM25Index(property_snippets(properties.get("the-avant").knowledge))
+    restored = BM25Index.from_state(json.loads(json.dumps(index.state())))
+    query = "When does the pool close?"
+    assert restored.search(query) == index.search(query)
+
+
+def test_app_serves_payloads_from_snapshot():
+    from backend.elysia_lite import app, snapshot_loader
+
+    client = TestClient(app)
+    r = client.get("/api/elysia/amenities")
+    assert r.status_code == 200
+    assert "Swimming Pool (6 AM - 10 PM)" in r.json()["amenities"]
+    assert client.get("/api/elysia/community").json()["property_name"] == "The Avant"
+    assert set(snapshot_loader.stats()["sections"]) >= {
+        "bm25/the-avant",
+        "payload/root",
+    }
+
+
+def test_openapi_describes_pre_encoded_payloads():
+    from backend.elysia_lite import AmenitiesInfo, ApiInfo, CommunityInfo, app
+
+    client = TestClient(app)
+    paths = client.get("/openapi.json").json()["paths"]
+    for path, model in [
+        ("/api/elysia/amenities", AmenitiesInfo),
+        ("/api/elysia/community", CommunityInfo),
+        ("/", ApiInfo),
+    ]:
+        content = paths[path]["get"]["responses"]["200"]["content"]
+        ref = content["application/json"]["schema"]["$ref"]
+        assert ref.endswith(f"/{model.__name__}")
+        # The snapshot bytes must keep matching the documented schema
+        model.model_validate(client.get(path).json())
@@ -0,0 +1,41 @@
+import os
+import sys
+
+sys.path.append("backend")
+from backend.start_server import build_parser, served_properties
+from backend.tenancy import Property
+
+
+def test_launcher_defaults_to_cpu_count(monkeypatch):
+    for key in ["ELYSIA_WORKERS", "PORT", "API_PORT", "MAX_REQUESTS"]:
+        monkeypatch.delenv(key, raising=False)
+    args = build_parser().parse_args([])
+    assert args.workers == (os.cpu_count() or 1)
+    assert args.port == 8000
+    assert args.max_requests == 0
+
+
+def test_launcher_reads_environment(monkeypatch):
+    monkeypatch.setenv("ELYSIA_WORKERS", "3")
+    monkeypatch.setenv("PORT", "9001")
+    monkeypatch.setenv("MAX_REQUESTS", "500")
+    monkeypatch.setenv("MAX_REQUESTS_JITTER", "25")
+    args = build_parser().parse_args(["--graceful-timeout", "12"])
+    assert args.workers == 3
+    assert args.port == 9001
+    assert args.max_requests == 500
+    assert args.max_requests_jitter == 25
+    assert args.graceful_timeout == 12.0
+
+
+def test_banner_names_every_served_property():
+    def building(property_id, name):
+        return Property(property_id, name, "Denver, Colorado", "AB", {})
+
+    assert served_properties([building("the-avant", "The Avant")]) == "The Avant"
+    assert (
+        served_properties(
+            [building("the-avant", "The Avant"), building("maple-court", "Maple Court")]
+        )
+        == "2 properties (The Avant, Maple Court)"
+    )
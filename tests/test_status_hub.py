@@ -0,0 +1,180 @@
+"""
+Tests for status push (fan-out hub, SSE stream, status endpoint)
+"""
+
+import asyncio
+import sys
+import threading
+
+from fastapi.testclient import TestClient
+
+sys.path.append("backend")
+
+from backend.status_hub import StatusHub, format_sse
+from backend.tenancy import resident_key
+
+
+async def take(stream, n):
+    return [await stream.__anext__() for _ in range(n)]
+
+
+def test_publish_fans_out_to_every_subscriber():
+    async def scenario():
+        hub = StatusHub(heartbeat=5)
+        streams = [hub.subscribe("R-1") for _ in range(200)]
+        tasks = [asyncio.create_task(take(s, 1)) for s in streams]
+        await asyncio.sleep(0)
+        assert hub.stats()["subscribers"] == 200
+
+        hub.publish("R-2", "AVT-9", "received")  # another resident
+        hub.publish("R-1", "AVT-1", "received")
+        results = await asyncio.wait_for(asyncio.gather(*tasks), 1)
+        assert {r[0].request_id for r in results} == {"AVT-1"}
+        for stream in streams:
+            await stream.aclose()
+        assert hub.stats()["subscribers"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_resume_from_cursor_skips_seen_events():
+    async def scenario():
+        hub = StatusHub(heartbeat=5)
+        first = hub.publish("R-1", "AVT-1", "received")
+        hub.publish("R-1", "AVT-1", "responded")
+        hub.publish("R-1", "AVT-2", "received")
+
+        stream = hub.subscribe("R-1", cursor=first.seq)
+        events = await take(stream, 2)
+        await stream.aclose()
+        assert [(e.request_id, e.status) for e in events] == [
+            ("AVT-1", "responded"),
+            ("AVT-2", "received"),
+        ]
+
+    asyncio.run(scenario())
+
+
+def test_resume_past_history_gets_latest_per_request():
+    async def scenario():
+        hub = StatusHub(heartbeat=5, history=2)
+        hub.publish("R-1", "AVT-1", "received")
+        hub.publish("R-1", "AVT-1", "ticket_queued")
+        for i in range(3):
+            hub.publish("R-1", "AVT-2", f"step-{i}")
+
+        stream = hub.subscribe("R-1", cursor=0)
+        events = await take(stream, 3)
+        await stream.aclose()
+        # AVT-1 fell out of the log but its latest state is still delivered
+        assert [(e.request_id, e.status) for e in events] == [
+            ("AVT-1", "ticket_queued"),
+            ("AVT-2", "step-1"),
+            ("AVT-2", "step-2"),
+        ]
+
+    asyncio.run(scenario())
+
+
+def test_heartbeat_and_publish_from_thread():
+    async def scenario():
+        hub = StatusHub(heartbeat=0.05)
+        stream = hub.subscribe("R-1")
+        assert await stream.__anext__() is None  # heartbeat
+
+        pending = asyncio.create_task(stream.__anext__())
+        await asyncio.sleep(0)
+        thread = threading.Thread(
+            target=hub.publish, args=("R-1", "AVT-1", "ticket_delivered")
+        )
+        thread.start()
+        thread.join()
+        event = await asyncio.wait_for(pending, 1)
+        while event is None:  # a heartbeat may win the race
+            event = await stream.__anext__()
+        assert event.status == "ticket_delivered"
+
+        hub.close()
+        assert [e async for e in stream] == []
+
+    asyncio.run(scenario())
+
+
+def test_idle_channels_are_pruned():
+    now = [1000.0]
+    hub = StatusHub(heartbeat=5, retention=60, clock=lambda: now[0])
+
+    async def watch_then_leave(resident):
+        stream = hub.subscribe(resident)
+        task = asyncio.create_task(take(stream, 1))
+        await asyncio.sleep(0)
+        assert hub.stats()["channels"] == 1
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        await stream.aclose()
+
+    # Subscribing to a resident with no events leaves nothing behind
+    asyncio.run(watch_then_leave("R-unknown"))
+    assert hub.stats()["channels"] == 0
+
+    hub.publish("R-1", "AVT-1", "received")
+    now[0] += 30
+    hub.publish("R-2", "AVT-2", "received")
+    now[0] += 45
+    hub.publish("R-3", "AVT-3", "received")
+    # R-1 is 75s old and unwatched; R-2 is within retention
+    assert hub.stats()["channels"] == 2
+    assert hub.latest("R-1", "AVT-1") is None
+    assert hub.latest("R-2", "AVT-2").status == "received"
+    assert hub.stats()["pruned"] == 1
+
+
+def test_format_sse():
+    hub = StatusHub()
+    event = hub.publish("R-1", "AVT-1", "received", {"request_type": "maintenance"})
+    frame = format_sse(event)
+    assert frame.startswith(f"id: {event.seq}\nevent: status\ndata: {{")
+    assert frame.endswith("\n\n")
+    assert format_sse(None) == ": keepalive\n\n"
+
+
+def test_status_endpoint_and_event_stream():
+    from backend import elysia_lite
+    from backend.elysia_lite import app, elysia_engine
+
+    client = TestClient(app)
+    payload = {
+        "resident_id": "TEST-S1",
+        "unit_number": "118",
+        "request_type": "maintenance",
+        "message": "The garbage disposal is jammed",
+    }
+    response = client.post("/api/elysia/request", json=payload).json()
+    request_id = response["request_id"]
+
+    status = client.get(f"/api/elysia/status/{request_id}").json()
+    history = [event["status"] for event in status["history"]]
+    assert history[:3] == ["received", "ticket_queued", "responded"]
+    assert status["ticket"]["status"] in ("queued", "pending", "delivered")
+    assert client.get("/api/elysia/status/AVT-NOPE").status_code == 404
+
+    # A closed hub ends the stream after replaying what the client missed
+    hub = elysia_engine.status_hub
+    elysia_engine.status_hub = StatusHub()
+    try:
+        resident = resident_key("the-avant", "TEST-S1")
+        seen = elysia_engine.status_hub.publish(resident, request_id, "received")
+        # Same resident ID in another building: a different channel
+        elysia_engine.status_hub.publish("the-elm/TEST-S1", request_id, "escalated")
+        elysia_engine.status_hub.publish(resident, request_id, "responded")
+        elysia_engine.status_hub.close()
+        r = client.get(
+            "/api/elysia/residents/TEST-S1/events",
+            headers={"Last-Event-ID": str(seen.seq)},
+        )
+    finally:
+        elysia_engine.status_hub = hub
+    assert r.headers["content-type"].startswith("text/event-stream")
+    assert r.text.startswith(f"retry: {elysia_lite.STATUS_RETRY_MS}\n\n")
+    assert r.text.count("event: status") == 1
+    assert '"status": "responded"' in r.text
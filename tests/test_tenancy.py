@@ -0,0 +1,232 @@
+"""
+Tests for multi-property tenancy
+"""
+
+import asyncio
+import json
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.append("backend")
+
+from backend.snapshot import SnapshotLoader, source_checksum
+from backend.tenancy import (
+    PROPERTIES_DIR,
+    Property,
+    PropertyRegistry,
+    UnknownProperty,
+    load_properties,
+)
+
+MAPLE_COURT = {
+    "property_id": "maple-court",
+    "name": "Maple Court",
+    "location": "Boulder, Colorado",
+    "id_prefix": "MPC",
+    "knowledge": {
+        "amenities": ["Bike Workshop (7 AM - 9 PM)", "Sauna (6 AM - 10 PM)"],
+        "local_area": {"dining": "Pearl Street restaurants"},
+        "building_info": {"total_units": 64, "floors": 4},
+    },
+    "local_highlights": ["Pearl Street Mall - 5 minutes"],
+}
+
+
+def write_property(directory, data):
+    path = directory / f"{data['property_id']}.json"
+    path.write_text(json.dumps(data))
+    return path
+
+
+def two_properties(tmp_path):
+    avant = json.loads(open(f"{PROPERTIES_DIR}/the-avant.json").read())
+    write_property(tmp_path, avant)
+    write_property(tmp_path, MAPLE_COURT)
+    return PropertyRegistry.load(str(tmp_path), default="the-avant")
+
+
+def test_properties_load_from_data_files(tmp_path):
+    registry = two_properties(tmp_path)
+    assert [prop.property_id for prop in registry] == ["maple-court", "the-avant"]
+    assert registry.get(None).name == "The Avant"
+    maple = registry.get("maple-court")
+    assert maple.amenities[0].startswith("Bike Workshop")
+    assert "Maple Court" in maple.system_prompt
+    with pytest.raises(UnknownProperty):
+        registry.get("nowhere")
+
+
+def test_invalid_property_files_are_rejected(tmp_path):
+    write_property(tmp_path, {**MAPLE_COURT, "id_prefix": "mpc"})
+    with pytest.raises(ValueError, match="id_prefix"):
+        load_properties(str(tmp_path))
+    with pytest.raises(ValueError, match="missing knowledge"):
+        Property.from_dict({**MAPLE_COURT, "knowledge": {}})
+    clash = Property.from_dict({**MAPLE_COURT, "property_id": "maple-annex"})
+    with pytest.raises(ValueError, match="used by both"):
+        PropertyRegistry([Property.from_dict(MAPLE_COURT), clash])
+
+
+def test_derived_artifacts_are_built_once_per_property(tmp_path):
+    registry = two_properties(tmp_path)
+    built = []
+
+    def build(prop):
+        built.append(prop.property_id)
+        return object()
+
+    first = registry.derived("maple-court", "index", build)
+    assert registry.derived("maple-court", "index", build) is first
+    assert built == ["maple-court"]
+    # Properties without traffic have nothing loaded
+    assert registry.stats()["loaded"] == {"maple-court": ["index"]}
+
+
+def test_lite_app_serves_each_property(tmp_path, monkeypatch):
+    import backend.elysia_lite as lite
+
+    registry = two_properties(tmp_path)
+    monkeypatch.setattr(lite, "properties", registry)
+    monkeypatch.setattr(
+        lite,
+        "snapshot_loader",
+        SnapshotLoader(
+            str(tmp_path / "app.snapshot"),
+            source_checksum(registry.sources()),
+            lite.build_artifacts,
+        ),
+    )
+    client = TestClient(lite.app)
+
+    def ask(property_id, **extra):
+        body = {
+            "resident_id": "R-77",
+            "unit_number": "101",
+            "request_type": "general_inquiry",
+            "message": "Hi there, what can you do?",
+            **extra,
+        }
+        if property_id is not None:
+            body["property_id"] = property_id
+        return client.post("/api/elysia/request", json=body)
+
+    maple = ask("maple-court").json()
+    assert maple["request_id"].startswith("MPC-")
+    assert "Maple Court" in maple["response"]
+    default = ask(None).json()
+    assert default["request_id"].startswith("AVT-")
+    assert "The Avant" in default["response"]
+    record = lite.elysia_engine.active_requests[default["request_id"]]
+    assert record["request"].property_id == "the-avant"
+    assert ask("nowhere").status_code == 404
+
+    amenities = client.get("/api/elysia/amenities?property_id=maple-court").json()
+    assert amenities["amenities"] == MAPLE_COURT["knowledge"]["amenities"]
+    assert client.get("/api/elysia/community?property_id=nowhere").status_code == 404
+
+    request = lite.ResidentRequest(
+        resident_id="R-77",
+        unit_number="101",
+        request_type=lite.RequestType.COMMUNITY_INFO,
+        message="Where can we eat nearby?",
+        property_id="maple-court",
+    )
+    assert "Pearl Street" in lite.knowledge_context(request)
+    assert "Maple Court" in lite.request_prompt(request)
+
+    r = client.get(
+        "/api/elysia/amenities/availability",
+        params={
+            "amenity": "sauna",
+            "start": "2026-11-07",
+            "property_id": "maple-court",
+        },
+    )
+    assert r.status_code == 200
+    # The sauna is Maple Court's; The Avant's book doesn't know it
+    r = client.get(
+        "/api/elysia/amenities/availability",
+        params={"amenity": "sauna", "start": "2026-11-07"},
+    )
+    assert r.status_code == 404
+
+
+def test_same_resident_id_in_two_buildings_keeps_separate_state(tmp_path, monkeypatch):
+    import backend.elysia_lite as lite
+    from backend.analytics import Analytics
+    from backend.sessions import SessionStore
+
+    monkeypatch.setattr(lite, "properties", two_properties(tmp_path))
+
+    class EchoAI:
+        error_count = 0
+
+        async def generate_response(self, request, deadline=None):
+            return "llm answer"
+
+    engine = lite.ElysiaLiteEngine()
+    engine.ai = EchoAI()
+    engine.sessions = SessionStore(spill_dir=str(tmp_path / "spill"))
+    engine.analytics = Analytics()
+
+    def ask(property_id):
+        request = lite.ResidentRequest(
+            resident_id="R-77",
+            unit_number="101",
+            request_type=lite.RequestType.GENERAL_INQUIRY,
+            message="Could you recommend a dentist that other residents like?",
+            property_id=property_id,
+        )
+        return asyncio.run(engine.process_request(request))
+
+    ask("the-avant")
+    maple = ask("maple-court")
+    ask("the-avant")
+
+    assert len(engine.sessions.get("the-avant/R-77").messages) == 4
+    assert len(engine.sessions.get("maple-court/R-77").messages) == 2
+    hub = engine.status_hub
+    assert hub.latest("maple-court/R-77", maple.request_id).status == "responded"
+    assert hub.latest("the-avant/R-77", maple.request_id) is None
+    residents = engine.analytics.snapshot()["top_residents"]
+    assert sorted((r["property_id"], r["count"]) for r in residents) == [
+        ("maple-court", 1),
+        ("the-avant", 2),
+    ]
+
+
+def test_concierge_engine_shares_one_model_across_properties(tmp_path, monkeypatch):
+    # The engine logs to a file in the working directory
+    monkeypatch.chdir(tmp_path)
+    from backend.elysia_concierge import ElysiaConciergeEngine, ResidentRequest
+
+    class SharedModel:
+        tokenizer = None
+        prompts = []
+
+        async def chat_completion(self, prompt, **kwargs):
+            self.prompts.append(prompt)
+            return {"choices": [{"message": {"content": "On it!"}}]}
+
+    registry = two_properties(tmp_path)
+    model = SharedModel()
+    engine = ElysiaConciergeEngine(model, registry)
+
+    async def scenario():
+        for property_id in ("maple-court", None, "maple-court"):
+            request = ResidentRequest(
+                resident_id="R-1",
+                unit_number="2",
+                request_type="community_info",
+                message="Any good restaurants?",
+                property_id=property_id,
+            )
+            await engine.process_resident_request(request)
+
+    asyncio.run(scenario())
+    assert "Maple Court" in model.prompts[0] and "Pearl Street" in model.prompts[0]
+    assert "The Avant" in model.prompts[1]
+    assert engine.prompt_builder("maple-court") is engine.prompt_builder("maple-court")
+    assert sorted(engine.active_requests)[0].startswith("AVT-")
@@ -0,0 +1,234 @@
+"""
+Tests for the maintenance ticket pipeline
+"""
+
+import json
+import sqlite3
+import sys
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+sys.path.append("backend")
+
+from backend.tickets import (
+    HTTPPMSSink,
+    LocalPMSSink,
+    Ticket,
+    TicketPipeline,
+    ticket_id_for,
+)
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class FlakySink:
+    name = "flaky"
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = 0
+
+    def deliver(self, tickets):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ConnectionError("PMS unavailable")
+        return {t.ticket_id: f"EXT-{t.ticket_id}" for t in tickets}
+
+
+def submit(pipeline, key, message="Sink is leaking"):
+    return pipeline.submit(key, "R-1", "304", message, "medium", "AVT-1")
+
+
+def make_pipeline(tmp_path, sink, **kwargs):
+    kwargs.setdefault("flush_interval", 0.02)
+    kwargs.setdefault("backoff", 0.0)
+    return TicketPipeline(sink, outbox_path=str(tmp_path / "outbox.db"), **kwargs)
+
+
+def test_tickets_are_batched_and_delivered_once(tmp_path):
+    sink = LocalPMSSink(str(tmp_path / "pms.jsonl"))
+    pipeline = make_pipeline(tmp_path, sink)
+
+    started = time.perf_counter()
+    ids = [submit(pipeline, f"key-{i}") for i in range(40)]
+    # Enqueueing never touches disk or the PMS
+    assert time.perf_counter() - started < 0.5
+
+    # A retried submission maps to the same ticket
+    assert submit(pipeline, "key-0") == ids[0]
+    assert pipeline.flush()
+    assert wait_until(lambda: pipeline.metrics["delivered"] == 40)
+    pipeline.stop()
+
+    stats = pipeline.stats()
+    assert stats["persisted"] == 40
+    assert stats["duplicates"] == 1
+    assert stats["batches"] < 40
+    lines = (tmp_path / "pms.jsonl").read_text().splitlines()
+    assert sorted(json.loads(line)["ticket_id"] for line in lines) == sorted(ids)
+    assert pipeline.status(ids[0])["status"] == "delivered"
+
+
+def test_failed_deliveries_are_retried(tmp_path):
+    sink = FlakySink(failures=2)
+    pipeline = make_pipeline(tmp_path, sink)
+
+    ticket_id = submit(pipeline, "retry-me")
+    assert wait_until(lambda: pipeline.metrics["delivered"] == 1)
+    pipeline.stop()
+
+    assert pipeline.metrics["delivery_errors"] == 2
+    status = pipeline.status(ticket_id)
+    assert status["attempts"] == 3
+    assert status["external_id"] == f"EXT-{ticket_id}"
+
+
+def test_ticket_is_dead_lettered_after_max_attempts(tmp_path):
+    pipeline = make_pipeline(tmp_path, FlakySink(failures=100), max_attempts=2)
+
+    ticket_id = submit(pipeline, "never-delivered")
+    assert wait_until(lambda: pipeline.metrics["dead_lettered"] == 1)
+    pipeline.stop()
+
+    status = pipeline.status(ticket_id)
+    assert status["status"] == "failed"
+    assert "PMS unavailable" in status["last_error"]
+
+
+def test_outbox_survives_restart(tmp_path):
+    down = make_pipeline(tmp_path, FlakySink(failures=100), backoff=60.0)
+    ticket_id = submit(down, "survives")
+    assert down.flush()
+    down.stop()
+    assert down.status(ticket_id)["status"] == "pending"
+
+    # A new process with a healthy PMS picks up pending tickets once due
+    with sqlite3.connect(str(tmp_path / "outbox.db")) as conn:
+        conn.execute("UPDATE tickets SET next_attempt_at = 0")
+    up = make_pipeline(tmp_path, FlakySink(failures=0))
+    # Started at boot: no new ticket needed to get the old ones delivered
+    up.start()
+    assert wait_until(lambda: up.metrics["delivered"] == 1)
+    assert up.status(ticket_id)["status"] == "delivered"
+    # Status lookups reuse one connection
+    reader = up._reader
+    up.status(ticket_id)
+    assert up._reader is reader
+    up.stop()
+
+
+class StuckSink:
+    name = "stuck"
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def deliver(self, tickets):
+        self.release.wait(5)
+        return {t.ticket_id: "EXT" for t in tickets}
+
+
+def test_slow_pms_never_holds_up_persistence(tmp_path):
+    sink = StuckSink()
+    pipeline = make_pipeline(tmp_path, sink)
+    first = submit(pipeline, "first")
+    assert wait_until(lambda: pipeline.metrics["persisted"] == 1)
+
+    # Delivery of the first ticket is stuck; later ones still reach the outbox
+    later = [submit(pipeline, f"later-{i}") for i in range(5)]
+    assert pipeline.flush(timeout=1.0)
+    assert pipeline.metrics["persisted"] == 6
+    assert pipeline.status(later[-1])["status"] == "pending"
+
+    sink.release.set()
+    assert wait_until(lambda: pipeline.metrics["delivered"] == 6)
+    pipeline.stop()
+    assert pipeline.status(first)["status"] == "delivered"
+
+
+def test_http_sink_bounds_the_whole_batch(tmp_path, monkeypatch):
+    timeouts = []
+
+    class Reply:
+        content = b""
+
+        def raise_for_status(self):
+            return None
+
+    def slow_post(url, json=None, headers=None, timeout=None):
+        timeouts.append(timeout)
+        time.sleep(0.1)
+        return Reply()
+
+    monkeypatch.setattr("requests.post", slow_post)
+    pipeline = make_pipeline(tmp_path, HTTPPMSSink("http://pms", timeout=0.25))
+    ids = [submit(pipeline, f"key-{i}") for i in range(5)]
+    assert wait_until(lambda: pipeline.metrics["delivery_errors"] >= 1)
+    pipeline.stop()
+
+    # The first batch ran out of time part way; the rest wait for a retry
+    assert all(t <= 0.25 for t in timeouts)
+    statuses = [pipeline.status(ticket_id) for ticket_id in ids]
+    assert any(s["status"] == "delivered" for s in statuses)
+    assert any("batch timeout" in (s["last_error"] or "") for s in statuses)
+
+
+def test_work_order_ids_are_unique_across_workers(tmp_path):
+    path = str(tmp_path / "pms.jsonl")
+    tickets = [
+        Ticket(ticket_id_for(key), key, "R-1", "304", "Leak", "medium", "AVT-1", 0.0)
+        for key in ("a", "b")
+    ]
+
+    # Two worker processes open the same file before either has written
+    first, second = LocalPMSSink(path), LocalPMSSink(path)
+    ids = {**first.deliver(tickets[:1]), **second.deliver(tickets[1:])}
+    assert len(set(ids.values())) == 2
+    # Redelivery after a restart keeps the work order it got
+    assert LocalPMSSink(path).deliver(tickets[:1]) == {
+        tickets[0].ticket_id: ids[tickets[0].ticket_id]
+    }
+
+
+def test_idempotency_keys_are_scoped_per_resident_and_property(tmp_path):
+    pipeline = make_pipeline(tmp_path, FlakySink(failures=0))
+    ids = [
+        pipeline.submit("1", resident, "304", "Leak", "medium", "AVT-1", prop)
+        for resident, prop in [
+            ("R-1", "the-avant"),
+            ("R-2", "the-avant"),
+            ("R-1", "harbor-view"),
+            ("R-1", "the-avant"),
+        ]
+    ]
+    assert pipeline.flush()
+    pipeline.stop()
+    assert len(set(ids[:3])) == 3
+    assert ids[3] == ids[0]
+
+
+def test_maintenance_request_returns_ticket_id():
+    from backend.elysia_lite import app
+
+    client = TestClient(app)
+    payload = {
+        "resident_id": "TEST-T1",
+        "unit_number": "210",
+        "request_type": "maintenance",
+        "message": "The dishwasher won't drain",
+    }
+    headers = {"Idempotency-Key": "client-retry-1"}
+    first = client.post("/api/elysia/request", json=payload, headers=headers).json()
+    second = client.post("/api/elysia/request", json=payload, headers=headers).json()
+
+    assert first["ticket_id"].startswith("MAINT-")
+    assert first["ticket_id"] == second["ticket_id"]
@@ -0,0 +1,176 @@
+"""
+Tests for traffic capture and load replay
+"""
+
+import asyncio
+import json
+import os
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.append("backend")
+
+from backend.traffic import (
+    Result,
+    TrafficRecorder,
+    load_traffic,
+    percentile,
+    replay,
+    summarize,
+)
+
+
+def captured(count, start=1_800_000_000.0, spacing=0.01):
+    request_types = ("general_inquiry", "community_info", "maintenance")
+    return [
+        {
+            "ts": start + i * spacing,
+            "method": "POST",
+            "path": "/api/elysia/request",
+            "headers": {},
+            "body": {
+                "resident_id": f"RES-LOAD-{i}",
+                "unit_number": f"{100 + i}",
+                "request_type": request_types[i % len(request_types)],
+                "message": "When is the pool open?",
+            },
+        }
+        for i in range(count)
+    ]
+
+
+def test_recorder_anonymizes_and_keeps_shape(tmp_path):
+    path = tmp_path / "capture.jsonl"
+    recorder = TrafficRecorder(str(path), salt="s3cret")
+    for unit in ("304", "304", "512"):
+        recorder.record(
+            "/api/elysia/request",
+            {
+                "resident_id": f"R-{unit}",
+                "unit_number": unit,
+                "request_type": "maintenance",
+                "message": "Call me at (555) 123-4567 or jo@example.com",
+            },
+            {"X-Elysia-Deadline-Ms": "5000", "authorization": "Bearer x"},
+        )
+    recorder.close()
+
+    records = load_traffic(str(path))
+    assert len(records) == 3
+    bodies = [record["body"] for record in records]
+    assert bodies[0]["resident_id"] == bodies[1]["resident_id"] != "R-304"
+    assert bodies[0]["unit_number"] != bodies[2]["unit_number"]
+    assert bodies[0]["message"] == "Call me at <phone> or <email>"
+    assert records[0]["headers"] == {"x-elysia-deadline-ms": "5000"}
+    assert "304" not in path.read_text()
+
+
+def test_sampling_records_a_fraction(tmp_path):
+    recorder = TrafficRecorder(str(tmp_path / "c.jsonl"), sample_rate=0.0)
+    recorder.record("/api/elysia/request", {"message": "hi"}, {})
+    assert recorder.recorded == 0
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork")
+def test_workers_appending_to_one_capture_never_interleave(tmp_path):
+    path = tmp_path / "capture.jsonl"
+    recorder = TrafficRecorder(str(path), salt="s", flush_every=7)
+    message = "The hallway light is flickering again " * 40
+
+    def burst(worker):
+        for i in range(500):
+            recorder.record(
+                "/api/elysia/request",
+                {"resident_id": f"R-{worker}", "message": f"{i} {message}"},
+                {},
+            )
+        recorder.close()
+
+    recorder.record("/api/elysia/request", {"message": "before fork"}, {})
+    pids = []
+    for worker in range(3):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                burst(worker)
+            finally:
+                os._exit(0)
+        pids.append(pid)
+    burst("parent")
+    for pid in pids:
+        os.waitpid(pid, 0)
+
+    records = load_traffic(str(path))
+    assert len(records) == 1 + 4 * 500
+    assert sum(r["body"]["message"].endswith(message) for r in records) == 2000
+
+
+def test_percentiles_and_summary():
+    ordered = [i / 1000 for i in range(1, 1001)]
+    assert percentile(ordered, 0.5) == 0.501
+    assert percentile(ordered, 0.999) == 0.999
+    assert percentile([], 0.99) == 0.0
+
+    results = [Result("maintenance", "mock", 200, 0.01)] * 8
+    results += [Result("maintenance", "mock", 429, 0.001)]
+    results += [Result("general_inquiry", "error", 0, 1.0, "connection refused")]
+    report = summarize(results, elapsed=2.0)
+    assert report["overall"]["requests"] == 10
+    assert report["overall"]["throughput_rps"] == 5.0
+    assert report["overall"]["error_rate"] == 0.1
+    assert report["by_request_type"]["maintenance"]["rejected"] == 1
+    assert report["by_backend"]["mock"]["p50_ms"] == 10.0
+
+
+def test_open_loop_replay_against_in_process_app():
+    from backend.elysia_lite import app
+
+    # 20 requests spaced 10 ms apart, replayed at 10x: about 20 ms of schedule
+    report = asyncio.run(replay(captured(20), app, speed=10))
+    assert report["overall"]["requests"] == 20
+    assert report["overall"]["error_rate"] == 0.0
+    assert set(report["by_request_type"]) == {
+        "community_info",
+        "general_inquiry",
+        "maintenance",
+    }
+    assert "none" not in report["by_backend"]
+
+
+def test_closed_loop_replay_against_in_process_app():
+    from backend.elysia_lite import app
+
+    report = asyncio.run(replay(captured(12), app, closed_loop=True, concurrency=4))
+    assert report["overall"]["requests"] == 12
+    assert report["overall"]["p99_ms"] >= report["overall"]["p50_ms"]
+
+
+def test_capture_endpoint_hook(tmp_path):
+    from backend.elysia_lite import app, elysia_engine
+
+    path = tmp_path / "capture.jsonl"
+    recorder, elysia_engine.recorder = elysia_engine.recorder, TrafficRecorder(
+        str(path), salt="x"
+    )
+    try:
+        TestClient(app).post(
+            "/api/elysia/request",
+            json={
+                "resident_id": "TEST-CAP1",
+                "unit_number": "808",
+                "request_type": "general_inquiry",
+                "message": "Is there parking for guests?",
+            },
+        )
+        elysia_engine.recorder.close()
+    finally:
+        elysia_engine.recorder = recorder
+
+    [line] = path.read_text().splitlines()
+    record = json.loads(line)
+    assert record["path"] == "/api/elysia/request"
+    assert record["body"]["request_type"] == "general_inquiry"
+    assert record["body"]["resident_id"].startswith("RES-")
+    assert "timestamp" not in record["body"]